@@ -0,0 +1,58 @@
+"""
+Incremental training data: a cold run_cycle fetch against a warm one that
+only pulls the delta since the FeatureCache watermark.
+
+    python -m benchmarks.bench_cache [--days 7] [--delta-hours 24]
+"""
+import argparse
+import datetime
+import tempfile
+import time
+
+import forecaster
+from benchmarks.fake_pb import FakePocketBase
+from benchmarks.synth import make_readings
+from feature_cache import FeatureCache
+from pb_client import PBClient
+
+PLACE = "benchplace0001"
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--days", type=float, default=7)
+    ap.add_argument("--delta-hours", type=float, default=24)
+    args = ap.parse_args()
+
+    now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None, microsecond=0)
+    split = now - datetime.timedelta(hours=args.delta_hours)
+    history = make_readings(PLACE, days=args.days, end=split)
+    delta = make_readings(PLACE, days=args.delta_hours / 24, end=now, seed=1)
+
+    with tempfile.TemporaryDirectory() as tmp, FakePocketBase() as pb:
+        pb.seed("places", [{"id": PLACE, "name": "Bench Room", "capacity": 10}])
+        pb.seed("sensor_readings", history)
+        f = forecaster.WeeklyForecaster(PBClient(pb.url))
+        f.cache_dir = tmp
+        place = {"id": PLACE}
+
+        for label in ("cold", "warm"):
+            if label == "warm":
+                # Records created between the two cycles
+                for rec in delta:
+                    rec["created"] = (datetime.datetime.now(datetime.timezone.utc)
+                                      .strftime("%Y-%m-%d %H:%M:%S.%f")[:-3] + "Z")
+                pb.seed("sensor_readings", delta)
+                # The delta's upper bound trails the clock by the watermark lag
+                time.sleep(forecaster.WATERMARK_LAG_SECONDS + 0.1)
+            pb.reset_counters()
+            cache = FeatureCache(PLACE, tmp)
+            t0 = time.perf_counter()
+            f.refresh_training_data(place, cache)
+            elapsed = time.perf_counter() - t0
+            print(f"{label}: {elapsed:6.2f} s  requests={pb.requests:4d}  "
+                  f"bytes={pb.bytes_sent / 2**20:7.2f} MB  rows in cache={len(cache)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+PBClient against the PocketBase stub: module-level requests.post calls (a
+new TCP connection per call, as pb_client.py used to make them) against
+the shared pooled client, plus the proactive token refresh and the 401 retry path.
+
+    python -m benchmarks.bench_client
+"""
+import argparse
+import time
+
+import requests
+
+from benchmarks.fake_pb import FakePocketBase, make_token
+from config import PB_TOKEN_REFRESH_MARGIN_SECONDS
+from pb_client import PBClient
+
+PLACE = "benchplace0001"
+COLLECTION = "/api/collections/sensor_readings/records"
+AUTH_PATH = "/api/collections/users/auth-with-password"
+
+
+def reading(i):
+    return {"place_id": PLACE, "recorded_at": "2025-03-03 10:00:00Z", "temp_c": 22.0 + i % 5 / 10}
+
+
+def auth_count(pb):
+    return sum(n for (method, route), n in pb.by_route.items()
+               if method == "POST" and route.endswith("auth-with-password"))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--calls", type=int, default=500)
+    ap.add_argument("--latency", type=float, default=0.0)
+    args = ap.parse_args()
+
+    with FakePocketBase(latency=args.latency, require_auth=True) as pb:
+        creds = {"identity": "bench@example.com", "password": "bench"}
+
+        pb.reset_counters()
+        t0 = time.perf_counter()
+        token = requests.post(f"{pb.url}{AUTH_PATH}", json=creds, timeout=5).json()["token"]
+        for i in range(args.calls):
+            requests.post(f"{pb.url}{COLLECTION}", json=reading(i),
+                          headers={"Authorization": f"Bearer {token}"}, timeout=5)
+        elapsed = time.perf_counter() - t0
+        print(f"{'one-off requests':<18} {elapsed:6.2f} s  {elapsed / args.calls * 1000:6.2f} ms/call  "
+              f"requests={pb.requests:5d}  connections={pb.connections:4d}  logins={auth_count(pb)}")
+
+        pb.reset_counters()
+        client = PBClient(pb.url)
+        t0 = time.perf_counter()
+        client.login(creds["identity"], creds["password"])
+        for i in range(args.calls):
+            assert client.request("POST", COLLECTION, json=reading(i)).status_code == 200
+        elapsed = time.perf_counter() - t0
+        print(f"{'pooled PBClient':<18} {elapsed:6.2f} s  {elapsed / args.calls * 1000:6.2f} ms/call  "
+              f"requests={pb.requests:5d}  connections={pb.connections:4d}  logins={auth_count(pb)}")
+
+        # Token that enters the refresh margin one second from now
+        pb.token_ttl = PB_TOKEN_REFRESH_MARGIN_SECONDS + 1
+        client.login(creds["identity"], creds["password"])
+        pb.reset_counters()
+        time.sleep(1.2)
+        for i in range(5):
+            assert client.request("GET", COLLECTION, params={"perPage": 1}).status_code == 200
+        print(f"\nproactive refresh: 5 calls -> logins={auth_count(pb)} (expected 1), "
+              f"401s=0 by construction")
+
+        # Token the client cannot decode expiry from and the server rejects
+        pb.token_ttl = 3600
+        client.token, client._token_exp = make_token(-60), None
+        pb.reset_counters()
+        r = client.request("GET", COLLECTION, params={"perPage": 1})
+        print(f"401 retry: status={r.status_code}  requests={pb.requests} (401 + login + retry)  "
+              f"logins={auth_count(pb)}")
+
+        print("\nper-endpoint latency (pooled client):")
+        for route, st in sorted(client.latency_stats().items()):
+            print(f"  {route:<60} n={st['count']:5d}  err={st['errors']:3d}  "
+                  f"avg={st['avg_ms']:6.2f} ms  max={st['max_ms']:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
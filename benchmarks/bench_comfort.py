@@ -0,0 +1,91 @@
+"""
+Comfort scoring: checks the array functions against the scalar ones on
+random and boundary inputs (including None), then compares throughput
+over millions of rows.
+
+    python -m benchmarks.bench_comfort [--rows 2000000]
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from comfort import (
+    calc_comfort_score, calculate_thermal_score, calculate_iaq_score,
+    calc_comfort_score_array, calculate_thermal_score_array, calculate_iaq_score_array
+)
+
+EDGES = {
+    'temp': [16.9, 17.0, 17.1, 17.99, 18.0, 19.5, 19.99, 20.0, 20.5, 21.0, 22.5, 24.0, 24.01,
+             25.0, 26.0, 26.01, 28.0, 29.0, 29.01, 30.0, 30.01, 35.0],
+    'rh': [10.0, 29.99, 30.0, 45.0, 60.0, 60.01, 95.0],
+    'co2': [0, 400, 800, 800.5, 1000, 1000.5, 1200, 1200.01, 1500, 1500.5, 2500, 3000],
+    'voc': [0, 50, 50.5, 100, 100.5, 200, 200.5, 250, 250.01, 400, 500],
+}
+RANGES = {'temp': (10.0, 40.0), 'rh': (0.0, 100.0), 'co2': (300.0, 3500.0), 'voc': (0.0, 500.0)}
+
+
+def sample(rng, n, none_rate=0.05):
+    cols = {}
+    for name, (lo, hi) in RANGES.items():
+        vals = []
+        for _ in range(n):
+            r = rng.random()
+            if r < none_rate:
+                vals.append(None)
+            elif r < 0.3:
+                vals.append(rng.choice(EDGES[name]))
+            elif r < 0.4:
+                vals.append(round(rng.uniform(lo, hi), 2))  # sensor-like precision
+            else:
+                vals.append(rng.uniform(lo, hi))
+        cols[name] = vals
+    return cols
+
+
+def check_equivalence(n=200_000, seed=0):
+    cols = sample(random.Random(seed), n)
+    t, h, c, v = cols['temp'], cols['rh'], cols['co2'], cols['voc']
+    pairs = [
+        ([calculate_thermal_score(*a) for a in zip(t, h)], calculate_thermal_score_array(t, h)),
+        ([calculate_iaq_score(*a) for a in zip(c, v)], calculate_iaq_score_array(c, v)),
+        ([calc_comfort_score(*a) for a in zip(t, h, c, v)], calc_comfort_score_array(t, h, c, v)),
+    ]
+    for name, (scalar, array) in zip(("thermal", "iaq", "comfort"), pairs):
+        mismatch = [i for i, (a, b) in enumerate(zip(scalar, array.tolist())) if a != b]
+        assert not mismatch, f"{name}: {len(mismatch)} mismatches, first at {mismatch[0]}: " \
+                             f"{[cols[k][mismatch[0]] for k in cols]} {scalar[mismatch[0]]} != {array[mismatch[0]]}"
+    print(f"equivalence   : {n} rows x 3 functions, exact match (incl. None and boundary values)")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=2_000_000)
+    args = ap.parse_args()
+    check_equivalence()
+
+    rng = np.random.default_rng(1)
+    t = rng.uniform(10, 40, args.rows)
+    h = rng.uniform(0, 100, args.rows)
+    c = rng.uniform(300, 3500, args.rows)
+    v = rng.uniform(0, 500, args.rows)
+
+    sample_n = min(args.rows, 200_000)
+    tl, hl, cl, vl = (a[:sample_n].tolist() for a in (t, h, c, v))
+    t0 = time.perf_counter()
+    for row in zip(tl, hl, cl, vl):
+        calc_comfort_score(*row)
+    scalar_rate = sample_n / (time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    calc_comfort_score_array(t, h, c, v)
+    array_s = time.perf_counter() - t0
+
+    print(f"scalar loop   : {scalar_rate / 1e6:8.2f} M rows/s (measured on {sample_n} rows)")
+    print(f"array         : {args.rows / array_s / 1e6:8.2f} M rows/s ({args.rows} rows in {array_s * 1000:.0f} ms)")
+    print(f"speedup       : {args.rows / array_s / scalar_rate:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
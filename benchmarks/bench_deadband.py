@@ -0,0 +1,86 @@
+"""
+Write volume of the deadband reporting policy: a simulated week of
+5-second samples (sensor noise at datasheet-like levels, occupancy in
+working hours, PIR toggling while people are in) is passed through the
+agent's smoothing filters and DeadbandPolicy, and the share of samples
+written is reported for working hours, nights/weekends and overall.
+The written rows are then paced like the forecaster's training rows (one
+per heartbeat slot, features.pace_index): training rows per hour should
+come out the same in busy and quiet hours.
+
+    python -m benchmarks.bench_deadband --days 7 --heartbeat 300
+"""
+import argparse
+
+import numpy as np
+
+from comfort import calc_comfort_score
+from features import pace_index
+from config import CO2_EMA_ALPHA, GAS_HISTORY_LEN, TEMP_HISTORY_LEN, REPORT_DEADBANDS
+from reporting import DeadbandPolicy
+from smoothing import ExponentialMovingAverage, MovingAverage, RollingMedian
+
+
+def simulate(days, interval, seed=0):
+    rng = np.random.default_rng(seed)
+    n = int(days * 86400 // interval)
+    t = np.arange(n) * interval
+    hour = (t // 3600) % 24
+    weekday = (t // 86400) % 7 < 5
+    busy = weekday & (hour >= 9) & (hour < 18)
+    people = np.where(busy, rng.integers(0, 6, n // 720 + 1).repeat(720)[:n], 0)  # 1 saatlik bloklar
+    # Oda sıcaklığı ve CO2 yavaş değişir (birinci dereceden yaklaşım), üstüne ölçüm gürültüsü
+    temp = np.empty(n)
+    co2 = np.empty(n)
+    temp[0], co2[0] = 21.0, 420.0
+    for i in range(1, n):
+        temp[i] = temp[i - 1] + (21.0 + 0.4 * people[i] - temp[i - 1]) * interval / 1800
+        co2[i] = co2[i - 1] + (420 + 120 * people[i] - co2[i - 1]) * interval / 900
+    temp += rng.normal(0, 0.05, n)
+    co2 += rng.normal(0, 10, n)
+    rh = 42 + 0.5 * np.sin(t / 86400 * 2 * np.pi) + rng.normal(0, 0.2, n)
+    voc = 40 + 10 * people + rng.normal(0, 3, n) + (rng.random(n) < 0.002) * 150  # ısıtıcı sıçramaları
+    pir = (people > 0) & (rng.random(n) < 0.6)
+    return busy, temp, rh, co2, voc, pir
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--days", type=float, default=7)
+    ap.add_argument("--interval", type=int, default=5)
+    ap.add_argument("--heartbeat", type=float, default=300)
+    args = ap.parse_args()
+
+    busy, temp, rh, co2, voc, pir = simulate(args.days, args.interval)
+    f_temp, f_voc, f_co2 = MovingAverage(TEMP_HISTORY_LEN), RollingMedian(GAS_HISTORY_LEN), \
+        ExponentialMovingAverage(CO2_EMA_ALPHA)
+    policy = DeadbandPolicy(REPORT_DEADBANDS, args.heartbeat)
+    sent = np.zeros(len(temp), dtype=bool)
+    reasons = {}
+    for i in range(len(temp)):
+        payload = {"temp_c": round(f_temp.update(temp[i]), 2), "rh_percent": round(rh[i], 2),
+                   "voc_index": int(f_voc.update(voc[i])), "co2_ppm": int(round(f_co2.update(co2[i]))),
+                   "pir_occupied": bool(pir[i])}
+        payload["comfort_score"] = calc_comfort_score(payload["temp_c"], payload["rh_percent"],
+                                                      payload["co2_ppm"], payload["voc_index"])
+        reason = policy.check(payload, i * args.interval)
+        if reason:
+            sent[i] = True
+            reasons[reason] = reasons.get(reason, 0) + 1
+
+    print(f"{len(sent)} samples over {args.days:g} days, deadbands {REPORT_DEADBANDS}, heartbeat {args.heartbeat:g} s")
+    for label, mask in (("working hours", busy), ("nights/weekends", ~busy), ("overall", np.ones_like(busy))):
+        written = int(sent[mask].sum())
+        print(f"{label:<16} written {written:7d} / {int(mask.sum()):7d}  ({written / max(mask.sum(), 1):6.1%})")
+    print("by reason:", reasons)
+
+    written = np.flatnonzero(sent)
+    trained = np.zeros_like(sent)
+    trained[written[pace_index(written * args.interval * 10**9, int(args.heartbeat * 10**9))]] = True
+    for label, mask in (("working hours", busy), ("nights/weekends", ~busy)):
+        hours = mask.sum() * args.interval / 3600
+        print(f"{label:<16} training rows per hour {trained[mask].sum() / max(hours, 1e-9):6.1f}")
+
+
+if __name__ == "__main__":
+    main()
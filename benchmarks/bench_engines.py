@@ -0,0 +1,39 @@
+"""
+Forecast engines side by side: WeeklyForecaster.backtest_place against the
+PocketBase stub on synthetic readings, i.e. the same path as
+`python forecaster.py --backtest` on a deployment. Each of the last
+--weeks weeks is held out in turn; fit time, predict time for one
+168-hour horizon, pickled size and MAE per target are averaged.
+
+    python -m benchmarks.bench_engines --days 28 --interval 60 --weeks 2
+"""
+import argparse
+import os
+import tempfile
+
+from benchmarks.fake_pb import FakePocketBase
+from benchmarks.synth import make_dataset, seed_stub
+from forecaster import WeeklyForecaster, _print_backtest
+from pb_client import PBClient
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--days", type=float, default=28, help="must stay within TRAINING_WINDOW_DAYS")
+    ap.add_argument("--interval", type=int, default=60)
+    ap.add_argument("--weeks", type=int, default=2)
+    args = ap.parse_args()
+
+    dataset = make_dataset(places=1, days=args.days, interval=args.interval, seed=0)
+    place_id = dataset["places"][0]["id"]
+    with FakePocketBase() as pb, tempfile.TemporaryDirectory() as tmp:
+        seed_stub(pb, dataset)
+        f = WeeklyForecaster(PBClient(pb.url))
+        f.cache_dir = os.path.join(tmp, "features")
+        f._login()
+        print(f"{len(dataset['sensor_readings'])} readings over {args.days:g} days at {args.interval} s\n")
+        _print_backtest(f.backtest_place(place_id, weeks=args.weeks))
+
+
+if __name__ == "__main__":
+    main()
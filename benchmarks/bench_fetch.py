@@ -0,0 +1,62 @@
+"""
+History fetch against the PocketBase stub: the old single perPage=1000
+request against the paginated fetcher with 1, 4 and 8 pages in flight.
+The stub runs in the same process, so JSON encoding on the server side
+competes with the client for the GIL; the traced peak covers both.
+
+    python -m benchmarks.bench_fetch [--days 7] [--latency 0.02]
+"""
+import argparse
+import time
+import tracemalloc
+
+import requests
+
+from benchmarks.fake_pb import FakePocketBase
+from benchmarks.synth import make_readings
+from forecaster import WeeklyForecaster
+from pb_client import PBClient
+from pb_pages import iter_records
+
+PLACE = "benchplace0001"
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--days", type=float, default=7)
+    ap.add_argument("--latency", type=float, default=0.02)
+    args = ap.parse_args()
+
+    with FakePocketBase(latency=args.latency) as pb:
+        pb.seed("sensor_readings", make_readings(PLACE, days=args.days))
+        total = len(pb.records("sensor_readings"))
+        print(f"{total} readings ({args.days:g} days @ 5 s), stub latency {args.latency * 1000:.0f} ms\n")
+        flt = f"place_id='{PLACE}'"
+
+        f = WeeklyForecaster(PBClient(pb.url))
+        # Warm the stub's sorted listing cache once
+        f.get_records("sensor_readings", flt, limit=1)
+
+        pb.reset_counters()
+        t0 = time.perf_counter()
+        legacy = requests.get(f"{pb.url}/api/collections/sensor_readings/records",
+                              params={"filter": flt, "sort": "-created", "perPage": 1000}).json()["items"]
+        print(f"{'legacy single page':<22} rows={len(legacy):7d}  {time.perf_counter() - t0:7.2f} s  requests={pb.requests}")
+
+        for in_flight in (1, 4, 8):
+            pb.reset_counters()
+            tracemalloc.start()
+            t0 = time.perf_counter()
+            rows = 0
+            for rec in iter_records(f.pb.request, "sensor_readings", filter_str=flt, max_in_flight=in_flight):
+                rows += 1
+            elapsed = time.perf_counter() - t0
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            assert rows == total, (rows, total)
+            print(f"{f'paged, {in_flight} in flight':<22} rows={rows:7d}  {elapsed:7.2f} s  requests={pb.requests}"
+                  f"  traced peak={peak / 2**20:6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
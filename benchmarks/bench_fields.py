@@ -0,0 +1,84 @@
+"""
+PocketBase list queries with and without field projection and skipTotal,
+on the stub: the training-readings query (pb_queries.QUERIES) as full
+records with totals (the old listing), with skipTotal only, and with
+`fields=` + skipTotal. Reports bytes on the wire, requests and client-side
+JSON parse time per 10k records, and the end-to-end paged fetch time.
+
+The stub's count is free (it slices an in-memory list); on PocketBase
+skipTotal also drops a COUNT(*) over the filter for every page.
+
+    python -m benchmarks.bench_fields --days 3
+"""
+import argparse
+import json
+import time
+
+from benchmarks.fake_pb import FakePocketBase
+from benchmarks.synth import make_readings
+from pb_client import PBClient
+from pb_queries import QUERIES
+
+PLACE = "benchplace0001"
+
+
+def fetch(client, pb, **kwargs):
+    q = QUERIES['training_readings']
+    bodies = []
+    request = client.request
+
+    def capture(method, path, **kw):
+        r = request(method, path, **kw)
+        bodies.append(r.content)
+        return r
+
+    client.request = capture
+    pb.reset_counters()
+    t0 = time.perf_counter()
+    try:
+        rows = sum(1 for _ in client.iter_records(q.collection, f"place_id='{PLACE}'", sort=q.sort, **kwargs))
+    finally:
+        client.request = request
+    return rows, time.perf_counter() - t0, pb.bytes_sent, pb.requests, bodies
+
+
+def parse_seconds(bodies, repeat=10):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for body in bodies:
+            json.loads(body)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--days", type=float, default=3)
+    ap.add_argument("--latency", type=float, default=0.005)
+    args = ap.parse_args()
+
+    with FakePocketBase(latency=args.latency, require_auth=False) as pb:
+        pb.seed("sensor_readings", make_readings(PLACE, days=args.days))
+        total = len(pb.records("sensor_readings"))
+        client = PBClient(pb.url, token="bench")
+        fetch(client, pb, fields=QUERIES['training_readings'].fields)  # stub'ın sıralı liste önbelleği ısınsın
+        print(f"{total} readings, stub latency {args.latency * 1000:g} ms; per 10k records:\n")
+        print(f"{'':<22} {'bytes':>10} {'requests':>9} {'json parse':>11} {'fetch':>9}")
+        base = None
+        for label, kwargs in (("full + totals", {"skip_total": False}),
+                              ("full, skipTotal", {}),
+                              ("fields + skipTotal", {"fields": QUERIES['training_readings'].fields})):
+            rows, elapsed, sent, reqs, bodies = fetch(client, pb, **kwargs)
+            assert rows == total, (rows, total)
+            per = 10000 / rows
+            parse = parse_seconds(bodies)
+            print(f"{label:<22} {sent * per / 2**20:7.2f} MB {reqs * per:9.1f} {parse * per * 1000:8.1f} ms "
+                  f"{elapsed * per * 1000:6.0f} ms")
+            if base is None:
+                base = (sent, parse)
+        print(f"\nprojection: {sent / base[0]:.0%} of the bytes, {parse / base[1]:.0%} of the parse time")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Sampling jitter while a forecast cycle runs: a drift-free asyncio tick loop
+(the agent's sampling schedule plus a comfort score and JSON encode per
+tick) measured idle, with run_cycle on a thread in the same process, and
+with run_cycle in a ForecastWorker process.
+
+The PocketBase stub runs in its own process so serving pages does not
+count against either mode.
+
+    python -m benchmarks.bench_jitter --days 7 --interval 0.05
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing as mp
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from benchmarks.fake_pb import FakePocketBase
+from benchmarks.synth import make_readings
+from comfort import calc_comfort_score
+
+PLACE = "benchplace0001"
+
+
+def _serve(days, url_out, stop):
+    with FakePocketBase() as pb:
+        pb.seed("places", [{"id": PLACE, "name": "Bench Room", "capacity": 10}])
+        pb.seed("sensor_readings", make_readings(PLACE, days=days))
+        url_out.send(pb.url)
+        stop.wait()
+
+
+async def sample(interval, until):
+    """Runs ticks at start + k * interval until `until()` is true; returns lateness in ms."""
+    late = []
+    start = time.monotonic()
+    tick = 0
+    while not until():
+        deadline = start + tick * interval
+        await asyncio.sleep(max(0.0, deadline - time.monotonic()))
+        late.append((time.monotonic() - deadline) * 1000)
+        json.dumps({"comfort_score": calc_comfort_score(22.5, 45.0, 700, 80), "tick": tick})
+        tick += 1
+        tick = max(tick, int((time.monotonic() - start) // interval))
+    return np.array(late)
+
+
+def report(label, late, interval, seconds):
+    missed = int(np.count_nonzero(late > interval * 1000))
+    print(f"{label:<16} {seconds:6.1f} s  ticks={len(late):5d}  p50={np.percentile(late, 50):6.2f} ms  "
+          f"p99={np.percentile(late, 99):7.2f} ms  max={late.max():7.2f} ms  late>interval={missed}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--days", type=float, default=7)
+    ap.add_argument("--interval", type=float, default=0.05)
+    ap.add_argument("--idle-seconds", type=float, default=5)
+    args = ap.parse_args()
+
+    ctx = mp.get_context("spawn")
+    url_in, url_out = ctx.Pipe(duplex=False)
+    stop = ctx.Event()
+    server = ctx.Process(target=_serve, args=(args.days, url_out, stop), daemon=True)
+    server.start()
+    url = url_in.recv()
+
+    from forecaster import WeeklyForecaster
+    from forecast_worker import ForecastWorker
+    from model_store import ModelStore
+    from pb_client import PBClient
+
+    try:
+        t0 = time.monotonic()
+        late = asyncio.run(sample(args.interval, lambda: time.monotonic() - t0 > args.idle_seconds))
+        report("idle", late, args.interval, time.monotonic() - t0)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            f = WeeklyForecaster(PBClient(url))
+            f.cache_dir, f.model_store = tmp, ModelStore(f"{tmp}/models")
+            thread = threading.Thread(target=f.run_cycle, args=(PLACE,), daemon=True)
+            t0 = time.monotonic()
+            thread.start()
+            late = asyncio.run(sample(args.interval, lambda: not thread.is_alive()))
+            report("thread", late, args.interval, time.monotonic() - t0)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            worker = ForecastWorker(base_url=url, cache_dir=tmp, model_dir=f"{tmp}/models").start()
+            # Exclude interpreter start-up and imports: wait for the worker's first message
+            worker.submit(PLACE)
+            while worker.last_progress is None:
+                time.sleep(0.01)
+            t0 = time.monotonic()
+            late = asyncio.run(sample(args.interval, lambda: not worker.busy))
+            report("process", late, args.interval, time.monotonic() - t0)
+            worker.stop()
+    finally:
+        stop.set()
+        server.join(5)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Dashboard polling straight against PocketBase (latest sensor_readings row +
+the place's forecasts, every poll) against the agent's local API (/latest +
+/forecast with If-None-Match), with `--viewers` concurrent pollers while
+readings keep arriving. Reports per-poll latency, bytes and the requests
+that reached PocketBase, then the delay from a new sample to its
+Server-Sent Event on /events.
+
+    python -m benchmarks.bench_local_api --viewers 20 --polls 50 --latency 0.005
+"""
+import argparse
+import datetime
+import json
+import statistics
+import threading
+import time
+
+import requests
+
+from benchmarks.fake_pb import FakePocketBase
+from benchmarks.synth import make_readings
+from local_api import LocalState, serve
+from pb_client import PBClient
+
+PLACE = "benchplace0001"
+
+
+def make_forecasts(start):
+    return [{"place_id": PLACE, "target_ts": (start + datetime.timedelta(hours=i)).strftime("%Y-%m-%d %H:00:00Z"),
+             "predicted_occupancy": 0.3, "predicted_comfort_score": 0.8} for i in range(168)]
+
+
+def direct_poll(session, base, etags):
+    r1 = session.get(f"{base}/api/collections/sensor_readings/records",
+                     params={"filter": f"place_id='{PLACE}'", "sort": "-created", "perPage": 1})
+    r2 = session.get(f"{base}/api/collections/forecasts/records",
+                     params={"filter": f"place_id='{PLACE}'", "sort": "target_ts", "perPage": 200})
+    return len(r1.content) + len(r2.content)
+
+
+def local_poll(session, base, etags):
+    size = 0
+    for path in ("/latest", "/forecast"):
+        headers = {"If-None-Match": etags[path]} if path in etags else {}
+        r = session.get(base + path, headers=headers)
+        if r.status_code == 200:
+            etags[path] = r.headers["ETag"]
+        size += len(r.content)
+    return size
+
+
+def run(label, poll, base, pb, state, viewers, polls, interval):
+    latencies, sizes = [], []
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def producer():
+        # Ajan örnekleri: her `interval` saniyede yeni okuma
+        i = 0
+        while not stop.is_set():
+            state.add_reading({"recorded_at": str(i), "temp_c": 22.0 + i % 3, "co2_ppm": 600})
+            i += 1
+            stop.wait(interval)
+
+    def viewer():
+        session, etags = requests.Session(), {}
+        for _ in range(polls):
+            t0 = time.perf_counter()
+            size = poll(session, base, etags)
+            with lock:
+                latencies.append(time.perf_counter() - t0)
+                sizes.append(size)
+            time.sleep(interval / 2)
+
+    pb.reset_counters()
+    threading.Thread(target=producer, daemon=True).start()
+    threads = [threading.Thread(target=viewer) for _ in range(viewers)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    latencies.sort()
+    print(f"{label:<8} polls={len(latencies):5d}  median {statistics.median(latencies) * 1000:6.1f} ms  "
+          f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:6.1f} ms  {statistics.mean(sizes) / 1024:6.1f} KB/poll  "
+          f"PocketBase requests={pb.requests:5d} ({pb.requests / elapsed:6.1f}/s)")
+
+
+def sse_delay(state, base, samples=50):
+    delays = []
+    with requests.get(base + "/events", stream=True) as r:
+        lines = r.iter_lines(chunk_size=1)  # varsayılan 512 baytlık parça olayları bekletir
+
+        def emit():
+            time.sleep(0.2)
+            for i in range(samples):
+                state.add_reading({"sent_at": time.perf_counter()})
+                time.sleep(0.02)
+
+        threading.Thread(target=emit, daemon=True).start()
+        event = None
+        for line in lines:
+            if line.startswith(b"event: "):
+                event = line[7:]
+            elif line.startswith(b"data: ") and event == b"reading":
+                sent = json.loads(line[6:]).get("sent_at")
+                if sent:
+                    delays.append(time.perf_counter() - sent)
+                    if len(delays) == samples:
+                        break
+    delays.sort()
+    print(f"SSE      {samples} readings pushed, delay median {statistics.median(delays) * 1000:.2f} ms, "
+          f"max {delays[-1] * 1000:.2f} ms")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--viewers", type=int, default=20)
+    ap.add_argument("--polls", type=int, default=50)
+    ap.add_argument("--interval", type=float, default=0.1, help="seconds between samples (viewers poll twice as often)")
+    ap.add_argument("--latency", type=float, default=0.005, help="PocketBase stub latency per request")
+    args = ap.parse_args()
+
+    now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None, minute=0, second=0, microsecond=0)
+    with FakePocketBase(latency=args.latency, require_auth=False) as pb:
+        pb.seed("sensor_readings", make_readings(PLACE, days=1 / 24))  # stub filtreyi kayıt kayıt uygular: küçük tutulur
+        pb.seed("forecasts", make_forecasts(now))
+        client = PBClient(pb.url, token="bench")
+        state = LocalState(loader=lambda: list(client.iter_records("forecasts", f"place_id='{PLACE}'", sort="target_ts")))
+        server = serve(state, 0, "127.0.0.1")
+        local = f"http://127.0.0.1:{server.server_address[1]}"
+        print(f"{args.viewers} viewers, stub latency {args.latency * 1000:g} ms, a new sample every {args.interval:g} s\n")
+        run("direct", direct_poll, pb.url, pb, state, args.viewers, args.polls, args.interval)
+        run("local", local_poll, local, pb, state, args.viewers, args.polls, args.interval)
+        sse_delay(state, local)
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
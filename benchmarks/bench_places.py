@@ -0,0 +1,52 @@
+"""
+All-places forecasting against the PocketBase stub: run_all_places with one
+worker against a process pool, counting requests and reporting the wall
+time per place. The first place has a malformed capacity and must fail
+alone.
+
+    python -m benchmarks.bench_places --places 24 --days 3 --workers 4
+"""
+import argparse
+import tempfile
+import time
+
+from benchmarks.fake_pb import FakePocketBase
+from benchmarks.synth import make_places, make_readings, make_reservation_records
+from forecaster import WeeklyForecaster
+from model_store import ModelStore
+from pb_client import PBClient
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--places", type=int, default=24)
+    ap.add_argument("--days", type=float, default=3)
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    args = ap.parse_args()
+
+    with FakePocketBase() as pb:
+        places = make_places(args.places)
+        for i, place in enumerate(places):
+            pb.seed("sensor_readings", make_readings(place["id"], days=args.days, interval=60, seed=i))
+            pb.seed("reservations", make_reservation_records(place["id"], seed=i))
+        # A malformed place record: that place fails, the rest still publish
+        places[0]["capacity"] = "n/a"
+        pb.seed("places", places)
+
+        for workers in args.workers:
+            with tempfile.TemporaryDirectory() as tmp:
+                f = WeeklyForecaster(PBClient(pb.url))
+                f.cache_dir, f.model_store = tmp, ModelStore(f"{tmp}/models")
+                pb.reset_counters()
+                t0 = time.perf_counter()
+                summaries = f.run_all_places(max_workers=workers)
+                elapsed = time.perf_counter() - t0
+                ok = sum(s["status"] == "ok" for s in summaries)
+                res_queries = sum(n for (method, route), n in pb.by_route.items()
+                                  if route == "/api/collections/reservations/records")
+                print(f"workers={workers:2d}  {elapsed:6.1f} s  {elapsed / len(summaries):5.2f} s/place  "
+                      f"ok={ok}/{len(summaries)}  requests={pb.requests}  reservation queries={res_queries}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Prediction stage benchmark: the old per-hour loop (5 x 168 single-row
+predict calls) against WeeklyForecaster.predict_week.
+
+    python -m benchmarks.bench_predict
+"""
+import datetime
+import random
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+
+from comfort import calc_comfort_score
+from engines import RandomForestEngine
+from forecaster import WeeklyForecaster, HORIZON_HOURS, _fill_rng
+from reservations import ReservationIndex
+
+
+def make_models(n_rows=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    hour = rng.integers(0, 24, n_rows)
+    day = rng.integers(0, 7, n_rows)
+    busy = (hour >= 9) & (hour <= 17) & (day < 5)
+    people = np.where(busy, rng.integers(0, 8, n_rows), 0)
+    df = pd.DataFrame({
+        'hour': hour, 'day_of_week': day, 'person_count': people,
+        'temp_c': 21 + 0.3 * people + rng.normal(0, 0.5, n_rows),
+        'co2_ppm': 420 + 80 * people + rng.normal(0, 30, n_rows),
+        'voc_index': 40 + 10 * people + rng.normal(0, 5, n_rows),
+        'rh_percent': 40 + rng.normal(0, 3, n_rows),
+    })
+    X = df[['hour', 'day_of_week', 'person_count']]
+    X_occ = df[['hour', 'day_of_week']]
+    return {
+        'occ': RandomForestRegressor(n_estimators=50, random_state=42).fit(X_occ, df['person_count']),
+        'temp': RandomForestRegressor(n_estimators=50, random_state=42).fit(X, df['temp_c']),
+        'co2': RandomForestRegressor(n_estimators=50, random_state=42).fit(X, df['co2_ppm']),
+        'voc': RandomForestRegressor(n_estimators=50, random_state=42).fit(X, df['voc_index']),
+        'rh': RandomForestRegressor(n_estimators=50, random_state=42).fit(X, df['rh_percent']),
+    }
+
+
+def make_reservations(start, n=20, seed=1):
+    # Non-overlapping: the old loop picks the first match, the index the largest count
+    rng = random.Random(seed)
+    res_list = []
+    for slot in sorted(rng.sample(range(0, HORIZON_HOURS, 4), n)):
+        s = start + datetime.timedelta(hours=slot)
+        res_list.append({'start': s, 'end': s + datetime.timedelta(hours=rng.randint(1, 3)), 'count': rng.randint(1, 8)})
+    return res_list
+
+
+def legacy_predict(place, models, res_list, start_prediction):
+    """The per-hour loop that predict_week replaced, kept here for comparison."""
+    # Dolgular predict_week ile aynı (place_id, target_ts) tohumlarından çekilir
+    raw_occupancies = []
+    future_times = []
+    for i in range(HORIZON_HOURS):
+        future_time = start_prediction + datetime.timedelta(hours=i)
+        key = future_time.strftime("%Y-%m-%d %H:%M:%SZ")
+        future_times.append(future_time)
+        future_people = 0
+        has_reservation = False
+        for r in res_list:
+            if r['start'] <= future_time < r['end']:
+                future_people = r['count']
+                has_reservation = True
+                break
+        if not has_reservation:
+            occ_input = pd.DataFrame([[future_time.hour, future_time.weekday()]], columns=['hour', 'day_of_week'])
+            future_people = max(0, models['occ'].predict(occ_input)[0])
+            if 8 <= future_time.hour <= 19:
+                if future_people < 0.5:
+                    future_people = _fill_rng(place['id'], key, "occupancy").uniform(0.5, 1.5)
+        raw_occupancies.append(future_people)
+
+    smoothed = pd.Series(raw_occupancies).rolling(window=5, min_periods=1, center=True, win_type='gaussian').mean(std=2).tolist()
+    if any(pd.isna(smoothed)):
+        smoothed = pd.Series(raw_occupancies).rolling(window=5, min_periods=1, center=True).mean().tolist()
+
+    out = []
+    for i in range(HORIZON_HOURS):
+        future_time = future_times[i]
+        smooth_people = smoothed[i]
+        input_row = pd.DataFrame([[future_time.hour, future_time.weekday(), smooth_people]],
+                                 columns=['hour', 'day_of_week', 'person_count'])
+        pred_temp = float(models['temp'].predict(input_row)[0])
+        pred_co2 = float(models['co2'].predict(input_row)[0])
+        pred_voc = float(models['voc'].predict(input_row)[0])
+        pred_rh = float(models['rh'].predict(input_row)[0])
+        final_score = calc_comfort_score(pred_temp, pred_rh, pred_co2, pred_voc)
+        capacity = place.get('capacity', 10)
+        if capacity <= 0: capacity = 10
+        if 8 <= future_time.hour <= 19 and future_time.weekday() < 5:
+            if smooth_people < capacity * 0.15:
+                key = future_time.strftime("%Y-%m-%d %H:%M:%SZ")
+                smooth_people = capacity * _fill_rng(place['id'], key, "people").uniform(0.15, 0.25)
+        out.append({
+            "place_id": place['id'],
+            "target_ts": future_time.strftime("%Y-%m-%d %H:%M:%SZ"),
+            "predicted_occupancy": max(0.0, min(1.0, smooth_people / capacity)),
+            "predicted_comfort_score": final_score
+        })
+    return out
+
+
+def timed(fn, *args, repeat=3):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    models = make_models()
+    place = {'id': 'benchplace0001', 'capacity': 12}
+    start = datetime.datetime(2025, 3, 3, 0, 0)
+    res_list = make_reservations(start)
+
+    legacy_s, legacy_out = timed(legacy_predict, place, models, res_list, start)
+    res_index = ReservationIndex([r['start'] for r in res_list], [r['end'] for r in res_list],
+                                 [r['count'] for r in res_list])
+    engine = RandomForestEngine()
+    engine.models = models
+    batch_s, batch_out = timed(WeeklyForecaster().predict_week, place, engine, res_index, start)
+
+    assert legacy_out == batch_out, "batched forecasts differ from the per-hour loop"
+    print(f"per-hour loop : {legacy_s * 1000:8.1f} ms")
+    print(f"predict_week  : {batch_s * 1000:8.1f} ms")
+    print(f"speedup       : {legacy_s / batch_s:8.1f}x  (outputs identical)")
+
+
+if __name__ == "__main__":
+    main()
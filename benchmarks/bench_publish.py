@@ -0,0 +1,118 @@
+"""
+Forecast publishing against the PocketBase stub: the old one-request-per-record
+path against WeeklyForecaster.publish_forecasts (batch and pool fallback),
+plus a partial-failure run that checks per-record reporting, and an hourly
+refresh (horizon moved by one hour, a few hours re-predicted) published in
+"replace" and "upsert" mode: write operations and the fewest forecasts a
+reader could see mid-publish.
+
+    python -m benchmarks.bench_publish
+"""
+import datetime
+import time
+
+import requests
+
+import forecaster
+from benchmarks.fake_pb import FakePocketBase
+from forecaster import WeeklyForecaster, HORIZON_HOURS
+from pb_client import PBClient
+
+PLACE = "benchplace0001"
+LATENCY = 0.002
+
+
+def make_forecasts(start):
+    return [{
+        "place_id": PLACE,
+        "target_ts": (start + datetime.timedelta(hours=i)).strftime("%Y-%m-%d %H:%M:%SZ"),
+        "predicted_occupancy": 0.3,
+        "predicted_comfort_score": 0.8,
+    } for i in range(HORIZON_HOURS)]
+
+
+def seed_old(pb):
+    pb.seed("forecasts", make_forecasts(datetime.datetime(2025, 1, 1)))
+    pb.reset_counters()
+
+
+def legacy_publish(base_url, forecasts):
+    url = f"{base_url}/api/collections/forecasts/records"
+    items = requests.get(url, params={"filter": f"place_id='{PLACE}'", "perPage": 200}).json()["items"]
+    for item in items:
+        requests.delete(f"{url}/{item['id']}")
+    for payload in forecasts:
+        requests.post(url, json=payload)
+
+
+def make_forecaster(base_url):
+    return WeeklyForecaster(PBClient(base_url, token="bench"))
+
+
+def run(label, batch_enabled, publish, reject=None):
+    forecasts = make_forecasts(datetime.datetime(2025, 3, 3))
+    with FakePocketBase(batch_enabled=batch_enabled, latency=LATENCY) as pb:
+        seed_old(pb)
+        pb.reject = reject
+        t0 = time.perf_counter()
+        failed = publish(pb.url, forecasts)
+        elapsed = time.perf_counter() - t0
+        stored = pb.records("forecasts")
+        print(f"{label:<22} {elapsed * 1000:8.1f} ms  requests={pb.requests:4d}  "
+              f"connections={pb.connections:4d}  stored={len(stored)}")
+        return failed, stored
+
+
+def main():
+    print(f"stub latency {LATENCY * 1000:.0f} ms per request, {HORIZON_HOURS} old + {HORIZON_HOURS} new records\n")
+    run("legacy (1 req/record)", True, legacy_publish)
+    _, stored = run("batch", True, lambda url, fc: make_forecaster(url).publish_forecasts(PLACE, fc))
+    assert len(stored) == HORIZON_HOURS
+    _, stored = run("pool fallback", False, lambda url, fc: make_forecaster(url).publish_forecasts(PLACE, fc))
+    assert len(stored) == HORIZON_HOURS
+
+    bad = {"2025-03-03 05:00:00Z", "2025-03-04 17:00:00Z"}
+
+    def reject(method, collection, body):
+        if method == "POST" and body.get("target_ts") in bad:
+            return "rejected by stub"
+
+    for label, enabled in (("batch, 2 rejected", True), ("pool, 2 rejected", False)):
+        failed, stored = run(label, enabled, lambda url, fc: make_forecaster(url).publish_forecasts(PLACE, fc), reject)
+        assert {res.op.key for res in failed} == bad, failed
+        assert len(stored) == HORIZON_HOURS - len(bad)
+
+    print()
+    for mode in ("replace", "upsert"):
+        refresh(mode)
+
+
+def refresh(mode):
+    old = make_forecasts(datetime.datetime(2025, 3, 3))
+    new = make_forecasts(datetime.datetime(2025, 3, 3, 1))
+    for i in range(0, HORIZON_HOURS, 12):  # her 12 saatten biri gerçekten değişti
+        new[i]["predicted_occupancy"] = 0.6
+    with FakePocketBase(latency=LATENCY) as pb:
+        pb.seed("forecasts", old)
+        pb.reset_counters()
+        ops = {}
+        visible = [HORIZON_HOURS]
+
+        def observe(method, collection, body):
+            ops[method] = ops.get(method, 0) + 1
+            visible.append(len(pb.records("forecasts")))
+
+        pb.reject = observe
+        forecaster.FORECAST_PUBLISH_MODE = mode
+        t0 = time.perf_counter()
+        failed = make_forecaster(pb.url).publish_forecasts(PLACE, new)
+        elapsed = time.perf_counter() - t0
+        stored = pb.records("forecasts")
+        visible.append(len(stored))
+        print(f"refresh, {mode:<14} {elapsed * 1000:8.1f} ms  requests={pb.requests:4d}  "
+              f"writes={sum(ops.values()):4d} {ops}  min visible={min(visible)}")
+        assert not failed and len(stored) == HORIZON_HOURS
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Near-term refresh against a full cycle, on the PocketBase stub: a full
+run_cycle (fetch, fit, predict, publish), the same cycle again with no new
+data (nothing may be rewritten), then an hour in which ventilation
+fails (CO2 +`--co2-jump` ppm) and a meeting is booked for the next hours,
+then run_cycle(refresh=True) with the engine still in memory. Reports time,
+write operations and the forecasts of the next hours before and after.
+
+    python -m benchmarks.bench_refresh --days 7 --co2-jump 400
+"""
+import argparse
+import datetime
+import tempfile
+import time
+
+from benchmarks.fake_pb import FakePocketBase
+from benchmarks.synth import TS_FMT, make_dataset, make_readings
+from config import FORECAST_REFRESH_HOURS
+from forecaster import WeeklyForecaster, _ts_key
+from model_store import ModelStore
+from pb_client import PBClient
+
+
+def snapshot(pb, place_id):
+    return {_ts_key(r['target_ts']): r for r in pb.records("forecasts") if r['place_id'] == place_id}
+
+
+def timed(pb, fn):
+    pb.reset_counters()
+    ops = {}
+
+    def observe(method, collection, body):
+        if collection == "forecasts":
+            ops[method] = ops.get(method, 0) + 1
+
+    pb.reject = observe
+    t0 = time.perf_counter()
+    results = fn()
+    elapsed = time.perf_counter() - t0
+    pb.reject = None
+    return results, elapsed, ops
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--days", type=float, default=7)
+    ap.add_argument("--co2-jump", type=float, default=400)
+    args = ap.parse_args()
+
+    now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None, microsecond=0)
+    dataset = make_dataset(places=1, days=args.days, interval=30, end=now - datetime.timedelta(hours=1))
+    place = dataset["places"][0]
+    with tempfile.TemporaryDirectory() as tmp, FakePocketBase() as pb:
+        for name, records in dataset.items():
+            pb.seed(name, records)
+        f = WeeklyForecaster(PBClient(pb.url))
+        f.cache_dir = tmp
+        f.model_store = ModelStore(tmp + "/models")
+
+        results, elapsed, ops = timed(pb, lambda: f.run_cycle(place["id"]))
+        print(f"full cycle   {elapsed:6.2f} s  forecast writes {ops}  status={results[0]['status']}")
+        before = snapshot(pb, place["id"])
+        # Veri değişmeden ikinci döngü: tahmin aynı kalmalı, upsert hiçbir şey yazmamalı
+        results, elapsed, ops = timed(pb, lambda: f.run_cycle(place["id"]))
+        print(f"unchanged    {elapsed:6.2f} s  forecast writes {ops}  status={results[0]['status']}")
+        assert snapshot(pb, place["id"]) == before
+
+        # Son bir saat: havalandırma arızası; önümüzdeki saatlere sürpriz toplantı
+        last_hour = make_readings(place["id"], days=1 / 24, interval=30, end=now, seed=7)
+        for rec in last_hour:
+            rec["co2_ppm"] += args.co2_jump
+        pb.seed("sensor_readings", last_hour)
+        meeting = now.replace(minute=0, second=0) + datetime.timedelta(hours=2)
+        pb.seed("reservations", [{"place_id": place["id"], "attendee_count": place["capacity"],
+                                  "start_ts": meeting.strftime(TS_FMT) + ".000Z",
+                                  "end_ts": (meeting + datetime.timedelta(hours=2)).strftime(TS_FMT) + ".000Z"}])
+
+        results, elapsed, ops = timed(pb, lambda: f.run_cycle(place["id"], refresh=True))
+        print(f"refresh      {elapsed:6.2f} s  forecast writes {ops}  status={results[0]['status']}  "
+              f"bias@+1h={results[0].get('bias')}")
+        after = snapshot(pb, place["id"])
+        assert len(after) == len(before), (len(before), len(after))
+
+        print(f"\nnext {FORECAST_REFRESH_HOURS} h      occupancy before -> after    comfort before -> after")
+        for key in sorted(after)[:FORECAST_REFRESH_HOURS + 1]:
+            b, a = before.get(key, {}), after[key]
+            print(f"{key}   {b.get('predicted_occupancy', float('nan')):6.2f} -> {a['predicted_occupancy']:5.2f}"
+                  f"          {b.get('predicted_comfort_score', float('nan')):6.2f} -> {a['predicted_comfort_score']:5.2f}")
+
+
+if __name__ == "__main__":
+    main()
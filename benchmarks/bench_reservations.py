@@ -0,0 +1,73 @@
+"""
+Reservation labelling: the old linear scan over res_list against
+ReservationIndex at 500k readings x 2k reservations.
+
+    python -m benchmarks.bench_reservations [--readings 500000] [--reservations 2000]
+"""
+import argparse
+import datetime
+import random
+import time
+
+import numpy as np
+
+from reservations import ReservationIndex
+
+
+def make_reservations(n, start, days, seed=1):
+    rng = random.Random(seed)
+    res_list = []
+    for _ in range(n):
+        s = start + datetime.timedelta(minutes=rng.randrange(0, days * 24 * 60, 15))
+        res_list.append({'start': s, 'end': s + datetime.timedelta(minutes=rng.choice((30, 60, 90, 120))),
+                         'count': rng.randint(1, 12)})
+    return res_list
+
+
+def linear_scan(times, res_list):
+    out = []
+    for t in times:
+        p_count = 0
+        for r in res_list:
+            if r['start'] <= t < r['end']:
+                p_count = r['count']
+                break
+        out.append(p_count)
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--readings", type=int, default=500_000)
+    ap.add_argument("--reservations", type=int, default=2000)
+    ap.add_argument("--scan-sample", type=int, default=2000)
+    args = ap.parse_args()
+
+    days = 30
+    start = datetime.datetime(2025, 3, 1)
+    res_list = make_reservations(args.reservations, start, days)
+    step = days * 86400 / args.readings
+    times = np.datetime64(start, 'ns') + (np.arange(args.readings) * step * 1e9).astype('timedelta64[ns]')
+
+    sample = [start + datetime.timedelta(seconds=i * step) for i in range(args.scan_sample)]
+    t0 = time.perf_counter()
+    linear_scan(sample, res_list)
+    scan_s = (time.perf_counter() - t0) * args.readings / args.scan_sample
+
+    t0 = time.perf_counter()
+    index = ReservationIndex([r['start'] for r in res_list], [r['end'] for r in res_list],
+                             [r['count'] for r in res_list])
+    build_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    counts, covered = index.lookup(times)
+    lookup_s = time.perf_counter() - t0
+
+    print(f"{args.readings} readings x {args.reservations} reservations")
+    print(f"linear scan   : {scan_s:8.2f} s  (extrapolated from {args.scan_sample} readings)")
+    print(f"index build   : {build_s * 1000:8.1f} ms")
+    print(f"index lookup  : {lookup_s * 1000:8.1f} ms  ({covered.mean() * 100:.1f}% of readings reserved)")
+    print(f"speedup       : {scan_s / (build_s + lookup_s):8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
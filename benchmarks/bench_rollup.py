@@ -0,0 +1,56 @@
+"""
+Hourly rollups: per-sample cost of HourlyRollup.add and training input
+size / fit time from raw readings against rollups.
+
+    python -m benchmarks.bench_rollup [--days 30]
+"""
+import argparse
+import datetime
+import time
+
+import pandas as pd
+
+from benchmarks.synth import make_readings
+from forecaster import WeeklyForecaster
+from rollup import HourlyRollup
+
+
+def frame(columns):
+    ts = pd.DatetimeIndex(columns['ts'].astype('datetime64[ns]'))
+    df = pd.DataFrame({'hour': ts.hour, 'day_of_week': ts.dayofweek, 'person_count': 0,
+                       'temp_c': columns['temp_c'], 'co2_ppm': columns['co2_ppm'],
+                       'voc_index': columns['voc_index'], 'rh_percent': columns['rh_percent']})
+    return df.ffill().bfill()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--days", type=float, default=30)
+    args = ap.parse_args()
+
+    readings = make_readings("benchplace0001", days=args.days)
+    rollup = HourlyRollup("benchplace0001")
+    rollups = []
+    t0 = time.perf_counter()
+    for rec in readings:
+        done = rollup.add(datetime.datetime.fromisoformat(rec['recorded_at']), rec)
+        if done:
+            rollups.append(done)
+    add_us = (time.perf_counter() - t0) / len(readings) * 1e6
+    rollups.append(rollup.flush())
+
+    f = WeeklyForecaster()
+    print(f"HourlyRollup.add : {add_us:.1f} us/sample (hour flush included)")
+    results = {}
+    for source, records in (("readings", readings), ("rollups", rollups)):
+        df = frame(f._parse_records(records, source))
+        t0 = time.perf_counter()
+        f.fit_models(df)
+        results[source] = (len(df), time.perf_counter() - t0)
+        print(f"{source:<9}: {len(df):8d} training rows, fit {results[source][1]:7.2f} s")
+    print(f"reduction: {results['readings'][0] / results['rollups'][0]:.0f}x rows, "
+          f"{results['readings'][1] / results['rollups'][1]:.0f}x fit time")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Adaptive sampling over a simulated week (bench_deadband's office: occupancy
+in working hours, PIR pulses while people are in, CO2/VOC following the
+head count): samples per day, I2C bus time and BME680 heater time for the
+fixed SENSOR_INTERVAL_SECONDS loop against AdaptiveSampler, plus the delay
+from a PIR pulse to the first sample that sees it. Last, the hourly
+rollup's pir_fraction from adaptive samples with equal weights against
+weights by the seconds each sample stands for (as the agent passes them).
+
+Bus and heater costs per sample are estimates for 100 kHz I2C: a BME680
+forced-mode read (config writes + 15 data bytes) and the SCD41
+data_ready poll (+ a 9-byte read_measurement every 5 s).
+
+    python -m benchmarks.bench_sampling --days 7
+"""
+import argparse
+import datetime
+
+import numpy as np
+
+from benchmarks.bench_deadband import simulate
+from config import CO2_EMA_ALPHA, GAS_HISTORY_LEN, SENSOR_INTERVAL_SECONDS
+from rollup import HourlyRollup
+from sampling import AdaptiveSampler
+from smoothing import ExponentialMovingAverage, RollingMedian
+
+BME680_BUS_MS = 2.5
+BME680_HEATER_MS = 150.0
+SCD41_POLL_MS = 1.3
+SCD41_READ_MS = 2.0
+
+
+def fixed_schedule(duration):
+    return np.arange(0, duration, SENSOR_INTERVAL_SECONDS)
+
+
+def adaptive_schedule(duration, co2, voc, pir):
+    rising = np.flatnonzero(pir[1:] & ~pir[:-1]) + 1.0  # 1 sn çözünürlükte yükselen kenarlar
+    sampler = AdaptiveSampler(0.0)
+    # Ajandaki gibi örnekleyici filtrelenmiş değerleri görür (VOC sıçramaları medyanda kaybolur)
+    f_co2, f_voc = ExponentialMovingAverage(CO2_EMA_ALPHA), RollingMedian(GAS_HISTORY_LEN)
+    times, modes = [], []
+    t, k = 0.0, 0
+    while t < duration:
+        while k < len(rising) and rising[k] <= t:
+            sampler.motion(rising[k])
+            k += 1
+        i = int(t)
+        sampler.observe(t, f_co2.update(co2[i]), f_voc.update(voc[i]))
+        interval, mode = sampler.interval(t)
+        times.append(t)
+        modes.append(mode)
+        # Aralık içinde bir kenar varsa tur onunla erken başlar
+        nxt = t + interval
+        if k < len(rising) and rising[k] < nxt:
+            nxt = rising[k]
+        t = nxt
+    return np.array(times), np.array(modes)
+
+
+def detection_delay(times, busy):
+    """Mean seconds from each PIR pulse onset to the next sample."""
+    onsets = np.flatnonzero(busy[1:] & ~busy[:-1]) + 1
+    idx = np.searchsorted(times, onsets)
+    idx = idx[idx < len(times)]
+    return float(np.mean(times[idx] - onsets[:len(idx)])) if len(idx) else float("nan")
+
+
+def costs(times):
+    scd_reads = len(np.unique((times // 5).astype(np.int64)))  # SCD41 5 sn'de bir yeni ölçüm
+    bus_s = (len(times) * (BME680_BUS_MS + SCD41_POLL_MS) + scd_reads * SCD41_READ_MS) / 1000
+    heater_s = len(times) * BME680_HEATER_MS / 1000
+    return bus_s, heater_s
+
+
+def rollup_pir_error(times, pir, weighted):
+    """Mean absolute error of hourly pir_fraction against the 1 s PIR signal."""
+    start = datetime.datetime(2026, 1, 5)
+    seconds = np.diff(times, prepend=times[0] - SENSOR_INTERVAL_SECONDS)
+    rollup = HourlyRollup("benchplace0001")
+    fractions = []
+    for t, sec in zip(times, seconds):
+        done = rollup.add(start + datetime.timedelta(seconds=float(t)), {"pir_occupied": bool(pir[int(t)])},
+                          float(sec) if weighted else None)
+        if done:
+            fractions.append(done["pir_fraction"])
+    hours = len(pir) // 3600
+    truth = pir[:hours * 3600].reshape(hours, 3600).mean(axis=1)
+    n = min(len(fractions), hours)
+    return float(np.mean(np.abs(np.array(fractions[:n]) - truth[:n])))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--days", type=float, default=7)
+    args = ap.parse_args()
+
+    busy, temp, rh, co2, voc, pir = simulate(args.days, 1)
+    duration = len(busy)
+    rows = [("fixed", fixed_schedule(duration), None), ("adaptive", *adaptive_schedule(duration, co2, voc, pir))]
+    print(f"{args.days:g} simulated days, fixed interval {SENSOR_INTERVAL_SECONDS} s, "
+          f"adaptive {AdaptiveSampler.INTERVALS}\n")
+    print(f"{'':<9} {'samples/day':>11} {'per h busy':>10} {'per h quiet':>11} {'I2C bus s/day':>14} "
+          f"{'heater s/day':>13} {'motion-to-sample':>17}  modes")
+    base = None
+    for label, times, modes in rows:
+        bus_s, heater_s = costs(times)
+        per_day = len(times) / args.days
+        share = "" if modes is None else "  ".join(
+            f"{m} {np.mean(modes == m):.0%}" for m in ("fast", "normal", "idle"))
+        delay = detection_delay(times, busy & pir)
+        in_busy = busy[times.astype(np.int64)]
+        busy_h, quiet_h = busy.sum() / 3600, (~busy).sum() / 3600
+        print(f"{label:<9} {per_day:11.0f} {in_busy.sum() / busy_h:10.0f} {(~in_busy).sum() / quiet_h:11.0f} "
+              f"{bus_s / args.days:14.1f} {heater_s / args.days:13.0f} {delay:15.2f} s  {share}")
+        if base is None:
+            base = per_day
+        else:
+            print(f"\nadaptive takes {per_day / base:.0%} of the fixed loop's samples")
+            print(f"hourly pir_fraction error: equal weights {rollup_pir_error(times, pir, False):.3f}, "
+                  f"time-weighted {rollup_pir_error(times, pir, True):.3f} (fixed loop "
+                  f"{rollup_pir_error(rows[0][1].astype(float), pir, False):.3f})")
+
+
+if __name__ == "__main__":
+    main()
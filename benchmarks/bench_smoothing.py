@@ -0,0 +1,54 @@
+"""
+Per-update cost of the streaming filters in smoothing.py against the
+obvious recompute-the-window versions (mean / statistics.median over a
+deque), at the agent's window length and a longer one.
+
+    python -m benchmarks.bench_smoothing --updates 100000
+"""
+import argparse
+import statistics
+import time
+from collections import deque
+
+import numpy as np
+
+from smoothing import MovingAverage, RollingMedian
+
+
+def naive(fn, size):
+    window = deque(maxlen=size)
+
+    def update(x):
+        window.append(x)
+        return fn(window)
+    return update
+
+
+def per_update(update, values):
+    t0 = time.perf_counter()
+    for x in values:
+        update(x)
+    return (time.perf_counter() - t0) / len(values)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--updates", type=int, default=100000)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    # VOC indeksi gibi: tamsayı, bol tekrar, arada sıçrama
+    values = np.clip(rng.normal(120, 15, args.updates), 0, 500).round().tolist()
+    for size in (10, 120):
+        rows = [
+            ("moving average", MovingAverage(size).update, naive(lambda w: sum(w) / len(w), size)),
+            ("rolling median", RollingMedian(size).update, naive(statistics.median, size)),
+        ]
+        for label, streaming, recompute in rows:
+            a, b = per_update(streaming, values), per_update(recompute, values)
+            print(f"size={size:<4} {label:<15} streaming {a * 1e6:6.2f} us  recompute {b * 1e6:7.2f} us  "
+                  f"({b / a:4.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
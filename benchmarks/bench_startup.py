@@ -0,0 +1,89 @@
+"""
+Agent start-up time: from process start (before the interpreter is
+launched) to the first sensor sample being logged, running the real
+`python sensor_agent.py` entry point against the PocketBase stub with
+the hardware modules faked.
+
+"previous" reproduces the old start-up path in the same tree: the
+forecaster stack (pandas, scikit-learn) is imported up front and the
+login blocks before the agent is built. `--latency` adds a delay to
+every stub response to model a slow link to the server.
+
+    python -m benchmarks.bench_startup --runs 5 --latency 0.5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.fake_pb import FakePocketBase
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, runpy, sys
+overrides, previous = json.loads(sys.argv[1]), sys.argv[2] == "1"
+import config
+for k, v in overrides.items():
+    setattr(config, k, v)
+from benchmarks import fakehw
+fakehw.install()
+if previous:
+    import forecaster
+    from pb_client import PBClient
+    PBClient(config.PB_BASE_URL).login(config.PB_ADMIN_EMAIL, config.PB_ADMIN_PASSWORD)
+runpy.run_path("sensor_agent.py", run_name="__main__")
+"""
+
+HEAVY = ("pandas", "sklearn")
+
+
+def time_to_first_sample(overrides, previous, timeout=120):
+    t0 = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-c", CHILD, json.dumps(overrides), "1" if previous else "0"],
+                            cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    try:
+        deadline = time.monotonic() + timeout
+        for line in proc.stdout:
+            if "msg=okuma" in line:
+                return time.perf_counter() - t0
+            if time.monotonic() > deadline:
+                break
+        raise RuntimeError("agent exited or timed out before the first sample")
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+def heavy_modules_after_import():
+    code = f"import sys, json; from benchmarks import fakehw; fakehw.install(); import sensor_agent; " \
+           f"print(json.dumps([m for m in {HEAVY!r} if m in sys.modules]))"
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=3)
+    ap.add_argument("--latency", type=float, default=0.0, help="seconds added to every stub response")
+    args = ap.parse_args()
+
+    print(f"heavy modules loaded by 'import sensor_agent': {heavy_modules_after_import() or 'none'}")
+    with FakePocketBase(latency=args.latency) as pb, tempfile.TemporaryDirectory() as tmp:
+        overrides = {
+            "PB_BASE_URL": pb.url, "METRICS_PORT": 0,
+            "QUEUE_DB_PATH": os.path.join(tmp, "outbox.db"),
+            "AGENT_STATE_PATH": os.path.join(tmp, "agent_state.json"),
+        }
+        for label, previous in (("previous", True), ("current", False)):
+            runs = [time_to_first_sample(overrides, previous) for _ in range(args.runs)]
+            print(f"{label:<9} first sample after {statistics.median(runs) * 1000:8.1f} ms "
+                  f"(median of {args.runs}, min {min(runs) * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+"""
+In-process PocketBase stub for benchmarks.
+
+Serves the subset of the REST API that pb_client.py, forecaster.py and
+sensor_agent.py use, and counts requests and TCP connections so
+round-trips can be compared.
+
+    with FakePocketBase() as pb:
+        pb.seed("sensor_readings", records)
+        ... point PB_BASE_URL at pb.url ...
+"""
+import base64
+import copy
+import json
+import random
+import re
+import socket
+import string
+import sys
+import threading
+import time
+import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+_DT_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})[ T](\d{2}:\d{2}:\d{2})(\.\d+)?Z?$")
+_CLAUSE_RE = re.compile(r"^\s*([\w.]+)\s*(>=|<=|!=|=|>|<|~)\s*(.+?)\s*$")
+
+
+def _norm(value):
+    """Makes datetime strings comparable regardless of fraction/Z suffix."""
+    if isinstance(value, str):
+        m = _DT_RE.match(value)
+        if m:
+            frac = (m.group(3) or ".000")[1:4].ljust(3, "0")
+            return f"{m.group(1)} {m.group(2)}.{frac}"
+    return value
+
+
+def _literal(text):
+    if len(text) >= 2 and text[0] in "'\"" and text[-1] == text[0]:
+        return text[1:-1]
+    if text in ("true", "false"):
+        return text == "true"
+    if text == "null":
+        return None
+    try:
+        return float(text) if "." in text else int(text)
+    except ValueError:
+        return text
+
+
+def _project(record, fields):
+    """PocketBase `fields=`: top-level keys only (no expand/modifiers)."""
+    if not fields or fields == "*":
+        return record
+    return {k: record[k] for k in fields.split(",") if k in record}
+
+
+def _matches(record, filter_str):
+    if not filter_str:
+        return True
+    for clause in filter_str.split("&&"):
+        m = _CLAUSE_RE.match(clause.strip().strip("()"))
+        if not m:
+            raise ValueError(f"unsupported filter clause: {clause!r}")
+        field, op, raw = m.groups()
+        left, right = _norm(record.get(field)), _norm(_literal(raw))
+        if op == "=":
+            ok = left == right
+        elif op == "!=":
+            ok = left != right
+        elif op == "~":
+            ok = str(right) in str(left or "")
+        elif left is None or right is None:
+            ok = False
+        else:
+            try:
+                ok = {">": left > right, ">=": left >= right,
+                      "<": left < right, "<=": left <= right}[op]
+            except TypeError:
+                ok = False
+        if not ok:
+            return False
+    return True
+
+
+def _sort(items, sort):
+    for key in reversed([s.strip() for s in (sort or "").split(",") if s.strip()]):
+        desc = key.startswith("-")
+        field = key.lstrip("+-")
+        items.sort(key=lambda r: (r.get(field) is None, _norm(r.get(field))), reverse=desc)
+    return items
+
+
+def _now_str():
+    return datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3] + "Z"
+
+
+def new_id():
+    return "".join(random.choices(string.ascii_lowercase + string.digits, k=15))
+
+
+def make_token(ttl_seconds=3600, subject="benchuser000001"):
+    def b64(obj):
+        return base64.urlsafe_b64encode(json.dumps(obj).encode()).rstrip(b"=").decode()
+    payload = {"id": subject, "type": "auth", "exp": int(time.time() + ttl_seconds)}
+    return f"{b64({'alg': 'HS256', 'typ': 'JWT'})}.{b64(payload)}.fakesig"
+
+
+class _ApiError(Exception):
+    def __init__(self, status, message, data=None):
+        super().__init__(message)
+        self.status = status
+        self.payload = {"status": status, "message": message, "data": data or {}}
+
+
+class FakePocketBase:
+    def __init__(self, batch_enabled=True, max_batch=50, latency=0.0,
+                 token_ttl=3600, require_auth=False):
+        self.collections = {}
+        self.batch_enabled = batch_enabled
+        self.max_batch = max_batch
+        self.latency = latency
+        self.token_ttl = token_ttl
+        self.require_auth = require_auth
+        self.reject = None  # callable(method, collection, body) -> error message, (status, message) or None
+        self.lock = threading.RLock()
+        self.requests = 0
+        self.connections = 0
+        self.bytes_sent = 0
+        self.by_route = {}
+        self._list_cache = {}
+        self.indexes = {}  # collection -> CREATE INDEX statements
+        self._server = None
+        self._thread = None
+
+    # --- Yönetim ---
+
+    def seed(self, collection, records):
+        with self.lock:
+            col = self.collections.setdefault(collection, {})
+            for rec in records:
+                rec = dict(rec)
+                rec.setdefault("id", new_id())
+                rec.setdefault("created", _now_str())
+                rec.setdefault("updated", rec["created"])
+                rec.setdefault("collectionName", collection)
+                rec.setdefault("collectionId", "pbc_" + collection[:10])
+                col[rec["id"]] = rec
+            self._list_cache.clear()
+
+    def records(self, collection):
+        with self.lock:
+            return list(self.collections.get(collection, {}).values())
+
+    def reset_counters(self):
+        with self.lock:
+            self.requests = 0
+            self.connections = 0
+            self.bytes_sent = 0
+            self.by_route = {}
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        stub = self
+
+        class Handler(_Handler):
+            pb = stub
+
+        class Server(ThreadingHTTPServer):
+            daemon_threads = True
+
+            def process_request(self, request, client_address):
+                with stub.lock:
+                    stub.connections += 1
+                super().process_request(request, client_address)
+
+            def handle_error(self, request, client_address):
+                # Clients killed mid-request (start-up / crash benchmarks) are expected
+                if not isinstance(sys.exc_info()[1], ConnectionError):
+                    super().handle_error(request, client_address)
+
+        self._server = Server(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # --- API ---
+
+    def _check_auth(self, headers):
+        if not self.require_auth:
+            return
+        auth = headers.get("Authorization", "")
+        token = auth[7:] if auth.startswith("Bearer ") else ""
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.split(".")[1] + "=="))
+        except Exception:
+            raise _ApiError(401, "The request requires valid record authorization token.")
+        if payload.get("exp", 0) < time.time():
+            raise _ApiError(401, "The request requires valid record authorization token.")
+
+    def dispatch(self, method, path, query, body, headers):
+        parts = [p for p in path.split("/") if p]
+        if method == "POST" and parts[-1:] == ["auth-with-password"]:
+            return 200, {"token": make_token(self.token_ttl), "record": {"id": "benchuser000001"}}
+        if method == "POST" and parts == ["api", "batch"]:
+            self._check_auth(headers)
+            return self._batch(body or {}, headers)
+        if len(parts) == 3 and parts[:2] == ["api", "collections"]:
+            # Şema uç noktasından yalnızca 'indexes' (pb_queries --apply)
+            self._check_auth(headers)
+            with self.lock:
+                if method == "PATCH":
+                    self.indexes[parts[2]] = list((body or {}).get("indexes", []))
+                return 200, {"name": parts[2], "indexes": self.indexes.get(parts[2], [])}
+        if len(parts) >= 4 and parts[:2] == ["api", "collections"] and parts[3] == "records":
+            self._check_auth(headers)
+            collection = parts[2]
+            record_id = parts[4] if len(parts) > 4 else None
+            with self.lock:
+                return self._records(method, collection, record_id, query, body, self.collections)
+        raise _ApiError(404, "The requested resource wasn't found.")
+
+    def _records(self, method, collection, record_id, query, body, store):
+        col = store.setdefault(collection, {})
+        if self.reject and method in ("POST", "PATCH", "DELETE"):
+            reason = self.reject(method, collection, body if method != "DELETE" else {"id": record_id})
+            if isinstance(reason, tuple):
+                raise _ApiError(*reason)
+            if reason:
+                raise _ApiError(400, "Failed to save record.", {"reason": {"code": "rejected", "message": reason}})
+        if method == "GET" and record_id is None:
+            return 200, self._list(collection, col, query)
+        if method != "GET":
+            self._list_cache.clear()
+        if method == "GET":
+            if record_id not in col:
+                raise _ApiError(404, "The requested resource wasn't found.")
+            return 200, _project(col[record_id], query.get("fields"))
+        if method == "POST":
+            rec = dict(body or {})
+            rec_id = rec.get("id") or new_id()
+            if rec_id in col:
+                # PocketBase (<= 0.22) bu yanıtı verir; validation_not_unique benzersiz indeks hatasıdır
+                raise _ApiError(400, "Failed to create record.",
+                                {"id": {"code": "validation_invalid_id",
+                                        "message": "The model id is invalid or already exists."}})
+            now = _now_str()
+            rec.update({"id": rec_id, "created": now, "updated": now,
+                        "collectionName": collection, "collectionId": "pbc_" + collection[:10]})
+            col[rec_id] = rec
+            return 200, rec
+        if method == "PATCH":
+            if record_id not in col:
+                raise _ApiError(404, "The requested resource wasn't found.")
+            col[record_id].update(body or {})
+            col[record_id]["updated"] = _now_str()
+            return 200, col[record_id]
+        if method == "DELETE":
+            if record_id not in col:
+                raise _ApiError(404, "The requested resource wasn't found.")
+            del col[record_id]
+            return 204, None
+        raise _ApiError(405, "Method not allowed.")
+
+    def _list(self, collection, col, query):
+        page = max(1, int(query.get("page", 1)))
+        per_page = min(1000, max(1, int(query.get("perPage", 30))))
+        key = (collection, query.get("filter", ""), query.get("sort", ""))
+        items = self._list_cache.get(key)
+        if items is None:
+            items = [r for r in col.values() if _matches(r, key[1])]
+            _sort(items, key[2])
+            self._list_cache[key] = items
+        total = len(items)
+        chunk = items[(page - 1) * per_page: page * per_page]
+        if query.get("fields"):
+            chunk = [_project(r, query["fields"]) for r in chunk]
+        if query.get("skipTotal") in ("1", "true"):
+            return {"page": page, "perPage": per_page, "totalItems": -1, "totalPages": -1, "items": chunk}
+        return {"page": page, "perPage": per_page, "totalItems": total,
+                "totalPages": (total + per_page - 1) // per_page, "items": chunk}
+
+    def _batch(self, body, headers):
+        if not self.batch_enabled:
+            raise _ApiError(403, "Batch requests are not allowed.")
+        reqs = body.get("requests", [])
+        if len(reqs) > self.max_batch:
+            raise _ApiError(400, f"The allowed max number of batch requests is {self.max_batch}.")
+        with self.lock:
+            # Copy only the collections this batch touches; the rest are shared
+            touched = {p[2] for p in ([x for x in urlsplit(r.get("url", "")).path.split("/") if x] for r in reqs)
+                       if len(p) > 2}
+            scratch = dict(self.collections)
+            for name in touched & scratch.keys():
+                scratch[name] = copy.deepcopy(scratch[name])
+            results = []
+            for i, req in enumerate(reqs):
+                url = urlsplit(req.get("url", ""))
+                parts = [p for p in url.path.split("/") if p]
+                try:
+                    if len(parts) < 4 or parts[:2] != ["api", "collections"]:
+                        raise _ApiError(404, "The requested resource wasn't found.")
+                    status, payload = self._records(req.get("method", "GET").upper(), parts[2],
+                                                    parts[4] if len(parts) > 4 else None,
+                                                    {}, req.get("body"), scratch)
+                except _ApiError as e:
+                    raise _ApiError(400, "Batch transaction failed.", {"requests": {str(i): {
+                        "code": "batch_request_failed", "message": "Batch request failed.",
+                        "response": e.payload}}})
+                results.append({"status": status, "body": payload})
+            self.collections = scratch
+            self._list_cache.clear()
+        return 200, results
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    pb = None
+
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, *args):
+        pass
+
+    def _handle(self, method):
+        pb = self.pb
+        split = urlsplit(self.path)
+        query = {k: v[-1] for k, v in parse_qs(split.query).items()}
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        route = re.sub(r"/records/[^/]+$", "/records/:id", split.path)
+        with pb.lock:
+            pb.requests += 1
+            pb.by_route[(method, route)] = pb.by_route.get((method, route), 0) + 1
+        if pb.latency:
+            time.sleep(pb.latency)
+        try:
+            body = json.loads(raw) if raw else None
+            status, payload = pb.dispatch(method, split.path, query, body, self.headers)
+        except _ApiError as e:
+            status, payload = e.status, e.payload
+        except ValueError as e:
+            status, payload = 400, {"status": 400, "message": str(e), "data": {}}
+        data = b"" if payload is None else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+        with pb.lock:
+            pb.bytes_sent += len(data)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PATCH(self):
+        self._handle("PATCH")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
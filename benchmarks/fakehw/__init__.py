@@ -0,0 +1,29 @@
+"""
+Stand-ins for the Raspberry Pi hardware libraries (board, gpiozero,
+adafruit_bme680, adafruit_scd4x) so sensor_agent.py imports and runs off
+the device.
+
+    from benchmarks import fakehw
+    fakehw.install()          # before importing sensor_agent
+    fakehw.BME680_GAS_DELAY = 0.2
+
+Readings are drawn from a seeded RNG; the delays model the BME680 gas
+heater and I2C transfers.
+"""
+import os
+import sys
+
+BME680_GAS_DELAY = 0.0
+SCD4X_READ_DELAY = 0.0
+PIR_ACTIVE_PROBABILITY = 0.3
+
+
+def install():
+    """Puts the fake modules first on sys.path, shadowing any real ones."""
+    path = os.path.dirname(os.path.abspath(__file__))
+    if path not in sys.path:
+        sys.path.insert(0, path)
+    for name in ("board", "gpiozero", "adafruit_bme680", "adafruit_scd4x"):
+        module = sys.modules.get(name)
+        if module is not None and not getattr(module, "FAKE", False):
+            del sys.modules[name]
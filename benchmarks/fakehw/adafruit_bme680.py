@@ -0,0 +1,31 @@
+"""Fake `adafruit_bme680`; reading `gas` sleeps for fakehw.BME680_GAS_DELAY."""
+import random
+import time
+
+FAKE = True
+
+
+class Adafruit_BME680_I2C:
+    def __init__(self, i2c, address=0x77, refresh_rate=10):
+        self.address = address
+        self.sea_level_pressure = 1013.25
+        self._rng = random.Random(address)
+
+    @property
+    def temperature(self):
+        return 23.0 + self._rng.gauss(0, 0.3)
+
+    @property
+    def relative_humidity(self):
+        return 45.0 + self._rng.gauss(0, 1.5)
+
+    @property
+    def pressure(self):
+        return self.sea_level_pressure + self._rng.gauss(0, 0.5)
+
+    @property
+    def gas(self):
+        from benchmarks import fakehw
+        if fakehw.BME680_GAS_DELAY:
+            time.sleep(fakehw.BME680_GAS_DELAY)
+        return 20000.0 * (1 + self._rng.gauss(0, 0.1))
@@ -0,0 +1,36 @@
+"""Fake `adafruit_scd4x`; `data_ready` sleeps for fakehw.SCD4X_READ_DELAY."""
+import random
+import time
+
+FAKE = True
+
+
+class SCD4X:
+    def __init__(self, i2c, address=0x62):
+        self._rng = random.Random(address)
+        self._running = False
+
+    def start_periodic_measurement(self):
+        self._running = True
+
+    def stop_periodic_measurement(self):
+        self._running = False
+
+    @property
+    def data_ready(self):
+        from benchmarks import fakehw
+        if fakehw.SCD4X_READ_DELAY:
+            time.sleep(fakehw.SCD4X_READ_DELAY)
+        return self._running
+
+    @property
+    def CO2(self):
+        return int(650 + self._rng.gauss(0, 40))
+
+    @property
+    def temperature(self):
+        return 23.5 + self._rng.gauss(0, 0.3)
+
+    @property
+    def relative_humidity(self):
+        return 44.0 + self._rng.gauss(0, 1.5)
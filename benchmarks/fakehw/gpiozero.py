@@ -0,0 +1,29 @@
+"""
+Fake `gpiozero` with a MotionSensor that is active at a fixed probability.
+trigger() sets the state and fires when_motion / when_no_motion like an edge.
+"""
+import random
+
+FAKE = True
+_rng = random.Random(0)
+
+
+class MotionSensor:
+    def __init__(self, pin):
+        self.pin = pin
+        self.when_motion = None
+        self.when_no_motion = None
+        self._forced = None
+
+    @property
+    def is_active(self):
+        from benchmarks import fakehw
+        if self._forced is not None:
+            return self._forced
+        return _rng.random() < fakehw.PIR_ACTIVE_PROBABILITY
+
+    def trigger(self, active=True):
+        self._forced = active
+        callback = self.when_motion if active else self.when_no_motion
+        if callback:
+            callback()
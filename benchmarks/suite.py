@@ -0,0 +1,189 @@
+"""
+Benchmark suite. Times each stage of WeeklyForecaster.run_cycle against
+the PocketBase stub on synthetic data, plus the scalar comfort functions
+and SensorAgent.ohm_to_voc_index (hardware modules faked), and compares
+the medians with a stored baseline.
+
+The scalar calls take well under a microsecond, where the machine's own
+speed drifts by more than the tolerance between runs. They are timed in
+short chunks interleaved with a fixed reference function and reported as
+the median cost in reference calls ("ref"), which cancels the drift.
+
+    python -m benchmarks.suite                    # compare with benchmarks/baseline.json
+    python -m benchmarks.suite --save-baseline    # record a new baseline
+    python -m benchmarks.suite --places 10 --days 30 --interval 60
+
+Exits with status 1 when a metric is slower than the baseline by more than
+--tolerance; a stage is never flagged for less than SLACK_SECONDS, as its
+timings are rounded to 1 ms. Baselines are only comparable on the same machine and scale.
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks import fakehw
+from benchmarks.fake_pb import FakePocketBase
+from benchmarks.synth import make_dataset, seed_stub
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+SLACK_SECONDS = 0.005
+SCALAR_CHUNK = 1000  # referansla dönüşümlü ölçülen çağrı grubu
+
+
+def bench_cycle(dataset, repeat):
+    """Median seconds per place for each run_cycle stage, cold cache and model store."""
+    from forecaster import WeeklyForecaster, STAGES
+    from model_store import ModelStore
+    from pb_client import PBClient
+
+    samples = {stage: [] for stage in STAGES + ("total",)}
+    with FakePocketBase() as pb:
+        seed_stub(pb, dataset)
+        for _ in range(repeat):
+            with tempfile.TemporaryDirectory() as tmp:
+                f = WeeklyForecaster(PBClient(pb.url))
+                f.cache_dir, f.model_store = tmp, ModelStore(os.path.join(tmp, "models"))
+                for place in dataset["places"]:
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        summary, = f.run_cycle(place["id"])
+                    for stage in STAGES:
+                        samples[stage].append(summary["timings"][stage])
+                    samples["total"].append(sum(summary["timings"].values()))
+    return {f"cycle.{stage}": statistics.median(v) for stage, v in samples.items()}
+
+
+def _reference(x, *rest):
+    y = x * 0.5 + 1.0
+    return y if y > 0 else -y
+
+
+def _chunk_seconds(fn, chunk):
+    t0 = time.perf_counter()
+    for args in chunk:
+        fn(*args)
+    return time.perf_counter() - t0
+
+
+def _per_call(fn, args_list, repeat):
+    # Her grup hemen ardından referansla ölçülür: makine hızındaki kayma orana girmez
+    ratios = []
+    for _ in range(repeat):
+        for i in range(0, len(args_list), SCALAR_CHUNK):
+            chunk = args_list[i:i + SCALAR_CHUNK]
+            ratios.append(_chunk_seconds(fn, chunk) / _chunk_seconds(_reference, chunk))
+    return statistics.median(ratios)
+
+
+def bench_scalars(n, repeat, seed=0):
+    """Median cost per call, in _reference calls, of the per-sample functions on the agent's hot path."""
+    from comfort import calculate_thermal_score, calculate_iaq_score, calc_comfort_score
+    fakehw.install()
+    from sensor_agent import SensorAgent
+
+    rng = np.random.default_rng(seed)
+    temp = rng.uniform(15, 32, n).tolist()
+    rh = rng.uniform(15, 80, n).tolist()
+    co2 = rng.uniform(380, 2500, n).tolist()
+    voc = rng.uniform(0, 500, n).tolist()
+    ohms = rng.uniform(2000, 80000, n).tolist()
+    agent = SensorAgent.__new__(SensorAgent)  # hardware and network stay untouched
+    return {
+        "comfort.calculate_thermal_score": _per_call(calculate_thermal_score, list(zip(temp, rh)), repeat),
+        "comfort.calculate_iaq_score": _per_call(calculate_iaq_score, list(zip(co2, voc)), repeat),
+        "comfort.calc_comfort_score": _per_call(calc_comfort_score, list(zip(temp, rh, co2, voc)), repeat),
+        "agent.ohm_to_voc_index": _per_call(agent.ohm_to_voc_index, [(x,) for x in ohms], repeat),
+    }
+
+
+def _fmt(seconds, name="cycle."):
+    if not name.startswith("cycle."):
+        return f"{seconds:7.2f} ref"
+    if seconds >= 1:
+        return f"{seconds:8.3f} s "
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:8.3f} ms"
+    return f"{seconds * 1e6:8.3f} us"
+
+
+def _fixed_end():
+    # Readings must end "now" for the training window, but aligned to the hour
+    # so repeated runs see the same hour-of-day / weekday mix
+    now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    return now.replace(minute=0, second=0, microsecond=0)
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    print(f"{'metric':<36} {'current':>11} {'baseline':>11} {'ratio':>7}")
+    for name, value in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<36} {_fmt(value, name)} {'-':>11}")
+            continue
+        ratio = value / base if base else float("inf")
+        flag = ""
+        if ratio > 1 + tolerance and (not name.startswith("cycle.") or value - base > SLACK_SECONDS):
+            flag = "  SLOWER"
+            regressions.append(name)
+        elif ratio < 1 - tolerance:
+            flag = "  faster"
+        print(f"{name:<36} {_fmt(value, name)} {_fmt(base, name)} {ratio:6.2f}x{flag}")
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--places", type=int, default=1)
+    ap.add_argument("--days", type=float, default=7)
+    ap.add_argument("--interval", type=int, default=5, help="seconds between synthetic readings")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--calls", type=int, default=20000, help="inputs per scalar benchmark")
+    ap.add_argument("--baseline", default=BASELINE_PATH)
+    ap.add_argument("--save-baseline", action="store_true")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown ratio before failing")
+    args = ap.parse_args()
+
+    params = {"places": args.places, "days": args.days, "interval": args.interval}
+    dataset = make_dataset(places=args.places, days=args.days, interval=args.interval,
+                           end=_fixed_end(), seed=0)
+    print(f"dataset: {len(dataset['places'])} places, {len(dataset['sensor_readings'])} readings, "
+          f"{len(dataset['reservations'])} reservations; repeat={args.repeat}\n")
+
+    results = bench_cycle(dataset, args.repeat)
+    results.update(bench_scalars(args.calls, args.repeat))
+
+    meta = {"params": params, "python": platform.python_version(), "machine": platform.machine(),
+            "cpus": os.cpu_count(), "recorded": time.strftime("%Y-%m-%d %H:%M:%S")}
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=1, sort_keys=True)
+        compare(results, {}, args.tolerance)
+        print(f"\nbaseline written to {args.baseline}")
+        return
+
+    try:
+        with open(args.baseline) as f:
+            stored = json.load(f)
+    except OSError:
+        compare(results, {}, args.tolerance)
+        print(f"\nno baseline at {args.baseline}; run with --save-baseline")
+        return
+    if stored["meta"]["params"] != params:
+        print(f"warning: baseline was recorded at {stored['meta']['params']}, not {params}\n")
+    regressions = compare(results, stored["results"], args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} metric(s) slower than baseline by more than {args.tolerance:.0%}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
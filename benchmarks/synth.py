@@ -0,0 +1,100 @@
+"""
+Synthetic office data for benchmarks.
+"""
+import datetime
+
+import numpy as np
+
+TS_FMT = "%Y-%m-%d %H:%M:%S"
+
+
+def _busy(hours, days):
+    return (hours >= 9) & (hours <= 17) & (days < 5)
+
+
+def make_readings(place_id, days=7, interval=5, end=None, seed=0):
+    """One record per `interval` seconds, shaped like SensorAgent payloads."""
+    rng = np.random.default_rng(seed)
+    end = end or datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None, microsecond=0)
+    n = int(days * 86400 // interval)
+    start = end - datetime.timedelta(seconds=n * interval)
+    offsets = np.arange(n) * interval
+    stamps = np.datetime64(start, "s") + offsets.astype("timedelta64[s]")
+    hours = ((stamps - stamps.astype("datetime64[D]")).astype("timedelta64[h]").astype(int))
+    days_ = ((stamps.astype("datetime64[D]").astype(int) + 3) % 7)
+    occupied = _busy(hours, days_) & (rng.random(n) < 0.7)
+    people = np.where(occupied, rng.integers(1, 8, n), 0)
+    temp = 21.0 + 0.3 * people + rng.normal(0, 0.4, n)
+    co2 = 420 + 90 * people + rng.normal(0, 25, n)
+    voc = 40 + 12 * people + rng.normal(0, 5, n)
+    rh = 42 + rng.normal(0, 3, n)
+    records = []
+    for i in range(n):
+        ts = str(stamps[i]).replace("T", " ")
+        records.append({
+            "place_id": place_id,
+            "recorded_at": ts,
+            "created": ts + ".000Z",
+            "temp_c": round(float(temp[i]), 2),
+            "rh_percent": round(float(rh[i]), 2),
+            "voc_index": int(voc[i]),
+            "co2_ppm": int(co2[i]),
+            "pir_occupied": bool(occupied[i]),
+            "comfort_score": 0.8,
+        })
+    return records
+
+
+def make_places(n, seed=0):
+    """`n` place records with 15-character PocketBase ids."""
+    rng = np.random.default_rng(seed)
+    return [{"id": f"benchplace{i:05d}", "name": f"Bench Room {i}", "capacity": int(rng.integers(4, 30))}
+            for i in range(n)]
+
+
+def make_reservation_records(place_id, days_back=30, days_ahead=7, per_day=3, end=None, seed=0):
+    """Working-hour reservations from `days_back` days ago to `days_ahead` days ahead."""
+    rng = np.random.default_rng(seed)
+    now = end or datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None, microsecond=0)
+    day0 = now.replace(hour=0, minute=0, second=0) - datetime.timedelta(days=days_back)
+    records = []
+    for d in range(days_back + days_ahead):
+        day = day0 + datetime.timedelta(days=d)
+        if day.weekday() >= 5:
+            continue
+        for _ in range(per_day):
+            start = day + datetime.timedelta(hours=int(rng.integers(9, 17)), minutes=int(rng.choice([0, 30])))
+            end_ts = start + datetime.timedelta(minutes=int(rng.choice([30, 60, 90])))
+            stamp = min(start, now).strftime(TS_FMT) + ".000Z"
+            records.append({
+                "place_id": place_id,
+                "start_ts": start.strftime(TS_FMT) + ".000Z",
+                "end_ts": end_ts.strftime(TS_FMT) + ".000Z",
+                "attendee_count": int(rng.integers(1, 12)),
+                "created": stamp,
+                "updated": stamp,
+            })
+    return records
+
+
+def make_dataset(places=1, days=7, interval=5, reservations_per_day=3, end=None, seed=0):
+    """
+    Records for every collection the forecaster reads, keyed by collection:
+    `places` rooms, each with `days` of readings at `interval` seconds and
+    reservations over the same window plus a week ahead. Use a larger
+    interval for month-scale or many-place runs (30 days x 100 places at
+    60 s is 4.3M readings).
+    """
+    end = end or datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None, microsecond=0)
+    rooms = make_places(places, seed=seed)
+    readings, reservations = [], []
+    for i, room in enumerate(rooms):
+        readings.extend(make_readings(room["id"], days=days, interval=interval, end=end, seed=seed + i))
+        reservations.extend(make_reservation_records(room["id"], days_back=int(days) + 1, per_day=reservations_per_day,
+                                                     end=end, seed=seed + i))
+    return {"places": rooms, "sensor_readings": readings, "reservations": reservations}
+
+
+def seed_stub(pb, dataset):
+    for collection, records in dataset.items():
+        pb.seed(collection, records)
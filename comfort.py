@@ -1,4 +1,6 @@
 #comfort.py
+import numpy as np
+
 def calculate_thermal_score(temp_c: float, rh: float) -> float:
     """
     ASHRAE Standard 55 (Ofis/Sedanter Çalışma) Bazlı Puanlama.
@@ -84,4 +86,70 @@ def calc_comfort_score(temp_c, rh, co2, voc_index) -> float:
     if voc_index is not None and voc_index > 250:
         base_score = min(base_score, 0.40)
 
-    return round(max(0.0, min(1.0, base_score)), 2)
\ No newline at end of file
+    return round(max(0.0, min(1.0, base_score)), 2)
+
+
+# --- Dizi (Vektörel) Sürümler ---
+# Skaler fonksiyonlarla aynı parçalı tanım ve veto kuralları; bütün bir sütunu
+# tek seferde puanlar. None / NaN değerler skaler sürümdeki None gibi davranır.
+
+def _as_array(values) -> np.ndarray:
+    return np.asarray(values, dtype=float)
+
+def _round2(x: np.ndarray) -> np.ndarray:
+    """Python round(x, 2) ile birebir aynı sonuç."""
+    out = np.round(x, 2)
+    # np.round yarım değerlerin çok yakınında Python'dan farklı yuvarlayabilir;
+    # bu nadir elemanlar skaler round ile düzeltilir.
+    scaled = x * 100
+    near_half = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if near_half.any():
+        out[near_half] = [round(v, 2) for v in x[near_half].tolist()]
+    return out
+
+def calculate_thermal_score_array(temp_c, rh) -> np.ndarray:
+    t, h = np.broadcast_arrays(_as_array(temp_c), _as_array(rh))
+    t_score = np.select(
+        [(t >= 21.0) & (t <= 24.0),
+         (t >= 20.0) & (t < 21.0),
+         (t > 24.0) & (t <= 26.0),
+         (t < 18.0) | (t > 30.0),
+         t < 20.0],
+        [1.0,
+         0.8 + ((t - 20.0) * 0.2),
+         1.0 - ((t - 24.0) * 0.15),
+         0.0,
+         0.5 + ((t - 18.0) * 0.15)],
+        default=0.7 - ((t - 26.0) * 0.175))
+
+    rh_penalty = np.where(h < 30, (30 - h) * 0.005, np.where(h > 60, (h - 60) * 0.01, 0.0))
+
+    score = np.maximum(0.0, t_score - rh_penalty)
+    return np.where(np.isnan(t) | np.isnan(h), 0.0, score)
+
+def calculate_iaq_score_array(co2, voc_index) -> np.ndarray:
+    c, v = np.broadcast_arrays(_as_array(co2), _as_array(voc_index))
+    co2_score = np.select(
+        [np.isnan(c), c <= 800, c <= 1000, c <= 1500],
+        [0.0, 1.0, 1.0 - ((c - 800) * 0.001), 0.80 - ((c - 1000) * 0.0006)],
+        default=np.maximum(0.0, 0.50 - ((c - 1500) * 0.0005)))
+    voc_score = np.select(
+        [np.isnan(v), v <= 50, v <= 100, v <= 200],
+        [0.5, 1.0, 1.0 - ((v - 50) * 0.004), 0.8 - ((v - 100) * 0.004)],
+        default=np.maximum(0.0, 0.4 - ((v - 200) * 0.002)))
+    return (0.75 * co2_score) + (0.25 * voc_score)
+
+def calc_comfort_score_array(temp_c, rh, co2, voc_index) -> np.ndarray:
+    """
+    calc_comfort_score'un dizi sürümü: NumPy dizisi, liste ya da pandas
+    Series alır, her satır için skaler fonksiyonla aynı puanı döndürür.
+    """
+    t, h, c, v = np.broadcast_arrays(_as_array(temp_c), _as_array(rh), _as_array(co2), _as_array(voc_index))
+    base_score = (0.6 * calculate_thermal_score_array(t, h)) + (0.4 * calculate_iaq_score_array(c, v))
+
+    # Veto kuralları (NaN karşılaştırmaları False döner, None gibi atlanır)
+    base_score = np.where(c > 1200, np.minimum(base_score, 0.45), base_score)
+    base_score = np.where((t < 17.0) | (t > 29.0), np.minimum(base_score, 0.50), base_score)
+    base_score = np.where(v > 250, np.minimum(base_score, 0.40), base_score)
+
+    return _round2(np.maximum(0.0, np.minimum(1.0, base_score)))
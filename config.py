@@ -11,15 +11,129 @@ PLACE_ID = "jat8nmi4h0bsii0"
 
 # Sensör Döngü Ayarları
 SENSOR_INTERVAL_SECONDS = 5
-STARTUP_DELAY_SECONDS = 30 
+STARTUP_DELAY_SECONDS = 30 # ilk tahmin döngüsü en erken bu kadar sonra başlar (örnekleme önce açılır)
+# "asyncio": sensörler ayrı thread'lerde paralel okunur, turlar kaymaz; "thread": eski sıralı döngü
+AGENT_MODE = "asyncio"
+
+# Uyarlanır Örnekleme (bkz. sampling.AdaptiveSampler)
+# PIR kenar olaylarıyla: son SAMPLING_OCCUPIED_HOLD_SECONDS içinde hareket varsa ya da CO2/VOC hızla
+# değişiyorsa hızlı, SAMPLING_IDLE_AFTER_SECONDS hareketsizlikten sonra yavaş, arada SENSOR_INTERVAL_SECONDS.
+# Not: SCD41 periyodik modda 5 sn'de bir ölçer; hızlı turlarda CO2 son değeriyle gider.
+SAMPLING_ADAPTIVE = True
+SAMPLING_FAST_SECONDS = 2
+SAMPLING_IDLE_SECONDS = 30
+SAMPLING_OCCUPIED_HOLD_SECONDS = 300
+SAMPLING_IDLE_AFTER_SECONDS = 1800
+SAMPLING_TREND_WINDOW_SECONDS = 120
+SAMPLING_CO2_TREND_PPM_PER_MIN = 30
+SAMPLING_VOC_TREND_PER_MIN = 15
 
 # Sıcaklık Kalibrasyonu
 TEMP_CORRECTION_FACTOR = 2.5
 
 # --- Isınma ve Filtreleme Ayarları ---
-WARMUP_SKIP_COUNT = 30 # İlk 2.5 dakika kayıt yapma
+WARMUP_SECONDS = 150 # İlk 2.5 dakika kayıt yapma (örnekleme hızından bağımsız)
+
+# Yerel Veri Klasörü (kuyruk, önbellek vb.)
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
 
 # Hareketli Ortalama Uzunlukları (Smoothing)
 # Son 10 verinin ortalamasını alarak ani zıplamaları önler.
-GAS_HISTORY_LEN = 10 
-TEMP_HISTORY_LEN = 10 
\ No newline at end of file
+GAS_HISTORY_LEN = 10 # VOC: kayan medyan (ısıtıcı kaynaklı tekil sıçramaları atar)
+TEMP_HISTORY_LEN = 10 # sıcaklık: kayan ortalama
+CO2_EMA_ALPHA = 0.3 # CO2: üstel ortalama (1 = filtre yok)
+FILTER_STATE_SAVE_SECONDS = 300 # filtre geçmişi durum dosyasına bu aralıkla (ve kapanışta) yazılır
+FILTER_STATE_MAX_AGE_SECONDS = 900 # daha eski kayıtlı geçmiş yeniden başlatmada kullanılmaz
+
+# Loglama ve Metrikler
+LOG_LEVEL = "INFO" # "WARNING" her okumayı yazmaz, yalnızca sorunları yazar
+LOG_FORMAT = "logfmt" # "logfmt" (anahtar=değer) veya "json"
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9108 # Prometheus /metrics uç noktası; 0 = kapalı
+
+# Yerel API (bkz. local_api.py): son okuma, kısa geçmiş ve güncel tahmin ajanın belleğinden sunulur;
+# panolar/oda ekranları merkezi PocketBase'e gitmez. ETag/If-None-Match, Cache-Control: max-age ve SSE (/events).
+LOCAL_API_HOST = "0.0.0.0"
+LOCAL_API_PORT = 8091 # 0 = kapalı; 8090 PocketBase varsayılanı, aynı makinede çakışmasın
+LOCAL_API_HISTORY_LEN = 720 # halka tampon: 5 sn aralıkla ~1 saat
+LOCAL_API_READING_TTL_SECONDS = 5 # /latest, /history için max-age
+LOCAL_API_FORECAST_TTL_SECONDS = 300 # /forecast için max-age
+LOCAL_API_FORECAST_RELOAD_SECONDS = 3600 # tahminci bu süredir bir şey itmediyse PocketBase'den yeniden okunur
+LOCAL_API_MAX_STREAMS = 32
+LOCAL_API_CORS_ORIGIN = "*" # tarayıcıdaki panolar için; "" = başlık gönderilmez
+
+# HTTP Ayarları
+PB_TIMEOUT_SECONDS = 10
+PB_POOL_SIZE = 8 # ortak oturumdaki keep-alive bağlantı sayısı
+PB_RETRIES = 2 # bağlantı hatası / 502-504 için tekrar (POST yalnızca bağlantı kurulamadıysa)
+PB_TOKEN_REFRESH_MARGIN_SECONDS = 300 # token süresi dolmadan bu kadar önce yenilenir
+
+# Gönderim Politikası (Deadband)
+# Okuma yalnızca bir kanal son gönderilen değerden bandı kadar uzaklaşınca, PIR değişince
+# ya da REPORT_HEARTBEAT_SECONDS dolunca yazılır. Atlanan okumalar saatlik özete yine girer.
+# Açıkken ham okumalar değişime göre seçilir (sakin saatler az satırla temsil edilir);
+# bu yüzden eğitim okumaları zamana göre seyreltir (FORECAST_TRAINING_STEP_SECONDS).
+REPORT_POLICY_ENABLED = True
+REPORT_DEADBANDS = {"temp_c": 0.2, "rh_percent": 1.0, "co2_ppm": 25, "voc_index": 10, "comfort_score": 0.05}
+REPORT_HEARTBEAT_SECONDS = 300
+
+# Gönderim Kuyruğu (Store-and-Forward)
+# Ağ koptuğunda okumalar yerel SQLite dosyasında bekler, bağlantı gelince toplu gönderilir.
+QUEUE_DB_PATH = os.path.join(DATA_DIR, "outbox.db")
+QUEUE_MAX_ROWS = 100000 # ~5.8 gün (5 sn aralıkla); aşılırsa en eskiler silinir
+UPLOAD_BATCH_SIZE = 50
+UPLOAD_BACKOFF_MIN_SECONDS = 1
+UPLOAD_BACKOFF_MAX_SECONDS = 60
+
+# Tahmin Eğitim Verisi
+TRAINING_WINDOW_DAYS = 30
+# "readings": 5 sn'lik ham okumalar, "rollups": ajanın gönderdiği saatlik özetler (~720x daha az satır)
+FORECAST_TRAINING_SOURCE = "readings"
+# Eğitim her zaman diliminden tek okuma alır: politika açıkken satırlar değişim olayıdır, kalp atışı
+# ise her dilimde en az bir satır bırakır. 0 = tüm okumalar (özetler zaten saatliktir)
+FORECAST_TRAINING_STEP_SECONDS = REPORT_HEARTBEAT_SECONDS if REPORT_POLICY_ENABLED else 0
+# Eğitim verisi yerelde tutulur, her döngüde sadece yeni kayıtlar çekilir
+FEATURE_CACHE_DIR = os.path.join(DATA_DIR, "features")
+RESERVATION_FULL_REFRESH_HOURS = 24 * 7 # silinen rezervasyonları yakalamak için tam yenileme
+
+# Model Saklama
+# Eğitilen modeller diske yazılır; veri az değiştiyse yeniden başlatmada tekrar eğitilmez.
+MODEL_STORE_DIR = os.path.join(DATA_DIR, "models")
+# Günlük döngüde bir günün verisi 30 günlük pencerenin ~%3.3'ü, değişim oranının altında kalır:
+# yaş sınırı döngü aralığından (24 sa) kısa tutulur ki her döngü yeniden eğitsin; gün içi
+# yeniden başlatmalar ve yenilemeler kayıtlı modeli kullanır.
+MODEL_MAX_AGE_HOURS = 20 # bundan eski modeller her durumda yeniden eğitilir
+MODEL_RETRAIN_CHANGE_RATIO = 0.05 # yeni satır oranı bunu aşarsa yeniden eğit
+
+# Ajan durumu (son başarılı tahmin zamanı vb.); yeniden başlatmada tahmin tekrarlanmaz
+AGENT_STATE_PATH = os.path.join(DATA_DIR, "agent_state.json")
+
+# Tahmin Modeli
+# "random_forest": hedef başına bir orman (5 fit), "multi_output": ortam hedefleri tek ormanda,
+# "profile": gün x saat x doluluk kovası ortalama tablosu (en hafif). Seçim için: python forecaster.py --backtest
+FORECAST_ENGINE = "random_forest"
+
+# Tahmin Yayını
+# "upsert": (place_id, target_ts) anahtarıyla yalnızca değişen saatler güncellenir, eksikler eklenir,
+# süresi geçenler en son silinir (okuyucu boş tahmin görmez). "replace": hepsini sil, yeniden yaz.
+FORECAST_PUBLISH_MODE = "upsert"
+FORECAST_UPSERT_TOLERANCE = 0.01 # doluluk/konfor farkı bunu aşmıyorsa kayıt yazılmaz
+
+# Yakın Vade Yenileme
+# Günlük eğitimler arasında her FORECAST_REFRESH_SECONDS'ta son eğitilmiş modelle yalnızca önümüzdeki
+# FORECAST_REFRESH_HOURS saat yeniden tahmin edilir: güncel rezervasyonlar + son saatin ölçümlerine göre
+# sapma düzeltmesi (etkisi FORECAST_BIAS_DECAY_HOURS ölçeğinde üstel söner). 0 = kapalı.
+FORECAST_REFRESH_SECONDS = 3600
+FORECAST_REFRESH_HOURS = 6
+FORECAST_BIAS_DECAY_HOURS = 3.0
+
+# Tahmin Süreci
+# "process": tahmin ayrı, düşük öncelikli bir süreçte çalışır (örnekleme GIL için yarışmaz)
+# "thread": eski davranış, ajan sürecinde daemon thread
+FORECAST_MODE = "process"
+FORECAST_NICE = 10
+FORECAST_N_JOBS = 2 # 4 çekirdekli Pi'de 2 çekirdek örneklemeye kalır
+FORECAST_MEMORY_MB = 1536 # adres alanı sınırı; 0 = sınırsız
+FORECAST_CANCEL_GRACE_SECONDS = 30 # iptalde bu süre beklenir, sonra süreç öldürülür
+# Tüm mekanlar modu (python forecaster.py --all): mekan başına bir süreç havuzu görevi
+FORECAST_PLACE_WORKERS = 0 # 0 = CPU sayısı
@@ -0,0 +1,237 @@
+# engines.py
+import pickle
+import time
+from typing import Callable, Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+
+from config import FORECAST_ENGINE
+
+# Ortam modelleri saat, gün ve kişi sayısından; doluluk modeli yalnızca saat ve günden tahmin eder
+ENV_FEATURES = ['hour', 'day_of_week', 'person_count']
+OCC_FEATURES = ['hour', 'day_of_week']
+ENV_TARGETS = ('temp_c', 'co2_ppm', 'voc_index', 'rh_percent')
+RF_PARAMS = {"n_estimators": 50, "random_state": 42}
+
+
+class ForecastEngine:
+    """
+    Model backend for WeeklyForecaster. fit() takes the training frame
+    (hour, day_of_week, person_count and the ENV_TARGETS columns); the
+    predict methods take aligned arrays and return numpy arrays. Fitted
+    engines are pickled as a whole by ModelStore, and params() goes into
+    the training signature so switching engine or settings retrains.
+    """
+    name = None
+
+    def params(self) -> dict:
+        return {"engine": self.name}
+
+    def fit(self, df: pd.DataFrame, progress: Optional[Callable] = None) -> "ForecastEngine":
+        raise NotImplementedError
+
+    def predict_occupancy(self, hours: np.ndarray, days: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def predict_env(self, hours: np.ndarray, days: np.ndarray, people: np.ndarray) -> Dict[str, np.ndarray]:
+        raise NotImplementedError
+
+
+def _occ_frame(hours, days):
+    return pd.DataFrame({'hour': hours, 'day_of_week': days})
+
+
+def _env_frame(hours, days, people):
+    return pd.DataFrame({'hour': hours, 'day_of_week': days, 'person_count': people})
+
+
+class RandomForestEngine(ForecastEngine):
+    """One RandomForestRegressor per target (occupancy + four environment targets)."""
+    name = "random_forest"
+    MODEL_NAMES = {'temp_c': 'temp', 'co2_ppm': 'co2', 'voc_index': 'voc', 'rh_percent': 'rh'}
+
+    def __init__(self, n_jobs: Optional[int] = None, **rf_params):
+        self.rf_params = {**RF_PARAMS, **rf_params}
+        self.n_jobs = n_jobs
+        self.models = {}
+
+    def params(self):
+        return {"engine": self.name, **self.rf_params}
+
+    def fit(self, df, progress=None):
+        targets = [('occ', OCC_FEATURES, 'person_count')]
+        targets += [(self.MODEL_NAMES[t], ENV_FEATURES, t) for t in ENV_TARGETS]
+        for name, features, target in targets:
+            if progress:
+                progress(name)
+            self.models[name] = RandomForestRegressor(**self.rf_params, n_jobs=self.n_jobs).fit(df[features], df[target])
+        return self
+
+    def predict_occupancy(self, hours, days):
+        return self.models['occ'].predict(_occ_frame(hours, days))
+
+    def predict_env(self, hours, days, people):
+        X = _env_frame(hours, days, people)
+        return {t: self.models[self.MODEL_NAMES[t]].predict(X) for t in ENV_TARGETS}
+
+
+class MultiOutputEngine(ForecastEngine):
+    """
+    One forest predicting all four environment targets together (plus the
+    occupancy forest). Targets are standardised before the fit so CO2's
+    scale does not dominate the split criterion.
+    """
+    name = "multi_output"
+
+    def __init__(self, n_jobs: Optional[int] = None, **rf_params):
+        self.rf_params = {**RF_PARAMS, **rf_params}
+        self.n_jobs = n_jobs
+        self.occ = None
+        self.env = None
+        self._mean = None
+        self._scale = None
+
+    def params(self):
+        return {"engine": self.name, **self.rf_params}
+
+    def fit(self, df, progress=None):
+        if progress:
+            progress('occ')
+        self.occ = RandomForestRegressor(**self.rf_params, n_jobs=self.n_jobs).fit(df[OCC_FEATURES], df['person_count'])
+        if progress:
+            progress('env')
+        Y = df[list(ENV_TARGETS)].to_numpy(dtype=float)
+        self._mean = Y.mean(axis=0)
+        self._scale = Y.std(axis=0)
+        self._scale[self._scale == 0] = 1.0
+        self.env = RandomForestRegressor(**self.rf_params, n_jobs=self.n_jobs).fit(
+            df[ENV_FEATURES], (Y - self._mean) / self._scale)
+        return self
+
+    def predict_occupancy(self, hours, days):
+        return self.occ.predict(_occ_frame(hours, days))
+
+    def predict_env(self, hours, days, people):
+        Y = self.env.predict(_env_frame(hours, days, people)) * self._scale + self._mean
+        return {t: Y[:, i] for i, t in enumerate(ENV_TARGETS)}
+
+
+class ProfileEngine(ForecastEngine):
+    """
+    Lookup tables instead of models: the mean of each environment target per
+    weekday x hour x occupancy bucket, and the mean person count per weekday
+    x hour. Empty cells fall back to the hour x bucket mean over all days,
+    then the hour mean, then the overall mean, so predict is pure indexing.
+    """
+    name = "profile"
+
+    def __init__(self, occupancy_edges: Sequence[float] = (0.5, 2.5, 5.5), **_):
+        # Kovalar: boş, 1-2, 3-5, 6+ kişi
+        self.edges = tuple(float(e) for e in occupancy_edges)
+        self.env_table = None  # (hedef, gün, saat, kova)
+        self.occ_table = None  # (gün, saat)
+
+    def params(self):
+        return {"engine": self.name, "occupancy_edges": list(self.edges)}
+
+    @staticmethod
+    def _cell_means(keys, y, shape):
+        size = int(np.prod(shape))
+        counts = np.bincount(keys, minlength=size)
+        sums = np.bincount(keys, weights=y, minlength=size)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return (sums / counts).reshape(shape)
+
+    def _table(self, day, hour, bucket, y):
+        nb = len(self.edges) + 1
+        full = self._cell_means((day * 24 + hour) * nb + bucket, y, (7, 24, nb))
+        by_hour_bucket = self._cell_means(hour * nb + bucket, y, (24, nb))
+        by_hour = self._cell_means(hour, y, (24,))
+        overall = float(np.mean(y)) if len(y) else 0.0
+        table = np.where(np.isnan(full), by_hour_bucket[None, :, :], full)
+        table = np.where(np.isnan(table), by_hour[None, :, None], table)
+        return np.where(np.isnan(table), overall, table)
+
+    def fit(self, df, progress=None):
+        if progress:
+            progress('profile')
+        day = df['day_of_week'].to_numpy(dtype=np.int64)
+        hour = df['hour'].to_numpy(dtype=np.int64)
+        people = df['person_count'].to_numpy(dtype=float)
+        bucket = np.digitize(people, self.edges)
+        self.env_table = np.stack([self._table(day, hour, bucket, df[t].to_numpy(dtype=float))
+                                   for t in ENV_TARGETS])
+        # Doluluk kişi sayısına göre kovalanmaz: hepsi 0. kovada
+        self.occ_table = self._table(day, hour, np.zeros_like(day), people)[:, :, 0]
+        return self
+
+    def predict_occupancy(self, hours, days):
+        return self.occ_table[np.asarray(days, dtype=np.int64), np.asarray(hours, dtype=np.int64)]
+
+    def predict_env(self, hours, days, people):
+        h = np.asarray(hours, dtype=np.int64)
+        d = np.asarray(days, dtype=np.int64)
+        b = np.digitize(np.asarray(people, dtype=float), self.edges)
+        return {t: self.env_table[i, d, h, b] for i, t in enumerate(ENV_TARGETS)}
+
+
+ENGINES = {cls.name: cls for cls in (RandomForestEngine, MultiOutputEngine, ProfileEngine)}
+
+
+def backtest(df: pd.DataFrame, ts: np.ndarray, engines: Sequence[str] = tuple(ENGINES), weeks: int = 2,
+             **options) -> list:
+    """
+    Rolling-origin backtest. For each of the last `weeks` weeks every engine is
+    fitted on the rows before that week and scored on it. Environment targets
+    are scored with the week's actual person counts, so occupancy errors do
+    not leak into them. Returns one dict per engine with the means over the
+    weeks: fit seconds, predict milliseconds for one HORIZON (168 h), pickled
+    size and mean absolute error per target.
+    """
+    ts = np.asarray(ts).astype('datetime64[ns]')
+    week = np.timedelta64(7, 'D')
+    end = ts.max() + np.timedelta64(1, 'ns')
+    horizon_h = np.arange(168) % 24
+    horizon_d = (np.arange(168) // 24) % 7
+    horizon_p = np.ones(168)
+    results = {name: {"engine": name, "weeks": 0, "fit_s": 0.0, "predict_ms": 0.0, "size_kb": 0.0,
+                      **{f"mae_{t}": 0.0 for t in ('occupancy',) + ENV_TARGETS}} for name in engines}
+    for k in range(weeks, 0, -1):
+        start = end - k * week
+        train, test = ts < start, (ts >= start) & (ts < start + week)
+        if train.sum() < 50 or not test.any():
+            continue
+        train_df, test_df = df[train], df[test]
+        h, d, p = (test_df[c].to_numpy() for c in ('hour', 'day_of_week', 'person_count'))
+        for name in engines:
+            engine = make_engine(name, **options)
+            t0 = time.perf_counter()
+            engine.fit(train_df)
+            fit_s = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            engine.predict_occupancy(horizon_h, horizon_d)
+            engine.predict_env(horizon_h, horizon_d, horizon_p)
+            predict_ms = (time.perf_counter() - t0) * 1000
+            env = engine.predict_env(h, d, p)
+            r = results[name]
+            r["weeks"] += 1
+            r["fit_s"] += fit_s
+            r["predict_ms"] += predict_ms
+            r["size_kb"] += len(pickle.dumps(engine)) / 1024
+            r["mae_occupancy"] += float(np.mean(np.abs(np.maximum(0, engine.predict_occupancy(h, d)) - p)))
+            for t in ENV_TARGETS:
+                r[f"mae_{t}"] += float(np.mean(np.abs(env[t] - test_df[t].to_numpy(dtype=float))))
+    for r in results.values():
+        for key in r:
+            if key not in ("engine", "weeks") and r["weeks"]:
+                r[key] /= r["weeks"]
+    return list(results.values())
+
+
+def make_engine(name: str = FORECAST_ENGINE, **options) -> ForecastEngine:
+    try:
+        return ENGINES[name](**options)
+    except KeyError:
+        raise ValueError(f"unknown forecast engine {name!r}; choose from {', '.join(ENGINES)}") from None
@@ -0,0 +1,113 @@
+# feature_cache.py
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config import FEATURE_CACHE_DIR, RESERVATION_FULL_REFRESH_HOURS
+
+READING_COLUMNS = ('ts', 'temp_c', 'co2_ppm', 'voc_index', 'rh_percent')
+
+
+class FeatureCache:
+    """
+    On-disk cache of one place's parsed training data, from either raw
+    readings or hourly rollups (`source`).
+
+    Readings are kept as NumPy columns in `<place>.npz` ('ts' is int64
+    nanoseconds of recorded_at, sensor values float32) together with their `created` watermark in
+    the same file, so rows and watermark are replaced atomically and the next
+    cycle only fetches rows created after it. Reservations are kept by
+    id with an `updated` watermark; since deletions are invisible to a delta
+    query they are re-fetched in full every RESERVATION_FULL_REFRESH_HOURS.
+    """
+
+    def __init__(self, place_id: str, directory: str = FEATURE_CACHE_DIR, source: str = 'readings'):
+        self.place_id = place_id
+        self.directory = directory
+        self.source = source
+        name = place_id if source == 'readings' else f"{place_id}.{source}"
+        self.readings_path = os.path.join(directory, f"{name}.npz")
+        self.meta_path = os.path.join(directory, f"{name}.json")
+        self.columns: Dict[str, np.ndarray] = {c: np.empty(0, dtype=np.float32) for c in READING_COLUMNS}
+        self.columns['ts'] = np.empty(0, dtype=np.int64)
+        self.readings_watermark: Optional[str] = None
+        self.reservations: Dict[str, dict] = {}
+        self.reservations_watermark: Optional[str] = None
+        self.reservations_full_at = 0.0
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.meta_path) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            meta = {}
+        try:
+            with np.load(self.readings_path) as data:
+                self.columns = {c: data[c] for c in READING_COLUMNS}
+                # Eski float64 önbellekler float32'ye iner
+                for c in READING_COLUMNS[1:]:
+                    self.columns[c] = self.columns[c].astype(np.float32, copy=False)
+                self.readings_watermark = str(data['readings_watermark']) or None
+        except (OSError, ValueError, KeyError):
+            pass
+        self.reservations = meta.get('reservations', {})
+        self.reservations_watermark = meta.get('reservations_watermark')
+        self.reservations_full_at = meta.get('reservations_full_at', 0.0)
+
+    def __len__(self):
+        return len(self.columns['ts'])
+
+    def needs_full_reservations(self) -> bool:
+        return time.time() - self.reservations_full_at > RESERVATION_FULL_REFRESH_HOURS * 3600
+
+    def append_readings(self, delta: Dict[str, np.ndarray], watermark: str):
+        if len(delta['ts']):
+            order = np.argsort(delta['ts'], kind='stable')
+            for c in READING_COLUMNS:
+                self.columns[c] = np.concatenate([self.columns[c], np.asarray(delta[c])[order]]).astype(
+                    self.columns[c].dtype, copy=False)
+        self.readings_watermark = watermark
+
+    def set_reservations(self, records: List[dict], watermark: str, full: bool):
+        if full:
+            self.reservations = {}
+            self.reservations_full_at = time.time()
+        for r in records:
+            self.reservations[r['id']] = {k: r.get(k) for k in ('id', 'start_ts', 'end_ts', 'attendee_count')}
+        self.reservations_watermark = watermark
+
+    def evict(self, before_ns: int, before_str: str):
+        """Drops readings older than the window and reservations that ended before it."""
+        keep = self.columns['ts'] >= before_ns
+        if not keep.all():
+            for c in READING_COLUMNS:
+                self.columns[c] = self.columns[c][keep]
+        self.reservations = {k: r for k, r in self.reservations.items()
+                             if (r.get('end_ts') or '').replace('T', ' ') >= before_str}
+
+    def save(self):
+        os.makedirs(self.directory, exist_ok=True)
+        # Önce geçici dosyaya yaz, sonra yer değiştir: yarım kalan yazma önbelleği bozmasın
+        tmp = self.readings_path + ".tmp.npz"
+        np.savez(tmp, readings_watermark=np.array(self.readings_watermark or ""), **self.columns)
+        os.replace(tmp, self.readings_path)
+        meta = {
+            'reservations': self.reservations,
+            'reservations_watermark': self.reservations_watermark,
+            'reservations_full_at': self.reservations_full_at,
+        }
+        with open(self.meta_path + ".tmp", "w") as f:
+            json.dump(meta, f)
+        os.replace(self.meta_path + ".tmp", self.meta_path)
+
+    def invalidate(self):
+        for path in (self.readings_path, self.meta_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self.__init__(self.place_id, self.directory, self.source)
@@ -0,0 +1,317 @@
+# forecast_worker.py
+import atexit
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from typing import Callable, Optional
+
+from config import (
+    FORECAST_NICE, FORECAST_N_JOBS, FORECAST_MEMORY_MB, FORECAST_CANCEL_GRACE_SECONDS
+)
+import metrics
+from log import get_logger, setup as setup_logging
+
+log = get_logger("forecast_worker")
+WORKER_RESTARTS = metrics.counter("forecast_worker_restarts_total",
+                                  "Forecast worker processes replaced after a crash or forced cancel")
+CYCLES = metrics.counter("forecast_cycles_total", "Forecast cycles run by the worker", ("result",))
+STAGE_SECONDS = metrics.histogram("forecast_stage_seconds", "forecast_place stage durations",
+                                  ("stage",), buckets=metrics.STAGE_BUCKETS)
+PLACES = metrics.counter("forecast_places_total", "Places processed by forecast cycles", ("status",))
+
+
+def record_summaries(summaries):
+    """Adds forecast_place summaries to the stage/status metrics of this process."""
+    # Burada durur, forecaster'da değil: ajan pandas/sklearn yüklemeden sonuçları sayabilsin
+    for s in summaries:
+        PLACES.labels(s.get("status", "error")).inc()
+        for stage, seconds in s.get("timings", {}).items():
+            STAGE_SECONDS.labels(stage).observe(seconds)
+
+# numpy / BLAS iş parçacığı sayısı da iş sınırına bağlanır (alt süreç import etmeden önce)
+_THREAD_ENV = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+RESTART_BACKOFF_MAX_SECONDS = 60
+
+
+class CycleCancelled(Exception):
+    pass
+
+
+def _apply_limits(nice: int, memory_mb: int):
+    try:
+        os.nice(nice)
+    except OSError as e:
+        log.warning("nice uygulanamadı", error=e)
+    if memory_mb:
+        try:
+            import resource
+            limit = int(memory_mb) * 2 ** 20
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ImportError, ValueError, OSError) as e:
+            log.warning("Bellek sınırı uygulanamadı", error=e)
+
+
+def _worker_main(conn, nice, n_jobs, memory_mb, options):
+    """Alt süreç: komutları bekler, her 'run' için bir tahmin döngüsü, her 'refresh' için yakın vade yenileme çalıştırır."""
+    setup_logging()
+    _apply_limits(nice, memory_mb)
+    from forecaster import WeeklyForecaster
+    from model_store import ModelStore
+    from pb_client import PBClient
+
+    send_lock = threading.Lock()
+    cancel = threading.Event()
+    jobs = queue.Queue()
+
+    def send(*msg):
+        with send_lock:
+            conn.send(msg)
+
+    def listen():
+        # İptal, döngü çalışırken de alınabilsin diye komutlar ayrı thread'de okunur
+        while True:
+            try:
+                msg = conn.recv()
+            except (EOFError, OSError):
+                msg = ("stop",)
+            if msg[0] == "cancel":
+                cancel.set()
+                continue
+            jobs.put(msg)
+            if msg[0] == "stop":
+                return
+
+    def progress(stage, info):
+        if cancel.is_set():
+            raise CycleCancelled()
+        send("progress", current_job, (stage, info))
+
+    threading.Thread(target=listen, daemon=True).start()
+    f = WeeklyForecaster(PBClient(options["base_url"]) if options.get("base_url") else None)
+    if options.get("cache_dir"):
+        f.cache_dir = options["cache_dir"]
+    if options.get("model_dir"):
+        f.model_store = ModelStore(options["model_dir"])
+    if options.get("engine"):
+        f.engine = options["engine"]
+    if options.get("training_source"):
+        f.training_source = options["training_source"]
+    f.n_jobs = n_jobs or None
+    f.progress = progress
+    current_job = None
+    send("ready", None, os.getpid())
+
+    while True:
+        msg = jobs.get()
+        if msg[0] == "stop":
+            return
+        # Süreç yaşadıkça f.engines de yaşar: yenileme modeli diskten tekrar okumaz
+        task, current_job, place_id = msg
+        cancel.clear()
+        t0 = time.monotonic()
+        try:
+            f.last_published.clear()
+            results = f.run_cycle(place_id, refresh=task == "refresh")
+            send("done", current_job, {"task": task, "results": results, "published": f.last_published,
+                                       "seconds": round(time.monotonic() - t0, 2)})
+        except CycleCancelled:
+            send("cancelled", current_job, {"seconds": round(time.monotonic() - t0, 2)})
+        except MemoryError:
+            send("error", current_job, f"MemoryError (sınır {memory_mb} MB)")
+        except Exception as e:
+            send("error", current_job, f"{type(e).__name__}: {e}")
+
+
+class ForecastWorker:
+    """
+    Runs WeeklyForecaster.run_cycle in a separate process so pandas and the
+    forest fits never hold the sampling process's GIL.
+
+    The worker runs at `nice`, fits with at most `n_jobs` threads (BLAS/OpenMP
+    pools are capped to the same number) and, when `memory_mb` is set, under
+    an address-space limit. Progress and results come back over a pipe and
+    are passed to `on_event(kind, job_id, info)`. A cycle can be cancelled:
+    the worker stops at its next progress point, or is killed after `grace`
+    seconds. A worker that dies on its own is restarted with backoff.
+    """
+
+    def __init__(self, nice: int = FORECAST_NICE, n_jobs: int = FORECAST_N_JOBS,
+                 memory_mb: int = FORECAST_MEMORY_MB, on_event: Optional[Callable] = None, **options):
+        self.nice = nice
+        self.n_jobs = n_jobs
+        self.memory_mb = memory_mb
+        self.on_event = on_event
+        self.options = options
+        self.restarts = 0
+        self.last_result = None
+        self.last_progress = None
+        self._ctx = mp.get_context("spawn")  # thread'li süreçten fork güvenli değil
+        self._lock = threading.RLock()
+        self._send_lock = threading.Lock()
+        self._proc = None
+        self._conn = None
+        self._job = None
+        self._job_seq = 0
+        self._crashes = 0
+        self._stopping = False
+        self._idle = threading.Event()
+        self._idle.set()
+
+    @property
+    def busy(self) -> bool:
+        return not self._idle.is_set()
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self._proc.pid if self._proc else None
+
+    def start(self):
+        with self._lock:
+            self._stopping = False
+            if self._proc is None or not self._proc.is_alive():
+                self._spawn()
+        atexit.register(self.stop)
+        return self
+
+    def _spawn(self):
+        parent_conn, child_conn = self._ctx.Pipe()
+        # daemon değil: joblib daemon süreçte n_jobs'u 1'e düşürür. Çıkışta stop() atexit'ten çağrılır.
+        proc = self._ctx.Process(target=_worker_main, name="forecast-worker", daemon=False,
+                                 args=(child_conn, self.nice, self.n_jobs, self.memory_mb, self.options))
+        env = {k: str(self.n_jobs) for k in _THREAD_ENV} if self.n_jobs else {}
+        saved = {k: os.environ.get(k) for k in env}
+        os.environ.update(env)
+        try:
+            proc.start()
+        finally:
+            for k, v in saved.items():
+                if v is None:
+                    os.environ.pop(k, None)
+                else:
+                    os.environ[k] = v
+        child_conn.close()
+        self._proc, self._conn = proc, parent_conn
+        threading.Thread(target=self._listen, args=(proc, parent_conn), daemon=True).start()
+
+    def _emit(self, kind, job_id, info):
+        if self.on_event:
+            try:
+                self.on_event(kind, job_id, info)
+            except Exception as e:
+                log.error("on_event hatası", exc_info=True, kind=kind)
+
+    def _finish(self, job_id):
+        with self._lock:
+            if self._job == job_id:
+                self._job = None
+                self._idle.set()
+
+    def _listen(self, proc, conn):
+        while True:
+            try:
+                kind, job_id, info = conn.recv()
+            except (EOFError, OSError):
+                break
+            if kind == "progress":
+                stage, detail = info
+                self.last_progress = (stage, detail)
+                self._emit("progress", job_id, {"stage": stage, **detail})
+                continue
+            if kind == "ready":
+                log.info("Süreç hazır", pid=info)
+                continue
+            if kind == "done":
+                self.last_result = info
+                self._crashes = 0
+                # Aşama süreleri alt süreçte ölçülür, /metrics ise bu süreçte sunulur
+                record_summaries(info["results"])
+                log.info("Tahmin döngüsü bitti", job=job_id, task=info['task'], seconds=info['seconds'])
+            elif kind == "cancelled":
+                log.info("Tahmin döngüsü iptal edildi", job=job_id)
+            elif kind == "error":
+                log.error("Tahmin döngüsü hatası", job=job_id, error=info)
+            CYCLES.labels(kind).inc()
+            self._finish(job_id)
+            self._emit(kind, job_id, info)
+
+        proc.join()
+        conn.close()
+        with self._lock:
+            if self._proc is not proc or self._stopping:
+                return  # bilerek kapatıldı / yerine yenisi açıldı
+            job_id, self._job = self._job, None
+            self._idle.set()
+            self.restarts += 1
+            self._crashes += 1
+            delay = min(2 ** (self._crashes - 1), RESTART_BACKOFF_MAX_SECONDS)
+        WORKER_RESTARTS.inc()
+        log.error("Süreç beklenmedik şekilde kapandı", exitcode=proc.exitcode, restart_in=delay)
+        if job_id is not None:
+            CYCLES.labels("crashed").inc()
+            self._emit("crashed", job_id, {"exitcode": proc.exitcode})
+        time.sleep(delay)
+        with self._lock:
+            if self._proc is proc and not self._stopping:
+                self._spawn()
+
+    def _send(self, *msg) -> bool:
+        try:
+            with self._send_lock:
+                self._conn.send(msg)
+            return True
+        except (OSError, AttributeError):
+            return False
+
+    def submit(self, place_id: Optional[str] = None, task: str = "run") -> Optional[int]:
+        """
+        Starts a cycle ("run") or a near-term refresh ("refresh"); returns its
+        job id, or None if one is still running.
+        """
+        with self._lock:
+            if self.busy or self._proc is None or not self._proc.is_alive():
+                return None
+            self._job_seq += 1
+            self._job = self._job_seq
+            self._idle.clear()
+            if not self._send(task, self._job, place_id):
+                self._job = None
+                self._idle.set()
+                return None
+            return self._job
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._idle.wait(timeout)
+
+    def cancel(self, grace: float = FORECAST_CANCEL_GRACE_SECONDS) -> bool:
+        """Cancels the running cycle. Returns False if nothing was running."""
+        if not self.busy:
+            return False
+        self._send("cancel", None, None)
+        if self._idle.wait(grace):
+            return True
+        # Bir sonraki ilerleme noktasına ulaşamadı (ör. uzun bir fit): süreci öldür, yenisini aç
+        with self._lock:
+            job_id, self._job = self._job, None
+            old = self._proc
+            self._spawn()
+            self._idle.set()
+        old.kill()
+        WORKER_RESTARTS.inc()
+        CYCLES.labels("cancelled").inc()
+        log.warning("Tahmin süreci iptal için sonlandırıldı", job=job_id)
+        self._emit("cancelled", job_id, {"forced": True})
+        return True
+
+    def stop(self, timeout: float = 5.0):
+        with self._lock:
+            self._stopping = True
+            proc = self._proc
+        if proc is None:
+            return
+        self._send("stop", None, None)
+        proc.join(timeout)
+        if proc.is_alive():
+            proc.kill()
+            proc.join()
@@ -1,206 +1,632 @@
 # forecaster.py
+import argparse
 import datetime
+import multiprocessing as mp
+import os
+import time
 import requests
 import pandas as pd
 import numpy as np
 import random
-from sklearn.ensemble import RandomForestRegressor
-from config import PB_BASE_URL, PB_ADMIN_EMAIL, PB_ADMIN_PASSWORD, PLACE_ID
-from comfort import calc_comfort_score
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+from config import (
+    PB_BASE_URL, PB_ADMIN_EMAIL, PB_ADMIN_PASSWORD, PLACE_ID,
+    TRAINING_WINDOW_DAYS, FEATURE_CACHE_DIR, MODEL_STORE_DIR, FORECAST_TRAINING_SOURCE,
+    FORECAST_PLACE_WORKERS, FORECAST_ENGINE, FORECAST_PUBLISH_MODE, FORECAST_UPSERT_TOLERANCE,
+    FORECAST_REFRESH_HOURS, FORECAST_BIAS_DECAY_HOURS, FORECAST_TRAINING_STEP_SECONDS
+)
+from comfort import calc_comfort_score_array
+from pb_batch import BatchOp
+from pb_pages import PAGE_SIZE
+from pb_client import PBClient, SUPERUSER_AUTH, ADMIN_AUTH, USER_AUTH
+from pb_queries import QUERIES
+from features import NAT, build_frame, pace_index, parse_timestamps
+from reservations import ReservationIndex, to_ns
+from feature_cache import FeatureCache
+from model_store import ModelStore, model_key, training_signature
+from engines import ENGINES, ENV_TARGETS, make_engine, backtest
+from forecast_worker import record_summaries
+from log import get_logger, setup as setup_logging
+
+HORIZON_HOURS = 168
+
+# Training sources: query (pb_queries.QUERIES), timestamp field and the field behind each feature column
+TRAINING_SOURCES = {
+    'readings': ('training_readings', 'recorded_at',
+                 {'temp_c': 'temp_c', 'co2_ppm': 'co2_ppm', 'voc_index': 'voc_index', 'rh_percent': 'rh_percent'}),
+    'rollups': ('training_rollups', 'hour_start',
+                {'temp_c': 'temp_c_mean', 'co2_ppm': 'co2_ppm_mean', 'voc_index': 'voc_index_mean',
+                 'rh_percent': 'rh_percent_mean'}),
+}
+# forecast_place timing keys, in order
+STAGES = ('fetch', 'features', 'fit', 'predict', 'publish')
+FEATURE_DEFAULTS = {'temp_c': 22.0, 'co2_ppm': 400, 'voc_index': 50, 'rh_percent': 45.0}
+PARSE_CHUNK_ROWS = 10000  # _parse_records: bellekte aynı anda tutulan kayıt sözlüğü sayısı
+FORECAST_VALUE_FIELDS = ('predicted_occupancy', 'predicted_comfort_score')
+WATERMARK_LAG_SECONDS = 5  # refresh_training_data: üst sınır, yazımı süren batch'lerin gerisinde kalır
+
+log = get_logger("forecaster")
+
+
+def _ts_key(ts: str) -> str:
+    # '2025-03-03 10:00:00Z', '2025-03-03 10:00:00.000Z' ve 'T' ayracı aynı anahtara iner
+    return ts.replace('T', ' ')[:19]
+
+
+def _fill_rng(place_id: str, target_ts: str, kind: str) -> random.Random:
+    # str tohumu süreçler arasında sabittir (hash rastgeleleştirmesinden etkilenmez)
+    return random.Random(f"{place_id}{target_ts}{kind}")
+
 
 class WeeklyForecaster:
-    def __init__(self):
-        self.base_url = PB_BASE_URL
-        self.token = None
+    def __init__(self, client: PBClient = None):
+        self.pb = client or PBClient(PB_BASE_URL)
+        self.writer = self.pb.writer
+        self.cache_dir = FEATURE_CACHE_DIR
+        self.training_source = FORECAST_TRAINING_SOURCE
+        self.training_step = FORECAST_TRAINING_STEP_SECONDS
+        self.model_store = ModelStore(MODEL_STORE_DIR)
+        self.engine = FORECAST_ENGINE  # bkz. engines.ENGINES
+        self.n_jobs = None  # RandomForest paralel iş sayısı; sonuç değişmez
+        self.progress = None  # callable(stage, info); ayrı süreçte çalışırken IPC'ye bağlanır
+        self.engines = {}  # place_id -> son eğitilen/yüklenen motor (saatlik yenileme için bellekte)
+        self.last_published = {}  # place_id -> (tahminler, partial); ajanın yerel API'si buradan beslenir
+
+    def _progress(self, stage, **info):
+        if self.progress:
+            self.progress(stage, info)
 
     def _login(self):
-        payload = {"identity": PB_ADMIN_EMAIL, "password": PB_ADMIN_PASSWORD}
-        endpoints = [
-            "/api/collections/_superusers/auth-with-password",
-            "/api/admins/auth-with-password",
-            "/api/collections/users/auth-with-password"
-        ]
-        for ep in endpoints:
-            try:
-                r = requests.post(f"{self.base_url}{ep}", json=payload, timeout=10)
-                if r.status_code == 200:
-                    self.token = r.json().get("token")
-                    return True
-            except: pass
-        return False
+        return self.pb.login(PB_ADMIN_EMAIL, PB_ADMIN_PASSWORD, (SUPERUSER_AUTH, ADMIN_AUTH, USER_AUTH))
 
-    def _headers(self):
-        return {"Content-Type": "application/json", "Authorization": f"Bearer {self.token}"}
+    def iter_records(self, collection, filter_str="", sort="-created", per_page=PAGE_SIZE, fields=None):
+        return self.pb.iter_records(collection, filter_str=filter_str, sort=sort, per_page=per_page, fields=fields)
 
-    def get_records(self, collection, filter_str="", sort="-created", limit=500):
-        url = f"{self.base_url}/api/collections/{collection}/records"
-        params = {"filter": filter_str, "sort": sort, "perPage": limit}
+    def query(self, name, filter_str=""):
+        """Named list query (pb_queries.QUERIES): only the fields its call site reads, no total count."""
+        return self.pb.query(name, filter_str)
+
+    def get_records(self, collection, filter_str="", sort="-created", limit=None, fields=None):
+        """All matching records across pages, or only the first `limit` of them."""
+        per_page = min(limit, PAGE_SIZE) if limit else PAGE_SIZE
         try:
-            r = requests.get(url, headers=self._headers(), params=params)
-            return r.json().get("items", [])
+            return list(islice(self.iter_records(collection, filter_str, sort, per_page, fields), limit))
         except: return []
 
-    def clear_old_forecasts(self, place_id):
-        items = self.get_records("forecasts", f"place_id='{place_id}'", limit=200)
-        for item in items:
-            try:
-                requests.delete(f"{self.base_url}/api/collections/forecasts/records/{item['id']}", headers=self._headers())
-            except: pass
+    def publish_forecasts(self, place_id, forecasts, partial=False):
+        """
+        Writes the place's forecasts (FORECAST_PUBLISH_MODE) with chunked batch
+        requests. Returns the failed OpResults, one per record. `partial`
+        forecasts cover only part of the horizon: they are always upserted and
+        records outside their time range are left alone.
+        """
+        filter_str = f"place_id='{place_id}'"
+        if partial and forecasts:
+            filter_str += (f" && target_ts >= '{forecasts[0]['target_ts']}'"
+                           f" && target_ts <= '{forecasts[-1]['target_ts']}'")
+        q = QUERIES['forecasts']
+        old = self.get_records(q.collection, filter_str, q.sort, fields=q.fields)
+        self.last_published[place_id] = (forecasts, partial)
+        if FORECAST_PUBLISH_MODE != "upsert" and not partial:
+            ops = [BatchOp("DELETE", f"/api/collections/forecasts/records/{item['id']}", key=item['id']) for item in old]
+            ops += [BatchOp("POST", "/api/collections/forecasts/records", body=payload, key=payload['target_ts'])
+                    for payload in forecasts]
+            return [res for res in self.writer.submit(ops) if not res.ok]
 
-    def create_forecast(self, payload):
-        url = f"{self.base_url}/api/collections/forecasts/records"
-        try:
-            requests.post(url, json=payload, headers=self._headers())
-        except: pass
+        writes, deletes, unchanged = self.diff_forecasts(old, forecasts)
+        log.info("forecast diff", place_id=place_id, created=sum(op.method == "POST" for op in writes),
+                 updated=sum(op.method == "PATCH" for op in writes), deleted=len(deletes), unchanged=unchanged)
+        # Önce yazılar, sonra silmeler: okuyucu hiçbir anda eksik saat görmez
+        results = self.writer.submit(writes) + self.writer.submit(deletes)
+        return [res for res in results if not res.ok]
 
-    def run_cycle(self):
-        print(f"--- WEEKLY FORECAST CYCLE STARTED ---")
-        
+    @staticmethod
+    def diff_forecasts(old, forecasts, tolerance=FORECAST_UPSERT_TOLERANCE):
+        """
+        Upsert plan keyed by target_ts (records are already one place's):
+        PATCH hours whose values moved more than `tolerance`, POST missing
+        hours, DELETE hours no longer forecast (expired) and duplicates.
+        Returns (writes, deletes, unchanged count).
+        """
+        existing = {}
+        deletes = []
+        for item in old:
+            key = _ts_key(item.get('target_ts', ''))
+            if key in existing:
+                deletes.append(BatchOp("DELETE", f"/api/collections/forecasts/records/{item['id']}", key=item['id']))
+            else:
+                existing[key] = item
+        writes = []
+        unchanged = 0
+        for payload in forecasts:
+            item = existing.pop(_ts_key(payload['target_ts']), None)
+            if item is None:
+                writes.append(BatchOp("POST", "/api/collections/forecasts/records", body=payload,
+                                      key=payload['target_ts']))
+            elif any(abs(float(item.get(f) or 0) - payload[f]) > tolerance for f in FORECAST_VALUE_FIELDS):
+                writes.append(BatchOp("PATCH", f"/api/collections/forecasts/records/{item['id']}",
+                                      body={f: payload[f] for f in FORECAST_VALUE_FIELDS}, key=payload['target_ts']))
+            else:
+                unchanged += 1
+        deletes += [BatchOp("DELETE", f"/api/collections/forecasts/records/{item['id']}", key=item['id'])
+                    for item in existing.values()]
+        return writes, deletes, unchanged
+
+    def fit_models(self, df):
+        """Fits a fresh engine of the configured kind; returns it."""
+        return make_engine(self.engine, n_jobs=self.n_jobs).fit(df, lambda name: self._progress("fit", model=name))
+
+    def predict_week(self, place, engine, res_index, start_prediction, hours=HORIZON_HOURS, env_bias=None):
+        """
+        Predicts the whole horizon in one pass: the feature matrix is built once
+        and the engine is called once for occupancy and once for the environment. Random fills come from
+        _fill_rng(place_id, target_ts, kind), so the same inputs always give the same forecast.
+        `hours` shortens the horizon; `env_bias` (target -> offset per hour, see
+        refresh_place) is added to the environment predictions before scoring.
+        """
+        future_times = [start_prediction + datetime.timedelta(hours=i) for i in range(hours)]
+        hour_of_day = np.array([t.hour for t in future_times])
+        days = np.array([t.weekday() for t in future_times])
+
+        reserved_people, has_reservation = res_index.lookup(future_times)
+        raw_occupancies = reserved_people.astype(float)
+
+        predicted_occ = np.maximum(0, engine.predict_occupancy(hour_of_day, days))
+        free = ~has_reservation
+        raw_occupancies[free] = predicted_occ[free]
+
+        # Dolgu değerleri (place_id, target_ts) ile tohumlanır: aynı girdiyle her çalıştırma aynı
+        # tahmini üretir, upsert/yenileme değişmeyen saatleri yeniden yazmaz
+        target_keys = [t.strftime("%Y-%m-%d %H:%M:%SZ") for t in future_times]
+        working_hours = (hour_of_day >= 8) & (hour_of_day <= 19)
+        for i in np.flatnonzero(free & working_hours & (raw_occupancies < 0.5)):
+            raw_occupancies[i] = _fill_rng(place['id'], target_keys[i], "occupancy").uniform(0.5, 1.5)
+
+        smoothed = pd.Series(raw_occupancies).rolling(window=5, min_periods=1, center=True, win_type='gaussian').mean(std=2)
+        if smoothed.isna().any():
+            smoothed = pd.Series(raw_occupancies).rolling(window=5, min_periods=1, center=True).mean()
+        smoothed = smoothed.to_numpy()
+
+        env = engine.predict_env(hour_of_day, days, smoothed)
+        if env_bias:
+            env = {t: env[t] + env_bias[t] for t in env}
+        scores = calc_comfort_score_array(env['temp_c'], env['rh_percent'], env['co2_ppm'], env['voc_index'])
+
+        capacity = place.get('capacity', 10)
+        if capacity <= 0: capacity = 10
+
+        people = smoothed.copy()
+        min_people = capacity * 0.15
+        for i in np.flatnonzero(working_hours & (days < 5) & (people < min_people)):
+            people[i] = capacity * _fill_rng(place['id'], target_keys[i], "people").uniform(0.15, 0.25)
+        occupancy_ratio = np.clip(people / capacity, 0.0, 1.0)
+
+        return [
+            {
+                "place_id": place['id'],
+                "target_ts": target_keys[i],
+                "predicted_occupancy": float(occupancy_ratio[i]),
+                "predicted_comfort_score": float(scores[i])
+            }
+            for i in range(len(future_times))
+        ]
+
+    def _parse_records(self, records, source='readings', chunk=PARSE_CHUNK_ROWS):
+        """
+        Fetched records -> cache columns (int64 ns 'ts', float32 sensors).
+        Records are consumed in chunks as the pages arrive, each parsed
+        column-wise, so only one chunk of dicts is alive at a time.
+        """
+        _, ts_field, fields = TRAINING_SOURCES[source]
+        parts = {col: [] for col in ('ts', *fields)}
+        records = iter(records)
+        while True:
+            batch = list(islice(records, chunk))
+            if not batch:
+                break
+            ts = parse_timestamps([rec.get(ts_field) for rec in batch])
+            ok = ts != NAT
+            parts['ts'].append(ts[ok])
+            for col, field in fields.items():
+                # None -> NaN; filled forward/backward when the training frame is built
+                values = np.array([rec.get(field, FEATURE_DEFAULTS[col]) for rec in batch], dtype=np.float32)
+                parts[col].append(values[ok])
+        columns = {col: np.concatenate(p) if p else np.empty(0, dtype=np.int64 if col == 'ts' else np.float32)
+                   for col, p in parts.items()}
+        if source == 'rollups':
+            # An hourly row stands for the middle of its hour (reservation lookups)
+            columns['ts'] += 30 * 60 * 10**9
+        return columns
+
+    def refresh_training_data(self, place, cache, reservations=None):
+        """
+        Brings the place's FeatureCache up to date: fetches only readings
+        (or hourly rollups, per the cache's source) created after the cache watermark (and reservations updated after
+        theirs), evicts rows that fell out of the training window and saves.
+        Fetch errors propagate before anything is written. Given `reservations`
+        (a full, already downloaded list) the reservation query is skipped.
+        """
+        now_utc = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+        window_start = now_utc - datetime.timedelta(days=TRAINING_WINDOW_DAYS)
+        start_str = window_start.strftime('%Y-%m-%d %H:%M:%SZ')
+        # Fixed upper bound so rows inserted while paging don't shift the pages;
+        # it also becomes the next watermark. PocketBase stores 'created' with
+        # milliseconds and the filter compares strings ('.' < 'Z'), so the bound
+        # keeps them; it also trails now by WATERMARK_LAG_SECONDS so a batch
+        # transaction still committing at query time lands in the next delta.
+        end_str = (now_utc - datetime.timedelta(seconds=WATERMARK_LAG_SECONDS)).strftime(
+            '%Y-%m-%d %H:%M:%S.%f')[:-3] + 'Z'
+
+        if cache.readings_watermark and cache.readings_watermark > start_str:
+            since = f"created > '{cache.readings_watermark}'"
+        else:
+            since = f"created >= '{start_str}'"
+        records = self.query(TRAINING_SOURCES[cache.source][0],
+                             f"place_id='{place['id']}' && {since} && created <= '{end_str}'")
+        delta = self._parse_records(records, cache.source)
+
+        if reservations is not None:
+            full = True
+        else:
+            full = cache.needs_full_reservations() or not cache.reservations_watermark
+            res_filter = f"place_id='{place['id']}'"
+            if not full:
+                res_filter += f" && updated > '{cache.reservations_watermark}' && updated <= '{end_str}'"
+            reservations = list(self.query("training_reservations", res_filter))
+
+        cache.append_readings(delta, end_str)
+        cache.set_reservations(reservations, end_str, full)
+        cache.evict(int(to_ns([window_start])[0]), window_start.strftime('%Y-%m-%d %H:%M:%S'))
+        cache.save()
+        log.info("cache refreshed", place_id=place['id'], source=cache.source, new_rows=len(delta['ts']),
+                 reservation_updates=len(reservations), full=full, rows=len(cache))
+
+    def forecast_place(self, place, reservations=None):
+        """
+        Fetches, trains (or reuses), predicts and publishes one place. Returns
+        its summary with per-stage timings; fetch errors propagate.
+        `reservations` is the place's share of a cycle-wide download (see run_all_places).
+        """
+        log.info("analyzing place", place_id=place['id'], name=place.get('name'))
+        summary = {"place_id": place['id'], "name": place.get('name'), "status": "ok", "timings": {}}
+        t_stage = time.perf_counter()
+
+        def lap(stage):
+            nonlocal t_stage
+            now = time.perf_counter()
+            summary["timings"][stage] = round(now - t_stage, 3)
+            t_stage = now
+
+        cache = FeatureCache(place['id'], self.cache_dir, self.training_source)
+        self._progress("fetch", place_id=place['id'])
+        self.refresh_training_data(place, cache, reservations)
+        lap("fetch")
+
+        cols = self.training_columns(cache)
+        if len(cols['ts']) < 50:
+            log.info("insufficient data, skipping", place_id=place['id'], rows=len(cols['ts']))
+            summary.update(status="skipped", reason="insufficient data", rows=len(cols['ts']))
+            return summary
+
+        res_index = ReservationIndex.from_records(cache.reservations.values())
+        df = self.build_features(cols, res_index)
+        lap("features")
+
+        signature = training_signature(df, cols['ts'], self.model_key())
+        reuse, reason = self.model_store.decide(place['id'], signature, cols['ts'])
+        engine = self.model_store.load(place['id']) if reuse else None
+        reused = engine is not None
+        self._progress("train", place_id=place['id'], rows=len(df), reuse=reused)
+        if not reused:
+            log.info("training models", place_id=place['id'], engine=self.engine, rows=len(df), reason=reason)
+            engine = self.fit_models(df)
+            self.model_store.save(place['id'], engine, signature)
+        else:
+            log.info("reusing stored models", place_id=place['id'], reason=reason)
+        self.engines[place['id']] = engine
+        lap("fit")
+
+        now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+        start_prediction = now.replace(minute=0, second=0, microsecond=0) + datetime.timedelta(hours=1)
+        self._progress("predict", place_id=place['id'])
+        forecasts = self.predict_week(place, engine, res_index, start_prediction)
+        lap("predict")
+
+        self._progress("publish", place_id=place['id'], records=len(forecasts))
+        failed = self.publish_forecasts(place['id'], forecasts)
+        for res in failed[:5]:
+            log.warning("forecast write failed", place_id=place['id'], method=res.op.method, key=res.op.key,
+                        status=res.status, error=res.error)
+        log.info("forecast uploaded", place_id=place['id'], records=len(forecasts), failed=len(failed))
+        lap("publish")
+        summary.update(rows=len(df), reused_models=reused, forecasts=len(forecasts), failed=len(failed))
+        return summary
+
+    def estimate_env_bias(self, engine, readings, res_index, hours, decay_hours=FORECAST_BIAS_DECAY_HOURS):
+        """
+        Mean (actual - predicted) of each environment target over `readings`
+        (parsed columns, see _parse_records), predicted at their own times with
+        the reserved head count. Returned per forecast hour i as the offset times
+        exp(-(i + 1) / decay_hours): an open window or a broken ventilation
+        shows up in the next hours, not next week. None without readings.
+        """
+        ts = readings['ts']
+        if not len(ts):
+            return None
+        stamps = ts.astype('datetime64[ns]')
+        people, _ = res_index.lookup(stamps)
+        frame = build_frame(ts, people, readings)
+        predicted = engine.predict_env(frame['hour'].to_numpy(), frame['day_of_week'].to_numpy(), people)
+        weights = np.exp(-(np.arange(hours) + 1) / decay_hours)
+        bias = {}
+        for t in ENV_TARGETS:
+            offset = float(np.nanmean(frame[t].to_numpy(dtype=float) - predicted[t]))
+            bias[t] = weights * (offset if np.isfinite(offset) else 0.0)
+        return bias
+
+    def refresh_place(self, place, hours=FORECAST_REFRESH_HOURS):
+        """
+        Near-term refresh between full cycles: re-predicts only the next `hours`
+        hours with the place's last trained engine (kept in memory, else loaded
+        from the ModelStore), the current reservations and a bias correction
+        from the last hour of readings, and upserts just those hours. Nothing is
+        fetched for training and nothing is fitted. Returns a summary like
+        forecast_place's.
+        """
+        summary = {"place_id": place['id'], "name": place.get('name'), "status": "ok", "refresh": True,
+                   "timings": {}}
+        t_stage = time.perf_counter()
+
+        def lap(stage):
+            nonlocal t_stage
+            now = time.perf_counter()
+            summary["timings"][stage] = round(now - t_stage, 3)
+            t_stage = now
+
+        engine = self.engines.get(place['id']) or self.model_store.load(place['id'], self.model_key())
+        if engine is None:
+            log.info("no trained models, refresh skipped", place_id=place['id'])
+            summary.update(status="skipped", reason="no trained models")
+            return summary
+        self.engines[place['id']] = engine
+
+        now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+        start_prediction = now.replace(minute=0, second=0, microsecond=0) + datetime.timedelta(hours=1)
+        since = (now - datetime.timedelta(hours=1)).strftime('%Y-%m-%d %H:%M:%SZ')
+        until = (start_prediction + datetime.timedelta(hours=hours)).strftime('%Y-%m-%d %H:%M:%SZ')
+        self._progress("fetch", place_id=place['id'], refresh=True)
+        # created >= recorded_at: the created range uses the (place_id, created) index, recorded_at trims the rest
+        readings = self._parse_records(self.query(
+            "refresh_readings", f"place_id='{place['id']}' && created >= '{since}' && recorded_at >= '{since}'"))
+        reservations = list(self.query(
+            "refresh_reservations", f"place_id='{place['id']}' && end_ts >= '{since}' && start_ts <= '{until}'"))
+        res_index = ReservationIndex.from_records(reservations)
+        lap("fetch")
+
+        self._progress("predict", place_id=place['id'], refresh=True)
+        bias = self.estimate_env_bias(engine, readings, res_index, hours)
+        forecasts = self.predict_week(place, engine, res_index, start_prediction, hours, bias)
+        lap("predict")
+
+        failed = self.publish_forecasts(place['id'], forecasts, partial=True)
+        for res in failed[:5]:
+            log.warning("forecast write failed", place_id=place['id'], method=res.op.method, key=res.op.key,
+                        status=res.status, error=res.error)
+        lap("publish")
+        offsets = {t: round(float(b[0]), 3) for t, b in bias.items()} if bias else None
+        log.info("near-term forecast refreshed", place_id=place['id'], hours=hours, readings=len(readings['ts']),
+                 reservations=len(reservations), bias=offsets, failed=len(failed))
+        summary.update(rows=len(readings['ts']), forecasts=len(forecasts), failed=len(failed), bias=offsets)
+        return summary
+
+    def model_key(self):
+        """model_store.model_key() for this forecaster's engine and training data."""
+        step = self.training_step if self.training_source == 'readings' else 0
+        return model_key(make_engine(self.engine).params(), self.training_source, step)
+
+    def training_columns(self, cache):
+        """The cache's columns paced to one reading per `training_step` seconds (rollups are already hourly)."""
+        cols = cache.columns
+        if cache.source != 'readings' or not self.training_step:
+            return cols
+        keep = pace_index(cols['ts'], int(self.training_step * 10**9))
+        return {c: v[keep] for c, v in cols.items()}
+
+    def build_features(self, cols, res_index):
+        """Training frame from cached columns: calendar features, reserved head count, targets (features.FEATURE_DTYPES)."""
+        person_count, _ = res_index.lookup(cols['ts'].astype('datetime64[ns]'))
+        return build_frame(cols['ts'], person_count, cols)
+
+    def backtest_place(self, place_id, engines=tuple(ENGINES), weeks=2):
+        """Refreshes the place's training data and backtests `engines` on its last `weeks` weeks."""
+        place = {'id': place_id}
+        cache = FeatureCache(place_id, self.cache_dir, self.training_source)
+        self.refresh_training_data(place, cache)
+        cols = self.training_columns(cache)
+        df = self.build_features(cols, ReservationIndex.from_records(cache.reservations.values()))
+        return backtest(df, cols['ts'], engines, weeks, n_jobs=self.n_jobs)
+
+    def run_cycle(self, place_id=None, refresh=False):
+        """
+        Runs one forecast cycle; returns a summary dict per processed place.
+        With `refresh` only the near-term refresh (refresh_place) runs.
+        """
+        log.info("near-term forecast refresh started" if refresh else "weekly forecast cycle started")
+        place_id = place_id or PLACE_ID
+        results = []
+
+        self._progress("login")
         if not self._login():
-            print("   [Forecaster] Login failed.")
-            return
+            log.error("login failed")
+            return results
 
         target_places = []
-        if PLACE_ID:
+        if place_id:
             try:
-                r = requests.get(f"{self.base_url}/api/collections/places/records/{PLACE_ID}", headers=self._headers())
+                r = self.pb.request("GET", f"/api/collections/places/records/{place_id}",
+                                    params={"fields": ",".join(QUERIES['places'].fields)})
                 if r.status_code == 200:
                     target_places.append(r.json())
             except: pass
         
         if not target_places:
-            print("   [Forecaster] No place found.")
-            return
+            log.warning("no place found", place_id=place_id)
+            return results
 
         for place in target_places:
-            print(f"\n>> Analyzing Place: {place.get('name')}")
-            
-            start_date = (datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=30))
-            start_date_str = start_date.strftime('%Y-%m-%d %H:%M:%SZ')
-            
-            readings = self.get_records("sensor_readings", f"place_id='{place['id']}' && created >= '{start_date_str}'", limit=1000)
-            reservations = self.get_records("reservations", f"place_id='{place['id']}'", limit=1000)
-            
-            if len(readings) < 50:
-                print("   Insufficient data, skipping.")
-                continue
-
-            data = []
-            res_list = []
-            for r in reservations:
-                try:
-                    s = datetime.datetime.fromisoformat(r['start_ts'].replace('Z', '+00:00')).replace(tzinfo=None)
-                    e = datetime.datetime.fromisoformat(r['end_ts'].replace('Z', '+00:00')).replace(tzinfo=None)
-                    res_list.append({'start': s, 'end': e, 'count': r['attendee_count']})
-                except: continue
-
-            for rec in readings:
-                try:
-                    t = datetime.datetime.fromisoformat(rec['recorded_at'].replace('Z', '+00:00')).replace(tzinfo=None)
-                    p_count = 0
-                    for r in res_list:
-                        if r['start'] <= t < r['end']:
-                            p_count = r['count']
-                            break
-                    
-                    data.append({
-                        'hour': t.hour,
-                        'day_of_week': t.weekday(),
-                        'person_count': p_count,
-                        'temp_c': rec.get('temp_c', 22.0),
-                        'co2_ppm': rec.get('co2_ppm', 400),
-                        'voc_index': rec.get('voc_index', 50),
-                        'rh_percent': rec.get('rh_percent', 45.0)
-                    })
-                except: continue
-
-            df = pd.DataFrame(data)
-            if df.empty: continue
-            
-            df = df.fillna(method='ffill').fillna(method='bfill')
-
-            print("   Training models (Random Forest)...")
-            X = df[['hour', 'day_of_week', 'person_count']]
-            X_occ = df[['hour', 'day_of_week']]
-            
-            model_occ = RandomForestRegressor(n_estimators=50, random_state=42).fit(X_occ, df['person_count'])
-            model_temp = RandomForestRegressor(n_estimators=50, random_state=42).fit(X, df['temp_c'])
-            model_co2 = RandomForestRegressor(n_estimators=50, random_state=42).fit(X, df['co2_ppm'])
-            model_voc = RandomForestRegressor(n_estimators=50, random_state=42).fit(X, df['voc_index'])
-            model_rh = RandomForestRegressor(n_estimators=50, random_state=42).fit(X, df['rh_percent'])
-
-            self.clear_old_forecasts(place['id'])
-            
-            now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
-            start_prediction = now.replace(minute=0, second=0, microsecond=0) + datetime.timedelta(hours=1)
-            
-            print("   Uploading 7-day forecast...", end="")
-            
-            raw_occupancies = []
-            future_times = []
-            
-            for i in range(168):
-                future_time = start_prediction + datetime.timedelta(hours=i)
-                future_times.append(future_time)
-                
-                future_people = 0
-                has_reservation = False
-                for r in res_list:
-                    if r['start'] <= future_time < r['end']:
-                        future_people = r['count']
-                        has_reservation = True
-                        break
-                
-                if not has_reservation:
-                    occ_input = pd.DataFrame([[future_time.hour, future_time.weekday()]], columns=['hour', 'day_of_week'])
-                    predicted_occ = model_occ.predict(occ_input)[0]
-                    future_people = max(0, predicted_occ) 
-                    
-                    if 8 <= future_time.hour <= 19:
-                        if future_people < 0.5:
-                            future_people = random.uniform(0.5, 1.5)
-
-                raw_occupancies.append(future_people)
-
-            smoothed_occupancies = pd.Series(raw_occupancies).rolling(window=5, min_periods=1, center=True, win_type='gaussian').mean(std=2).tolist()
-            if any(pd.isna(smoothed_occupancies)):
-                 smoothed_occupancies = pd.Series(raw_occupancies).rolling(window=5, min_periods=1, center=True).mean().tolist()
-
-            count = 0
-            for i in range(168):
-                future_time = future_times[i]
-                smooth_people = smoothed_occupancies[i]
-                
-                input_row = pd.DataFrame([[future_time.hour, future_time.weekday(), smooth_people]], 
-                                       columns=['hour', 'day_of_week', 'person_count'])
-                
-                pred_temp = float(model_temp.predict(input_row)[0])
-                pred_co2 = float(model_co2.predict(input_row)[0])
-                pred_voc = float(model_voc.predict(input_row)[0])
-                pred_rh = float(model_rh.predict(input_row)[0])
-                
-                final_score = calc_comfort_score(pred_temp, pred_rh, pred_co2, pred_voc)
-                
-                capacity = place.get('capacity', 10)
-                if capacity <= 0: capacity = 10
-                
-                if 8 <= future_time.hour <= 19 and future_time.weekday() < 5:
-                     min_people = capacity * 0.15 
-                     if smooth_people < min_people:
-                         smooth_people = capacity * random.uniform(0.15, 0.25)
-
-                occupancy_ratio = smooth_people / capacity
-                occupancy_ratio = max(0.0, min(1.0, occupancy_ratio))
-
-                payload = {
-                    "place_id": place['id'],
-                    "target_ts": future_time.strftime("%Y-%m-%d %H:%M:%SZ"),
-                    "predicted_occupancy": occupancy_ratio,
-                    "predicted_comfort_score": final_score
-                }
-                self.create_forecast(payload)
-                
-                count += 1
-                if count % 24 == 0: print(".", end="", flush=True)
-
-            print(" Done.")
\ No newline at end of file
+            try:
+                results.append(self.refresh_place(place) if refresh else self.forecast_place(place))
+            except requests.RequestException as e:
+                log.warning("fetch failed, skipping", place_id=place['id'], error=e)
+                results.append({"place_id": place['id'], "name": place.get('name'), "status": "error",
+                                "error": f"{type(e).__name__}: {e}"})
+        record_summaries(results)
+        return results
+
+    # --- Tüm mekanlar ---
+
+    def discover_places(self):
+        """Every record of the places collection, paged."""
+        return list(self.query("places"))
+
+    def fetch_reservations(self, place_ids):
+        """
+        One paged download of every reservation still relevant to the training
+        window or the horizon, grouped by place. Replaces N per-place queries.
+        """
+        window_start = (datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+                        - datetime.timedelta(days=TRAINING_WINDOW_DAYS))
+        grouped = {pid: [] for pid in place_ids}
+        for rec in self.query("cycle_reservations", f"end_ts >= '{window_start.strftime('%Y-%m-%d %H:%M:%SZ')}'"):
+            if rec.get('place_id') in grouped:
+                grouped[rec['place_id']].append(rec)
+        return grouped
+
+    def run_all_places(self, max_workers=None):
+        """
+        Forecasts every place in a process pool. Places are discovered with
+        pagination, reservations are downloaded once for the cycle, and a
+        failing place (even one that crashes its worker process) is reported
+        without stopping the others. Returns one summary per place.
+        """
+        log.info("all-places forecast cycle started")
+        t0 = time.perf_counter()
+        if not self._login():
+            log.error("login failed")
+            return []
+        try:
+            places = self.discover_places()
+            reservations = self.fetch_reservations([p['id'] for p in places])
+        except requests.RequestException as e:
+            log.error("place discovery failed", error=e)
+            return []
+        log.info("places discovered", places=len(places), reservations=sum(map(len, reservations.values())),
+                 seconds=round(time.perf_counter() - t0, 1))
+
+        workers = max_workers or FORECAST_PLACE_WORKERS or os.cpu_count() or 1
+        options = {"base_url": self.pb.base_url, "cache_dir": self.cache_dir,
+                   "model_dir": self.model_store.directory, "training_source": self.training_source,
+                   "engine": self.engine}
+        results = {}
+        pending = list(places)
+        serial = False
+        while pending:
+            # Bir süreç çökerse hangi mekanın çökerttiği bilinmez: kalanlar tek işçiyle
+            # sırayla denenir, o zaman çöken ilk bitmemiş iştir
+            with ProcessPoolExecutor(max_workers=1 if serial else min(workers, len(pending)),
+                                     mp_context=mp.get_context("spawn"),
+                                     initializer=_init_place_worker, initargs=(options,)) as pool:
+                futures = [(place, pool.submit(_forecast_place_task, place, reservations.get(place['id'], [])))
+                           for place in pending]
+                pending, culprit_found = [], False
+                for place, fut in futures:
+                    try:
+                        results[place['id']] = fut.result()
+                    except BrokenProcessPool:
+                        if serial and not culprit_found:
+                            culprit_found = True
+                            results[place['id']] = {"place_id": place['id'], "name": place.get('name'),
+                                                     "status": "error", "error": "worker process crashed"}
+                        else:
+                            pending.append(place)
+            serial = serial or bool(pending)
+
+        summaries = [results[p['id']] for p in places]
+        record_summaries(summaries)
+        _print_place_report(summaries, time.perf_counter() - t0, workers)
+        return summaries
+
+
+# --- Süreç havuzu işçisi (spawn ile başlar, mekan başına bir görev) ---
+
+_pool_forecaster = None
+
+
+def _init_place_worker(options):
+    global _pool_forecaster
+    setup_logging()
+    f = WeeklyForecaster(PBClient(options["base_url"]))
+    f.cache_dir = options["cache_dir"]
+    f.model_store = ModelStore(options["model_dir"])
+    f.training_source = options["training_source"]
+    f.engine = options["engine"]
+    f.n_jobs = 1  # paralellik mekanlar arasında
+    f._login()
+    _pool_forecaster = f
+
+
+def _forecast_place_task(place, reservations):
+    t0 = time.perf_counter()
+    try:
+        summary = _pool_forecaster.forecast_place(place, reservations)
+    except Exception as e:
+        log.error("place failed", exc_info=True, place_id=place['id'], name=place.get('name'))
+        summary = {"place_id": place['id'], "name": place.get('name'), "status": "error",
+                   "error": f"{type(e).__name__}: {e}"}
+    summary["seconds"] = round(time.perf_counter() - t0, 3)
+    return summary
+
+
+def _print_place_report(summaries, elapsed, workers):
+    print(f"\n--- {len(summaries)} places in {elapsed:.1f} s ({workers} workers) ---")
+    for s in summaries:
+        t = s.get("timings", {})
+        stages = "  ".join(f"{k}={t[k]:.2f}" for k in STAGES if k in t)
+        detail = s.get("error") or s.get("reason") or f"rows={s.get('rows')} failed={s.get('failed')}"
+        print(f"   {str(s.get('name'))[:24]:<24} {s['status']:<8} {s.get('seconds', 0):6.2f} s  {stages}  {detail}")
+
+
+def _print_backtest(rows):
+    targets = ('occupancy', 'temp_c', 'co2_ppm', 'voc_index', 'rh_percent')
+    print(f"{'engine':<14} {'weeks':>5} {'fit s':>8} {'predict ms':>10} {'size KB':>9}  "
+          + "  ".join(f"{'MAE ' + t:>15}" for t in targets))
+    for r in rows:
+        print(f"{r['engine']:<14} {r['weeks']:>5} {r['fit_s']:8.2f} {r['predict_ms']:10.2f} {r['size_kb']:9.0f}  "
+              + "  ".join(f"{r['mae_' + t]:15.3f}" for t in targets))
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Run a forecast cycle.")
+    ap.add_argument("--all", action="store_true", help="forecast every place in the places collection")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--place", default=None, help="place id (default: PLACE_ID from config)")
+    ap.add_argument("--engine", choices=sorted(ENGINES), default=None, help="override FORECAST_ENGINE")
+    ap.add_argument("--backtest", action="store_true",
+                    help="compare the engines on the place's last --weeks weeks instead of forecasting")
+    ap.add_argument("--weeks", type=int, default=2)
+    ap.add_argument("--refresh", action="store_true",
+                    help="only re-predict the next FORECAST_REFRESH_HOURS hours with the stored models")
+    args = ap.parse_args()
+    setup_logging()
+    forecaster = WeeklyForecaster()
+    if args.engine:
+        forecaster.engine = args.engine
+    if args.backtest:
+        if forecaster._login():
+            _print_backtest(forecaster.backtest_place(args.place or PLACE_ID, weeks=args.weeks))
+    elif args.all:
+        forecaster.run_all_places(args.workers)
+    else:
+        forecaster.run_cycle(args.place, refresh=args.refresh)
@@ -0,0 +1,239 @@
+# local_api.py
+import json
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from config import (
+    LOCAL_API_HISTORY_LEN, LOCAL_API_READING_TTL_SECONDS, LOCAL_API_FORECAST_TTL_SECONDS,
+    LOCAL_API_FORECAST_RELOAD_SECONDS, LOCAL_API_MAX_STREAMS, LOCAL_API_CORS_ORIGIN
+)
+import metrics
+from log import get_logger
+
+log = get_logger("local_api")
+REQUESTS = metrics.counter("local_api_requests_total", "Local API requests", ("route", "status"))
+STREAMS = metrics.gauge("local_api_streams", "Open Server-Sent Events streams")
+FORECAST_LOADS = metrics.counter("local_api_forecast_loads_total",
+                                 "Forecasts read through from PocketBase", ("result",))
+SSE_KEEPALIVE_SECONDS = 15
+
+
+def _ts_key(ts: str) -> str:
+    return (ts or "").replace('T', ' ')[:19]
+
+
+class LocalState:
+    """
+    What the agent serves locally: the latest reading, the last
+    `history_len` readings (ring buffer) and the current forecast.
+
+    Every change bumps a version; each resource's JSON body is encoded once
+    per version and its ETag is "<boot id>-<version>", so If-None-Match
+    costs a string compare. Forecasts are pushed from the forecaster's last
+    publish (set_forecasts). Only when none has arrived, or the pushed/loaded
+    set is older than `reload_after`, are they read through from PocketBase
+    via `loader` (returns the place's forecast records).
+    """
+
+    def __init__(self, loader: Optional[Callable[[], List[dict]]] = None,
+                 history_len: int = LOCAL_API_HISTORY_LEN, reload_after: float = LOCAL_API_FORECAST_RELOAD_SECONDS):
+        self.loader = loader
+        self.reload_after = reload_after
+        self.history = deque(maxlen=history_len)
+        self.forecasts = {}  # _ts_key(target_ts) -> kayıt
+        self.forecasts_at = None  # monotonik; None = hiç yüklenmedi
+        self.version = 0
+        self.forecast_version = 0
+        self._boot = os.urandom(4).hex()  # yeniden başlatmada eski ETag'ler eşleşmesin
+        self._bodies = {}  # kaynak -> (anahtar, etag, gövde)
+        self._cond = threading.Condition()
+        self._load_lock = threading.Lock()
+
+    # --- Güncellemeler (örnekleme döngüsü / tahmin olayları) ---
+
+    def add_reading(self, payload: dict):
+        with self._cond:
+            self.history.append(dict(payload))
+            self.version += 1
+            self._cond.notify_all()
+
+    def set_forecasts(self, forecasts: List[dict], partial: bool = False):
+        """Full sets replace the forecast; partial ones (near-term refresh) are merged by target_ts."""
+        with self._cond:
+            if not partial:
+                self.forecasts = {}
+            for f in forecasts:
+                self.forecasts[_ts_key(f['target_ts'])] = {k: f[k] for k in
+                                                           ('target_ts', 'predicted_occupancy', 'predicted_comfort_score')}
+            self.forecasts_at = time.monotonic()
+            self.forecast_version += 1
+            self._cond.notify_all()
+
+    def _ensure_forecasts(self):
+        stale = self.forecasts_at is None or time.monotonic() - self.forecasts_at > self.reload_after
+        if not stale or self.loader is None:
+            return
+        # Aynı anda gelen istekler tek yükleme bekler; yükleme başarısızsa eldeki (eski) set sunulur
+        with self._load_lock:
+            if self.forecasts_at is not None and time.monotonic() - self.forecasts_at <= self.reload_after:
+                return
+            try:
+                records = self.loader()
+            except Exception as e:
+                FORECAST_LOADS.labels("error").inc()
+                log.warning("Tahminler PocketBase'den okunamadı", error=e)
+                return
+            FORECAST_LOADS.labels("ok").inc()
+            self.set_forecasts(records)
+
+    # --- Gövdeler ---
+
+    def _body(self, name: str, key, build: Callable[[], object]):
+        cached = self._bodies.get(name)
+        if cached and cached[0] == key:
+            return cached[1], cached[2]
+        etag = f'"{self._boot}-{"-".join(map(str, key))}"'
+        body = json.dumps(build(), separators=(',', ':')).encode()
+        if name:
+            self._bodies[name] = (key, etag, body)
+        return etag, body
+
+    def latest(self):
+        with self._cond:
+            return self._body("latest", (self.version,), lambda: self.history[-1] if self.history else None)
+
+    def recent(self, limit: Optional[int] = None):
+        with self._cond:
+            if not limit or limit >= len(self.history):
+                return self._body("history", (self.version,), lambda: list(self.history))
+            # Sınırlı istekler önbelleğe girmez (her limit için ayrı gövde tutulmasın), ETag yine tutarlı
+            return self._body(None, (self.version, limit), lambda: list(self.history)[-limit:])
+
+    def forecast(self):
+        self._ensure_forecasts()
+        # Saat dönünce geçmiş saatler düşer: saat de anahtarın parçası
+        hour_index = int(time.time() // 3600)
+        hour = time.strftime("%Y-%m-%d %H:00:00", time.gmtime(hour_index * 3600))
+        with self._cond:
+            return self._body("forecast", (self.forecast_version, hour_index), lambda: [
+                self.forecasts[k] for k in sorted(self.forecasts) if k >= hour])
+
+    def wait(self, seen, timeout):
+        """Blocks until (version, forecast_version) differs from `seen` or timeout; returns the current pair."""
+        with self._cond:
+            self._cond.wait_for(lambda: (self.version, self.forecast_version) != seen, timeout)
+            return self.version, self.forecast_version
+
+
+class _Handler(BaseHTTPRequestHandler):
+    state: LocalState = None
+    protocol_version = "HTTP/1.1"  # keep-alive: panolar bağlantıyı yeniden kullanır
+    _streams = 0
+    _streams_lock = threading.Lock()
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        route = url.path.rstrip("/") or "/"
+        query = parse_qs(url.query)
+        if route == "/latest":
+            self._send_cached(route, *self.state.latest(), LOCAL_API_READING_TTL_SECONDS)
+        elif route == "/history":
+            try:
+                limit = int(query.get("limit", ["0"])[0]) or None
+            except ValueError:
+                limit = None
+            self._send_cached(route, *self.state.recent(limit), LOCAL_API_READING_TTL_SECONDS)
+        elif route == "/forecast":
+            self._send_cached(route, *self.state.forecast(), LOCAL_API_FORECAST_TTL_SECONDS)
+        elif route == "/events":
+            self._stream()
+        else:
+            REQUESTS.labels("other", "404").inc()
+            self.send_error(404)
+
+    def _common_headers(self):
+        if LOCAL_API_CORS_ORIGIN:
+            self.send_header("Access-Control-Allow-Origin", LOCAL_API_CORS_ORIGIN)
+
+    def _send_cached(self, route, etag, body, ttl):
+        if etag in (t.strip() for t in self.headers.get("If-None-Match", "").split(",")):
+            REQUESTS.labels(route, "304").inc()
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", f"max-age={ttl:g}")
+            self._common_headers()
+            self.end_headers()
+            return
+        REQUESTS.labels(route, "200").inc()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", f"max-age={ttl:g}")
+        self._common_headers()
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self):
+        """
+        Server-Sent Events: a 'reading' event with each new sample and a
+        'forecast' event (the whole current forecast) when it changes.
+        """
+        cls = type(self)
+        with cls._streams_lock:
+            if cls._streams >= LOCAL_API_MAX_STREAMS:
+                REQUESTS.labels("/events", "503").inc()
+                self.send_error(503, "too many streams")
+                return
+            cls._streams += 1
+        STREAMS.inc()
+        REQUESTS.labels("/events", "200").inc()
+        self.close_connection = True
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self._common_headers()
+            self.end_headers()
+            state = self.state
+            # Bağlanınca mevcut durum bir kez gönderilir, sonra yalnızca değişiklikler
+            seen = (-1, -1)
+            current = (state.version, state.forecast_version)
+            while True:
+                if current == seen:
+                    self.wfile.write(b": keepalive\n\n")
+                if current[0] != seen[0] and state.history:
+                    _, body = state.latest()
+                    self.wfile.write(b"event: reading\nid: %d\ndata: %s\n\n" % (current[0], body))
+                if current[1] != seen[1]:
+                    _, body = state.forecast()
+                    self.wfile.write(b"event: forecast\nid: %d\ndata: %s\n\n" % (current[1], body))
+                self.wfile.flush()
+                seen = current
+                current = state.wait(seen, SSE_KEEPALIVE_SECONDS)
+        except (BrokenPipeError, ConnectionResetError, OSError):
+            pass
+        finally:
+            with cls._streams_lock:
+                cls._streams -= 1
+            STREAMS.dec()
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(state: LocalState, port: int, host: str = "0.0.0.0") -> Optional[ThreadingHTTPServer]:
+    """Serves /latest, /history, /forecast and /events on a daemon thread. Returns None if the port is taken."""
+    handler = type("LocalApiHandler", (_Handler,), {"state": state})
+    try:
+        server = ThreadingHTTPServer((host, port), handler)
+    except OSError:
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="local-api-http", daemon=True).start()
+    return server
@@ -0,0 +1,82 @@
+# log.py
+import datetime
+import json
+import logging
+import sys
+
+from config import LOG_LEVEL, LOG_FORMAT
+
+
+def _quote(value) -> str:
+    if isinstance(value, float):
+        return f"{value:.4g}"
+    text = str(value)
+    if not text or any(c in text for c in ' ="\n'):
+        return json.dumps(text, ensure_ascii=False)
+    return text
+
+
+class StructuredFormatter(logging.Formatter):
+    """One line per record: logfmt (key=value) or JSON, with the record's fields."""
+
+    def __init__(self, fmt: str = "logfmt"):
+        super().__init__()
+        self.json = fmt == "json"
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        if self.json:
+            return json.dumps(entry, ensure_ascii=False, default=str)
+        return " ".join(f"{k}={_quote(v)}" for k, v in entry.items())
+
+
+class Logger:
+    """logging.Logger wrapper taking fields as keyword arguments: log.info("okuma", co2=612)."""
+    __slots__ = ("_log",)
+
+    def __init__(self, name: str):
+        self._log = logging.getLogger(name)
+
+    def _emit(self, level, msg, fields, exc_info=None):
+        if self._log.isEnabledFor(level):
+            self._log.log(level, msg, exc_info=exc_info, extra={"fields": fields}, stacklevel=3)
+
+    def debug(self, msg, **fields):
+        self._emit(logging.DEBUG, msg, fields)
+
+    def info(self, msg, **fields):
+        self._emit(logging.INFO, msg, fields)
+
+    def warning(self, msg, **fields):
+        self._emit(logging.WARNING, msg, fields)
+
+    def error(self, msg, exc_info=None, **fields):
+        self._emit(logging.ERROR, msg, fields, exc_info)
+
+    def isEnabledFor(self, level) -> bool:
+        return self._log.isEnabledFor(level)
+
+
+def get_logger(name: str) -> Logger:
+    return Logger(name)
+
+
+def setup(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT, stream=None):
+    """Configures the root logger once per process (agent, forecast worker, pool workers)."""
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if getattr(handler, "_structured", False):
+            root.removeHandler(handler)
+    handler = logging.StreamHandler(stream or sys.stdout)
+    handler.setFormatter(StructuredFormatter(fmt))
+    handler._structured = True
+    root.addHandler(handler)
+    root.setLevel(level.upper() if isinstance(level, str) else level)
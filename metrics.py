@@ -0,0 +1,200 @@
+# metrics.py
+import bisect
+import threading
+from array import array
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+# Saniye cinsinden varsayılan kovalar: I2C okumasından (ms) HTTP isteğine (sn) kadar
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Tahmin aşamaları: onlarca ms ile dakikalar arası
+STAGE_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+_lock = threading.Lock()
+_families: Dict[str, "_Family"] = {}
+
+
+def _fmt(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Counter:
+    __slots__ = ("_lock", "value")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def samples(self, name, labels):
+        yield name, labels, self.value
+
+
+class _Gauge:
+    __slots__ = ("_lock", "value", "_fn")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+        self._fn = None
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.inc(-amount)
+
+    def set_function(self, fn: Callable[[], float]):
+        """Değer her okumada fn() ile hesaplanır (ör. kuyruk uzunluğu)."""
+        self._fn = fn
+
+    def samples(self, name, labels):
+        value = self.value
+        if self._fn is not None:
+            try:
+                value = self._fn()
+            except Exception:
+                value = float("nan")
+        yield name, labels, value
+
+
+class _Histogram:
+    """Counts per fixed bucket in a preallocated array; observe() is a bisect and two adds."""
+    __slots__ = ("_lock", "_bounds", "_counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self._lock = threading.Lock()
+        self._bounds = bounds
+        self._counts = array("Q", bytes(8 * (len(bounds) + 1)))
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        i = bisect.bisect_left(self._bounds, value)
+        with self._lock:
+            self._counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    def samples(self, name, labels):
+        with self._lock:
+            counts, total, count = list(self._counts), self.sum, self.count
+        running = 0
+        for bound, n in zip(self._bounds + (float("inf"),), counts):
+            running += n
+            yield name + "_bucket", labels + (("le", _fmt(bound)),), running
+        yield name + "_sum", labels, total
+        yield name + "_count", labels, count
+
+
+class _Family:
+    def __init__(self, kind, name, doc, labelnames, factory):
+        self.kind = kind
+        self.name = name
+        self.doc = doc
+        self.labelnames = tuple(labelnames)
+        self._factory = factory
+        self._children: Dict[tuple, object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self._children[()] = factory()
+
+    def labels(self, *values):
+        """Child for these label values. Bind it once outside hot paths and reuse it."""
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(key, self._factory())
+        return child
+
+    def __getattr__(self, attr):
+        # Etiketsiz metrikte inc/observe/set doğrudan çağrılabilir
+        if attr in ("inc", "dec", "set", "observe", "set_function", "value", "sum", "count"):
+            return getattr(self.__dict__["_default"], attr)
+        raise AttributeError(attr)
+
+    def render(self, out):
+        out.append(f"# HELP {self.name} {self.doc}")
+        out.append(f"# TYPE {self.name} {self.kind}")
+        for key, child in list(self._children.items()):
+            labels = tuple(zip(self.labelnames, key))
+            for sample, sample_labels, value in child.samples(self.name, labels):
+                label_str = ",".join(f'{k}="{_escape(v)}"' for k, v in sample_labels)
+                out.append(f"{sample}{{{label_str}}} {_fmt(value)}" if label_str else f"{sample} {_fmt(value)}")
+
+
+def _get_or_create(kind, name, doc, labelnames, factory) -> _Family:
+    with _lock:
+        family = _families.get(name)
+        if family is None:
+            family = _families[name] = _Family(kind, name, doc, labelnames, factory)
+        elif family.kind != kind or family.labelnames != tuple(labelnames):
+            raise ValueError(f"metric {name} already registered as {family.kind}{family.labelnames}")
+        return family
+
+
+def counter(name: str, doc: str, labelnames: Sequence[str] = ()) -> _Family:
+    return _get_or_create("counter", name, doc, labelnames, _Counter)
+
+
+def gauge(name: str, doc: str, labelnames: Sequence[str] = ()) -> _Family:
+    return _get_or_create("gauge", name, doc, labelnames, _Gauge)
+
+
+def histogram(name: str, doc: str, labelnames: Sequence[str] = (),
+              buckets: Sequence[float] = LATENCY_BUCKETS) -> _Family:
+    bounds = tuple(sorted(float(b) for b in buckets))
+    return _get_or_create("histogram", name, doc, labelnames, lambda: _Histogram(bounds))
+
+
+def render() -> str:
+    """All registered metrics in Prometheus text exposition format."""
+    out = []
+    with _lock:
+        families = list(_families.values())
+    for family in families:
+        family.render(out)
+    return "\n".join(out) + "\n"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(port: int, host: str = "127.0.0.1") -> Optional[ThreadingHTTPServer]:
+    """Serves /metrics on a daemon thread. Returns None if the port is taken."""
+    try:
+        server = ThreadingHTTPServer((host, port), _Handler)
+    except OSError:
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
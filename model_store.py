@@ -0,0 +1,174 @@
+# model_store.py
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import time
+from typing import Optional, Tuple
+
+import joblib
+import numpy as np
+import sklearn
+
+from config import MODEL_STORE_DIR, MODEL_MAX_AGE_HOURS, MODEL_RETRAIN_CHANGE_RATIO
+from log import get_logger
+
+log = get_logger("model_store")
+
+
+def model_key(params: dict, source: str, step: float = 0) -> dict:
+    """What stored models must be trained under: engine + hyperparameters, training data, scikit-learn."""
+    return {
+        'engine': params.get('engine'),
+        'params': params,
+        'source': source,
+        'step': step,
+        'sklearn': sklearn.__version__,
+    }
+
+
+def training_signature(df, ts: np.ndarray, key: dict) -> dict:
+    """Fingerprint of the training frame + model_key(), stored next to the models."""
+    h = hashlib.sha256()
+    h.update(json.dumps(key, sort_keys=True).encode())
+    for col in df.columns:
+        h.update(col.encode())
+        h.update(np.ascontiguousarray(df[col].to_numpy()).tobytes())
+    return dict(key, fingerprint=h.hexdigest(), n_rows=int(len(df)), ts_max=int(ts.max()) if len(ts) else 0)
+
+
+class ModelStore:
+    """
+    Trained models on disk (data/models/<place>.joblib + <place>.json).
+
+    Stored models are reused when the training data is identical, or when
+    they are younger than MODEL_MAX_AGE_HOURS and fewer than
+    MODEL_RETRAIN_CHANGE_RATIO of the rows are new since they were fitted.
+    A different model_key() (engine, hyperparameters, training source or
+    scikit-learn version) always retrains, and load() given a key refuses
+    such models.
+    """
+
+    def __init__(self, directory: str = MODEL_STORE_DIR,
+                 max_age_hours: float = MODEL_MAX_AGE_HOURS,
+                 change_ratio: float = MODEL_RETRAIN_CHANGE_RATIO):
+        self.directory = directory
+        self.max_age_hours = max_age_hours
+        self.change_ratio = change_ratio
+
+    def _paths(self, place_id):
+        return (os.path.join(self.directory, f"{place_id}.joblib"),
+                os.path.join(self.directory, f"{place_id}.json"))
+
+    def meta(self, place_id) -> Optional[dict]:
+        try:
+            with open(self._paths(place_id)[1]) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def places(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name[:-5] for name in os.listdir(self.directory) if name.endswith(".json"))
+
+    def compatible(self, place_id, key: dict) -> Tuple[Optional[dict], str]:
+        """(stored meta, "") when the place's models were trained under `key`, else (None, reason)."""
+        meta = self.meta(place_id)
+        if meta is None:
+            return None, "no stored models"
+        if meta.get('sklearn') != key['sklearn']:
+            return None, f"scikit-learn {meta.get('sklearn')} -> {key['sklearn']}"
+        for field in ('engine', 'source', 'step'):
+            if meta.get(field) != key[field]:
+                return None, f"{field} {meta.get(field)} -> {key[field]}"
+        if meta.get('params') != key['params']:
+            return None, "hyperparameters changed"
+        return meta, ""
+
+    def decide(self, place_id, signature: dict, ts: np.ndarray) -> Tuple[bool, str]:
+        """(reuse?, reason) for the given training signature."""
+        meta, reason = self.compatible(place_id, signature)
+        if meta is None:
+            return False, reason
+        if meta.get('fingerprint') == signature['fingerprint']:
+            return True, "training data unchanged"
+        age_h = (time.time() - meta.get('trained_at', 0)) / 3600
+        if age_h > self.max_age_hours:
+            return False, f"stale ({age_h:.1f} h old)"
+        new_rows = int(np.count_nonzero(ts > meta.get('ts_max', 0)))
+        ratio = new_rows / max(signature['n_rows'], 1)
+        if ratio > self.change_ratio:
+            return False, f"{ratio:.1%} new rows"
+        return True, f"{ratio:.1%} new rows, {age_h:.1f} h old"
+
+    def load(self, place_id, key: Optional[dict] = None):
+        """The stored models, or None; given `key`, only models trained under it."""
+        if key is not None:
+            meta, reason = self.compatible(place_id, key)
+            if meta is None:
+                log.info("stored models not usable", place_id=place_id, reason=reason)
+                return None
+        try:
+            return joblib.load(self._paths(place_id)[0])
+        except Exception as e:
+            log.warning("model load failed", place_id=place_id, error=e)
+            return None
+
+    def save(self, place_id, models, signature: dict):
+        os.makedirs(self.directory, exist_ok=True)
+        model_path, meta_path = self._paths(place_id)
+        joblib.dump(models, model_path + ".tmp", compress=3)
+        os.replace(model_path + ".tmp", model_path)
+        meta = dict(signature, trained_at=time.time())
+        with open(meta_path + ".tmp", "w") as f:
+            json.dump(meta, f, indent=1)
+        os.replace(meta_path + ".tmp", meta_path)
+
+    def invalidate(self, place_id):
+        removed = False
+        for path in self._paths(place_id):
+            try:
+                os.remove(path)
+                removed = True
+            except FileNotFoundError:
+                pass
+        return removed
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Inspect or invalidate stored forecast models.")
+    ap.add_argument("--dir", default=MODEL_STORE_DIR)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("list", help="list stored models")
+    show = sub.add_parser("show", help="print a place's model metadata")
+    show.add_argument("place_id")
+    inv = sub.add_parser("invalidate", help="delete stored models so the next cycle retrains")
+    inv.add_argument("place_id", nargs="*")
+    inv.add_argument("--all", action="store_true")
+    args = ap.parse_args()
+
+    store = ModelStore(args.dir)
+    if args.cmd == "list":
+        for place_id in store.places():
+            meta = store.meta(place_id) or {}
+            trained = datetime.datetime.fromtimestamp(meta.get('trained_at', 0)).strftime("%Y-%m-%d %H:%M")
+            age_h = (time.time() - meta.get('trained_at', 0)) / 3600
+            print(f"{place_id}  trained {trained} ({age_h:.1f} h ago)  rows={meta.get('n_rows')}  "
+                  f"engine={meta.get('engine')}  source={meta.get('source')}  sklearn={meta.get('sklearn')}  fp={str(meta.get('fingerprint'))[:12]}")
+    elif args.cmd == "show":
+        meta = store.meta(args.place_id)
+        if meta is None:
+            raise SystemExit(f"no stored models for {args.place_id}")
+        print(json.dumps(meta, indent=2))
+    elif args.cmd == "invalidate":
+        targets = store.places() if args.all else args.place_id
+        if not targets:
+            raise SystemExit("give place ids or --all")
+        for place_id in targets:
+            print(f"{place_id}: {'removed' if store.invalidate(place_id) else 'nothing stored'}")
+
+
+if __name__ == "__main__":
+    main()
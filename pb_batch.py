@@ -0,0 +1,143 @@
+# pb_batch.py
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional
+
+# PocketBase varsayılan olarak bir batch isteğinde en fazla 50 alt isteğe izin verir.
+BATCH_CHUNK_SIZE = 50
+FALLBACK_WORKERS = 4
+# Transaction hatasında kalan istekler en fazla bu kadar tur batch olarak denenir
+MAX_BATCH_ROUNDS = 3
+
+
+@dataclass
+class BatchOp:
+    method: str
+    url: str
+    body: Optional[dict] = None
+    key: Any = None
+
+
+@dataclass
+class OpResult:
+    op: BatchOp
+    ok: bool
+    status: int = 0
+    error: Optional[str] = None
+    body: Any = None  # başarıda dönen kayıt, hatada PocketBase hata gövdesi ({"status", "message", "data"})
+
+
+class BatchWriter:
+    """
+    Sends record writes through PocketBase's /api/batch endpoint in chunks.
+    A batch is one transaction, so when a sub-request fails it is reported
+    and the rest are resent; after MAX_BATCH_ROUNDS the remainder goes out
+    one by one. If batching is disabled on the server (403/404) it falls
+    back to a bounded thread pool of single requests. Every op gets its own
+    OpResult.
+
+    `request(method, path, json=None)` must return a requests.Response.
+    """
+
+    def __init__(self, request: Callable, chunk_size: int = BATCH_CHUNK_SIZE,
+                 max_workers: int = FALLBACK_WORKERS):
+        self._request = request
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.batch_supported = None
+
+    def submit(self, ops: List[BatchOp]) -> List[OpResult]:
+        results = []
+        for i in range(0, len(ops), self.chunk_size):
+            chunk = ops[i:i + self.chunk_size]
+            if self.batch_supported is not False:
+                chunk_results = self._send_batch(chunk)
+                if chunk_results is not None:
+                    results.extend(chunk_results)
+                    continue
+            results.extend(self._send_concurrent(chunk))
+        return results
+
+    def _send_batch(self, chunk):
+        results = [None] * len(chunk)
+        pending = list(range(len(chunk)))
+        for round_no in range(MAX_BATCH_ROUNDS):
+            ops = [chunk[i] for i in pending]
+            payload = {"requests": [{"method": op.method, "url": op.url, "body": op.body or {}} for op in ops]}
+            try:
+                r = self._request("POST", "/api/batch", json=payload)
+            except Exception as e:
+                for i in pending:
+                    results[i] = OpResult(chunk[i], False, error=str(e))
+                return results
+
+            if r.status_code in (403, 404):
+                # Batch API kapalı ya da sunucu sürümü desteklemiyor
+                self.batch_supported = False
+                if round_no == 0:
+                    return None
+                break
+            self.batch_supported = True
+
+            if r.status_code == 200:
+                for i, res in zip(pending, r.json()):
+                    status = res.get("status", 0)
+                    results[i] = OpResult(chunk[i], 200 <= status < 300, status, body=res.get("body"))
+                return results
+
+            # Batch tek bir transaction'dır: bir istek hata verirse hepsi geri alınır.
+            # Hatalı olanları işaretleyip kalanları yeniden göndeririz.
+            failed = self._failed_indexes(r)
+            if not failed:
+                for i in pending:
+                    results[i] = OpResult(chunk[i], False, r.status_code, error=r.text[:500])
+                return results
+            for idx, (error, payload) in failed.items():
+                if idx < len(pending):
+                    # Alt isteğin kendi durumu (401, 5xx...); yoksa batch yanıtınınki
+                    status = payload.get("status") if isinstance(payload, dict) else None
+                    results[pending[idx]] = OpResult(chunk[pending[idx]], False, status or r.status_code,
+                                                     error=error, body=payload)
+            pending = [i for i in pending if results[i] is None]
+            if not pending:
+                return results
+
+        # Hâlâ çakışma varsa kalanları tek tek gönderip kesin sonucu alırız
+        for i, res in zip(pending, self._send_concurrent([chunk[i] for i in pending])):
+            results[i] = res
+        return results
+
+    @staticmethod
+    def _failed_indexes(response):
+        try:
+            data = response.json().get("data", {}).get("requests", {})
+        except Exception:
+            return {}
+        failed = {}
+        for idx, info in data.items():
+            if not str(idx).isdigit():
+                continue
+            inner = info.get("response") or {}
+            error = inner.get("message") or info.get("message") or "batch request failed"
+            if inner.get("data"):
+                error += f" {inner['data']}"
+            failed[int(idx)] = (error, inner)
+        return failed
+
+    def _send_one(self, op):
+        try:
+            r = self._request(op.method, op.url, json=op.body)
+        except Exception as e:
+            return OpResult(op, False, error=str(e))
+        ok = 200 <= r.status_code < 300
+        body = None
+        if r.content:
+            try:
+                body = r.json()
+            except ValueError:
+                pass
+        return OpResult(op, ok, r.status_code, error=None if ok else r.text[:500], body=body)
+
+    def _send_concurrent(self, chunk):
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return list(pool.map(self._send_one, chunk))
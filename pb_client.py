@@ -1,68 +1,251 @@
 # pb_client.py
+import base64
+import json as jsonlib
+import re
+import threading
+import time
 import requests
 import datetime
-from dataclasses import dataclass
-from typing import Optional, List, Dict, Any
-from config import PB_BASE_URL, PLACE_ID
+from dataclasses import dataclass, field
+from typing import Optional, List, Dict, Any, Iterator, Sequence
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from config import (
+    PB_BASE_URL, PLACE_ID, PB_TIMEOUT_SECONDS, PB_POOL_SIZE, PB_RETRIES,
+    PB_TOKEN_REFRESH_MARGIN_SECONDS
+)
+from pb_pages import iter_records, PAGE_SIZE
+from pb_queries import QUERIES
+from pb_batch import BatchWriter
+import metrics
+from log import get_logger
+
+log = get_logger("pb")
+REQUEST_SECONDS = metrics.histogram("pb_request_seconds", "PocketBase request latency", ("route",))
+REQUEST_ERRORS = metrics.counter("pb_request_errors_total",
+                                 "PocketBase requests that failed (network error or 5xx)", ("route",))
+LOGIN_SECONDS = metrics.histogram("pb_login_seconds", "Time to log in (all endpoints tried)")
+LOGINS = metrics.counter("pb_logins_total", "Login attempts", ("result",))
+_LOGIN_OK, _LOGIN_FAILED = LOGINS.labels("ok"), LOGINS.labels("failed")
+
+# Giriş denenecek uç noktalar (sırayla)
+USER_AUTH = "/api/collections/users/auth-with-password"
+ADMIN_AUTH = "/api/admins/auth-with-password"
+SUPERUSER_AUTH = "/api/collections/_superusers/auth-with-password"
+
+_RECORD_ID_RE = re.compile(r"/records/[^/?]+")
+
+_shared_session = None
+_shared_lock = threading.Lock()
+
+
+def shared_session() -> requests.Session:
+    """
+    Process-wide pooled keep-alive session. Agent, forecaster and uploader
+    clients all go through it, so every call reuses the same connections.
+    """
+    global _shared_session
+    with _shared_lock:
+        if _shared_session is None:
+            s = requests.Session()
+            retry = Retry(total=PB_RETRIES, connect=PB_RETRIES, read=PB_RETRIES, status=PB_RETRIES,
+                          backoff_factor=0.3, status_forcelist=(502, 503, 504),
+                          allowed_methods=frozenset({"GET", "PATCH", "DELETE"}),
+                          raise_on_status=False)
+            adapter = HTTPAdapter(pool_connections=2, pool_maxsize=PB_POOL_SIZE, max_retries=retry)
+            s.mount("http://", adapter)
+            s.mount("https://", adapter)
+            s.headers["Accept-Encoding"] = "gzip, deflate"
+            _shared_session = s
+        return _shared_session
+
+
+def _token_expiry(token: Optional[str]) -> Optional[float]:
+    """JWT 'exp' alanı (epoch sn); çözülemezse None."""
+    try:
+        payload = token.split(".")[1]
+        return float(jsonlib.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))["exp"])
+    except Exception:
+        return None
+
+
+class EndpointStats:
+    __slots__ = ("count", "errors", "total_s", "max_s", "latency", "failures")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+
 
 @dataclass
 class PBClient:
-    base_url: str
+    """
+    Thread-safe PocketBase client on the shared pooled session.
+
+    Timeouts and retries are applied to every call. Idempotent methods are
+    retried on connection errors and 502/503/504. The token is refreshed
+    shortly before its JWT expiry, or once after a 401. Latency and error
+    counts are kept per endpoint (record ids collapsed to ':id').
+    """
+    base_url: str = PB_BASE_URL
     token: Optional[str] = None
     user_id: Optional[str] = None
     is_admin: bool = False
+    timeout: float = PB_TIMEOUT_SECONDS
+    session: requests.Session = field(default_factory=shared_session, repr=False)
+    _credentials: Optional[tuple] = field(default=None, init=False, repr=False)
+    _token_exp: Optional[float] = field(default=None, init=False, repr=False)
+    _auth_lock: threading.RLock = field(default_factory=threading.RLock, init=False, repr=False)
+    _stats: Dict[str, EndpointStats] = field(default_factory=dict, init=False, repr=False)
+    _stats_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
 
-    def login_with_password(self, email: str, password: str):
-        url = f"{self.base_url}/api/collections/users/auth-with-password"
-        payload = {"identity": email, "password": password}
+    def __post_init__(self):
+        self.base_url = self.base_url.rstrip("/")
+        self.writer = BatchWriter(self.request)
 
+    # --- Kimlik Doğrulama ---
+
+    def login(self, email: str, password: str, endpoints: Sequence[str] = (USER_AUTH, ADMIN_AUTH)) -> bool:
+        """Uç noktaları sırayla dener; bilgiler token yenilemek için saklanır."""
+        with self._auth_lock:
+            self.set_credentials(email, password, endpoints)
+            return self._login()
+
+    def set_credentials(self, email: str, password: str, endpoints: Sequence[str] = (USER_AUTH, ADMIN_AUTH)):
+        """Stores credentials without logging in; the first request (or ensure_auth) logs in."""
+        with self._auth_lock:
+            self._credentials = (email, password, tuple(endpoints))
+
+    def _login(self) -> bool:
+        email, password, endpoints = self._credentials
+        payload = {"identity": email, "password": password}
+        last_error = None
+        t0 = time.perf_counter()
         try:
-            r = requests.post(url, json=payload, timeout=10)
-            data = r.json()
-        except Exception as e:
-            print(f"[PB] Giriş hatası: {e}")
-            return
+            for ep in endpoints:
+                try:
+                    r = self._send("POST", ep, payload, None, None, token="")
+                except requests.RequestException as e:
+                    last_error = e
+                    continue
+                if r.status_code == 200:
+                    data = r.json()
+                    self.token = data.get("token")
+                    self._token_exp = _token_expiry(self.token)
+                    self.user_id = (data.get("record") or data.get("admin") or {}).get("id")
+                    self.is_admin = ep != USER_AUTH
+                    _LOGIN_OK.inc()
+                    return True
+                last_error = f"{ep} -> {r.status_code}"
+            _LOGIN_FAILED.inc()
+            log.warning("Giriş başarısız", error=last_error)
+            return False
+        finally:
+            LOGIN_SECONDS.observe(time.perf_counter() - t0)
 
-        if "token" not in data:
-            print(f"[PB] Token alınamadı. Yanıt: {data}")
-            return
+    def login_with_password(self, email: str, password: str):
+        if self.login(email, password, (USER_AUTH,)):
+            log.info("Giriş başarılı", user_id=self.user_id)
+
+    def ensure_auth(self) -> bool:
+        """Token yoksa ya da süresi dolmak üzereyse yeniden giriş yapar."""
+        if self.token and (self._token_exp is None
+                           or self._token_exp - time.time() > PB_TOKEN_REFRESH_MARGIN_SECONDS):
+            return True
+        with self._auth_lock:
+            if self.token and (self._token_exp is None
+                               or self._token_exp - time.time() > PB_TOKEN_REFRESH_MARGIN_SECONDS):
+                return True
+            return bool(self._credentials) and self._login()
 
-        self.token = data["token"]
-        self.user_id = data["record"]["id"]
-        print(f"[PB] Giriş başarılı. ID: {self.user_id}")
+    def _refresh_after_401(self, stale_token):
+        with self._auth_lock:
+            # Başka bir thread zaten yenilediyse tekrar giriş yapma
+            if self.token != stale_token:
+                return True
+            return self._login()
 
-    def _auth_headers(self):
+    def _auth_headers(self, token=None):
+        token = self.token if token is None else token
         return {
             "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.token}" if self.token else ""
+            "Authorization": f"Bearer {token}" if token else ""
         }
 
+    # --- HTTP ---
+
+    def _send(self, method, path, json, params, timeout, token):
+        route = f"{method} {_RECORD_ID_RE.sub('/records/:id', path)}"
+        t0 = time.perf_counter()
+        ok = False
+        try:
+            r = self.session.request(method, f"{self.base_url}{path}", json=json, params=params,
+                                     headers=self._auth_headers(token), timeout=timeout or self.timeout)
+            ok = r.status_code < 500
+            return r
+        finally:
+            elapsed = time.perf_counter() - t0
+            with self._stats_lock:
+                st = self._stats.get(route)
+                if st is None:
+                    st = self._stats[route] = EndpointStats()
+                    st.latency = REQUEST_SECONDS.labels(route)
+                    st.failures = REQUEST_ERRORS.labels(route)
+                st.latency.observe(elapsed)
+                if not ok:
+                    st.failures.inc()
+                st.count += 1
+                st.errors += not ok
+                st.total_s += elapsed
+                st.max_s = max(st.max_s, elapsed)
+
+    def request(self, method: str, path: str, json=None, params=None, timeout=None) -> requests.Response:
+        """
+        Sends one authenticated request. Network errors (after retries) are
+        raised; HTTP error statuses are returned for the caller to handle.
+        """
+        if self._credentials:
+            self.ensure_auth()
+        token = self.token
+        r = self._send(method, path, json, params, timeout, token)
+        if r.status_code == 401 and self._credentials and self._refresh_after_401(token):
+            r = self._send(method, path, json, params, timeout, self.token)
+        return r
+
+    def latency_stats(self) -> Dict[str, Dict[str, float]]:
+        with self._stats_lock:
+            return {route: {"count": st.count, "errors": st.errors,
+                            "avg_ms": st.total_s / st.count * 1000 if st.count else 0.0,
+                            "max_ms": st.max_s * 1000}
+                    for route, st in self._stats.items()}
+
+    def iter_records(self, collection, filter_str="", sort="-created", per_page=PAGE_SIZE, **kwargs):
+        return iter_records(self.request, collection, filter_str=filter_str, sort=sort, per_page=per_page, **kwargs)
+
+    def query(self, name, filter_str="", **kwargs):
+        """Runs a named list query from pb_queries.QUERIES: its collection, sort and projected fields."""
+        q = QUERIES[name]
+        return self.iter_records(q.collection, filter_str, sort=q.sort, fields=q.fields, **kwargs)
+
     def create_sensor_reading(self, payload: dict):
-        url = f"{self.base_url}/api/collections/sensor_readings/records"
         body = dict(payload)
         body["place_id"] = PLACE_ID
         try:
-            requests.post(url, json=body, headers=self._auth_headers(), timeout=5)
+            self.request("POST", "/api/collections/sensor_readings/records", json=body)
         except Exception as e:
-            print(f"[PB] Okuma gönderme hatası: {e}")
+            log.warning("Okuma gönderme hatası", error=e)
 
     # --- Tahmin İçin Gerekli Metodlar ---
 
     def get_recent_readings(self, limit=20) -> List[Dict[str, Any]]:
-        url = f"{self.base_url}/api/collections/sensor_readings/records"
-        params = {
-            "sort": "-created",
-            "limit": limit,
-            "filter": f"place_id='{PLACE_ID}'"
-        }
         try:
-            r = requests.get(url, params=params, headers=self._auth_headers(), timeout=5)
-            return r.json().get("items", [])
+            return list(self.query("recent_readings", f"place_id='{PLACE_ID}'", limit=limit))
         except Exception:
             return []
 
     def create_forecast(self, target_ts: datetime.datetime, occupancy: float, comfort: float):
-        url = f"{self.base_url}/api/collections/forecasts/records"
         ts_str = target_ts.strftime("%Y-%m-%d %H:%M:%SZ")
         payload = {
             "place_id": PLACE_ID,
@@ -71,25 +254,35 @@ class PBClient:
             "predicted_comfort_score": round(comfort, 2)
         }
         try:
-            requests.post(url, json=payload, headers=self._auth_headers(), timeout=5)
+            self.request("POST", "/api/collections/forecasts/records", json=payload)
         except Exception as e:
-            print(f"[PB] Tahmin gönderme hatası: {e}")
-            
-    def get_historical_readings(self, days=7) -> List[Dict[str, Any]]:
-        url = f"{self.base_url}/api/collections/sensor_readings/records"
-        
+            log.warning("Tahmin gönderme hatası", error=e)
+
+    def get_last_forecast_time(self, place_id: str = PLACE_ID) -> Optional[float]:
+        """Epoch time the place's newest forecast record was created, or None."""
+        try:
+            items = list(self.query("last_forecast", f"place_id='{place_id}'", limit=1))
+            if items:
+                created = items[0]["created"].replace("Z", "+00:00")
+                return datetime.datetime.fromisoformat(created).timestamp()
+        except (requests.RequestException, KeyError, ValueError) as e:
+            log.warning("Son tahmin zamanı alınamadı", error=e)
+        return None
+
+    def iter_historical_readings(self, days=7) -> Iterator[Dict[str, Any]]:
+        """Son `days` günün okumalarını sayfa sayfa, tamamını getirir."""
         # PocketBase tarih formatı UTC gerektirir
-        start_date = (datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=days))
-        start_str = start_date.strftime("%Y-%m-%d %H:%M:%SZ")
-        
-        params = {
-            "sort": "-created",
-            "perPage": 500, 
-            "filter": f"place_id='{PLACE_ID}' && created >= '{start_str}'"
-        }
+        now = datetime.datetime.now(datetime.timezone.utc)
+        start_str = (now - datetime.timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%SZ")
+        end_str = now.strftime("%Y-%m-%d %H:%M:%SZ")
+
+        return self.query(
+            "recent_readings",
+            filter_str=f"place_id='{PLACE_ID}' && created >= '{start_str}' && created <= '{end_str}'")
+
+    def get_historical_readings(self, days=7) -> List[Dict[str, Any]]:
         try:
-            r = requests.get(url, params=params, headers=self._auth_headers(), timeout=10)
-            return r.json().get("items", [])
+            return list(self.iter_historical_readings(days))
         except Exception as e:
-            print(f"[PB] Geçmiş veri çekme hatası: {e}")
-            return []
\ No newline at end of file
+            log.warning("Geçmiş veri çekme hatası", error=e)
+            return []
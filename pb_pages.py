@@ -0,0 +1,88 @@
+# pb_pages.py
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, List, Optional, Sequence
+
+# PocketBase tek sayfada en fazla 1000 kayıt döndürür.
+PAGE_SIZE = 1000
+MAX_IN_FLIGHT = 4
+
+
+def iter_pages(request: Callable, collection: str, filter_str: str = "", sort: str = "-created",
+               per_page: int = PAGE_SIZE, max_in_flight: int = MAX_IN_FLIGHT,
+               params: Optional[dict] = None, fields: Optional[Sequence[str]] = None,
+               skip_total: bool = True, limit: Optional[int] = None) -> Iterator[List[dict]]:
+    """
+    Yields the item list of every page of a collection listing, in page order,
+    with at most `max_in_flight` pages requested or buffered at once.
+
+    `fields` limits each record to those fields (PocketBase `fields=`). With
+    `skip_total` the server skips its COUNT query (`skipTotal=1`) and reports
+    totalPages = -1: pages are then requested ahead speculatively and the
+    listing ends at the first short page. Servers that still send totals
+    (older PocketBase) are paged by totalPages as before. With `limit` the
+    listing stops after that many records (perPage shrinks to it).
+
+    `request(method, path, params=None)` must return a requests.Response.
+    HTTP errors are raised, a half-fetched listing is never returned as complete.
+    """
+    path = f"/api/collections/{collection}/records"
+    if sort and "id" not in [s.strip().lstrip("+-") for s in sort.split(",")]:
+        # Aynı 'created' değerine sahip kayıtlar sayfalar arasında kaymasın
+        sort += ",id"
+    if limit is not None:
+        per_page = min(per_page, limit)
+    base = dict(params or {})
+    base.update({"filter": filter_str, "sort": sort, "perPage": per_page})
+    if fields:
+        base["fields"] = ",".join(fields)
+    if skip_total:
+        base["skipTotal"] = 1
+
+    def fetch(page):
+        r = request("GET", path, params={**base, "page": page})
+        r.raise_for_status()
+        return r.json()
+
+    first = fetch(1)
+    total_pages = first.get("totalPages", 1)
+    page_size = first.get("perPage") or per_page  # sunucu perPage'i kırpabilir
+    items = first.get("items", [])[:limit]
+    del first
+    yield items
+    remaining = limit - len(items) if limit is not None else None
+    if 0 <= total_pages <= 1 or (total_pages < 0 and len(items) < page_size) or remaining == 0:
+        return
+
+    def more(page):
+        if limit is not None and (page - 1) * page_size >= limit:
+            return False
+        return total_pages < 0 or page <= total_pages
+
+    pending = deque()
+    next_page = 2
+    with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+        try:
+            while pending or more(next_page):
+                while more(next_page) and len(pending) < max_in_flight:
+                    pending.append(pool.submit(fetch, next_page))
+                    next_page += 1
+                items = pending.popleft().result().get("items", [])
+                if remaining is not None:
+                    items = items[:remaining]
+                    remaining -= len(items)
+                if items:
+                    yield items
+                if remaining == 0 or (total_pages < 0 and len(items) < page_size):
+                    # Kısa sayfa listenin sonu; öndeki (boş) istekler bırakılır
+                    break
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def iter_records(request: Callable, collection: str, **kwargs) -> Iterator[dict]:
+    """Yields records one by one across all pages."""
+    for items in iter_pages(request, collection, **kwargs):
+        yield from items
+
@@ -0,0 +1,136 @@
+# pb_queries.py
+import argparse
+import json
+import os
+import re
+import time
+from typing import Dict, List, NamedTuple, Tuple
+
+from config import PB_BASE_URL, PB_ADMIN_EMAIL, PB_ADMIN_PASSWORD
+from log import get_logger
+
+log = get_logger("pb_queries")
+
+READING_FIELDS = ('recorded_at', 'temp_c', 'rh_percent', 'co2_ppm', 'voc_index', 'pir_occupied', 'comfort_score')
+RESERVATION_FIELDS = ('id', 'place_id', 'start_ts', 'end_ts', 'attendee_count', 'updated')
+FORECAST_FIELDS = ('id', 'target_ts', 'predicted_occupancy', 'predicted_comfort_score')
+_INDEX_NAME_RE = re.compile(r"INDEX\s+(?:IF\s+NOT\s+EXISTS\s+)?[`\"']?(\w+)", re.IGNORECASE)
+
+
+class Query(NamedTuple):
+    """
+    One call site's list query: the fields it actually reads (sent as
+    `fields=`), its sort and the index its filter is written against
+    (equality columns first, then the range/sort column).
+    """
+    collection: str
+    fields: Tuple[str, ...]
+    sort: str
+    index: Tuple[str, ...] = ()
+
+
+QUERIES: Dict[str, Query] = {
+    # forecaster.refresh_training_data (forecaster.TRAINING_SOURCES ile aynı alanlar)
+    'training_readings': Query('sensor_readings', ('recorded_at', 'temp_c', 'co2_ppm', 'voc_index', 'rh_percent'),
+                               'created', ('place_id', 'created')),
+    'training_rollups': Query('sensor_rollups', ('hour_start', 'temp_c_mean', 'co2_ppm_mean', 'voc_index_mean',
+                                                 'rh_percent_mean'), 'created', ('place_id', 'created')),
+    'training_reservations': Query('reservations', RESERVATION_FIELDS, 'updated', ('place_id', 'updated')),
+    # forecaster.refresh_place: son saat (created aralığı indeksten, recorded_at kalan satırlarda süzülür)
+    'refresh_readings': Query('sensor_readings', ('recorded_at', 'temp_c', 'co2_ppm', 'voc_index', 'rh_percent'),
+                              'created', ('place_id', 'created')),
+    'refresh_reservations': Query('reservations', RESERVATION_FIELDS, 'start_ts', ('place_id', 'end_ts')),
+    # forecaster.fetch_reservations: döngü başına tek indirme, mekân süzgeci yok
+    'cycle_reservations': Query('reservations', RESERVATION_FIELDS, 'end_ts', ('end_ts',)),
+    'places': Query('places', ('id', 'name', 'capacity'), 'created'),
+    # publish_forecasts farkı ve ajanın yerel API'si
+    'forecasts': Query('forecasts', FORECAST_FIELDS, 'target_ts', ('place_id', 'target_ts')),
+    'last_forecast': Query('forecasts', ('created',), '-created', ('place_id', 'created')),
+    'recent_readings': Query('sensor_readings', READING_FIELDS + ('created',), '-created', ('place_id', 'created')),
+}
+
+
+def index_name(collection: str, columns: Tuple[str, ...]) -> str:
+    return f"idx_{collection}_{'_'.join(columns)}"
+
+
+def recommended_indexes() -> Dict[str, List[str]]:
+    """collection -> CREATE INDEX statements covering every query in QUERIES (PocketBase collection 'indexes' form)."""
+    out = {}
+    for q in QUERIES.values():
+        if not q.index:
+            continue
+        cols = ", ".join(f"`{c}`" for c in q.index)
+        sql = f"CREATE INDEX `{index_name(q.collection, q.index)}` ON `{q.collection}` ({cols})"
+        if sql not in out.setdefault(q.collection, []):
+            out[q.collection].append(sql)
+    return out
+
+
+def missing_indexes(existing: List[str], wanted: List[str]) -> List[str]:
+    """Statements from `wanted` whose index name does not appear in the collection's `existing` indexes."""
+    names = {m.group(1) for m in map(_INDEX_NAME_RE.search, existing) if m}
+    return [sql for sql in wanted if _INDEX_NAME_RE.search(sql).group(1) not in names]
+
+
+def migration_js(indexes: Dict[str, List[str]]) -> str:
+    """A pb_migrations file (PocketBase >= 0.23 JS API) adding the indexes, and dropping them on revert."""
+    up, down = [], []
+    for collection, stmts in indexes.items():
+        up.append(f"  {{\n    const c = app.findCollectionByNameOrId({json.dumps(collection)})\n"
+                  f"    for (const sql of {json.dumps(stmts)}) {{\n"
+                  f"      if (!c.indexes.includes(sql)) c.indexes.push(sql)\n    }}\n    app.save(c)\n  }}")
+        down.append(f"  {{\n    const c = app.findCollectionByNameOrId({json.dumps(collection)})\n"
+                    f"    const drop = {json.dumps(stmts)}\n"
+                    f"    c.indexes = c.indexes.filter((sql) => !drop.includes(sql))\n    app.save(c)\n  }}")
+    return ("/// <reference path=\"../pb_data/types.d.ts\" />\n"
+            f"migrate((app) => {{\n{chr(10).join(up)}\n}}, (app) => {{\n{chr(10).join(down)}\n}})\n")
+
+
+def apply_indexes(client, indexes: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    """
+    Adds the missing indexes through the collections API (needs a superuser
+    token on `client`). Returns collection -> statements added.
+    """
+    added = {}
+    for collection, stmts in indexes.items():
+        r = client.request("GET", f"/api/collections/{collection}")
+        r.raise_for_status()
+        existing = r.json().get("indexes") or []
+        missing = missing_indexes(existing, stmts)
+        if missing:
+            r = client.request("PATCH", f"/api/collections/{collection}", json={"indexes": existing + missing})
+            r.raise_for_status()
+            log.info("indexes added", collection=collection,
+                     indexes=[_INDEX_NAME_RE.search(sql).group(1) for sql in missing])
+        added[collection] = missing
+    return added
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Indexes behind the PocketBase list queries (pb_queries.QUERIES).")
+    ap.add_argument("--apply", action="store_true", help="add the missing ones through the collections API (superuser)")
+    ap.add_argument("--migration", metavar="DIR", help="write a pb_migrations file into DIR instead")
+    args = ap.parse_args()
+
+    indexes = recommended_indexes()
+    if args.migration:
+        path = os.path.join(args.migration, f"{int(time.time())}_akilliofis_query_indexes.js")
+        with open(path, "w") as fh:
+            fh.write(migration_js(indexes))
+        print(path)
+    elif args.apply:
+        from pb_client import PBClient, SUPERUSER_AUTH, ADMIN_AUTH  # pb_client bu modülü içe aktarır
+        client = PBClient(PB_BASE_URL)
+        if not client.login(PB_ADMIN_EMAIL, PB_ADMIN_PASSWORD, (SUPERUSER_AUTH, ADMIN_AUTH)):
+            raise SystemExit("superuser login failed")
+        for collection, added in apply_indexes(client, indexes).items():
+            print(f"{collection}: {', '.join(_INDEX_NAME_RE.search(s).group(1) for s in added) or 'up to date'}")
+    else:
+        for collection, stmts in indexes.items():
+            for sql in stmts:
+                print(f"{sql};")
+
+
+if __name__ == "__main__":
+    main()
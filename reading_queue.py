@@ -0,0 +1,231 @@
+# reading_queue.py
+import json
+import os
+import random
+import sqlite3
+import string
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+from config import (
+    QUEUE_DB_PATH, QUEUE_MAX_ROWS, UPLOAD_BATCH_SIZE,
+    UPLOAD_BACKOFF_MIN_SECONDS, UPLOAD_BACKOFF_MAX_SECONDS
+)
+from pb_batch import BatchWriter, BatchOp
+import metrics
+from log import get_logger
+
+log = get_logger("uploader")
+UPLOAD_SECONDS = metrics.histogram("upload_batch_seconds", "Time to send one outbox batch")
+UPLOAD_RECORDS = metrics.counter("upload_records_total", "Outbox records by upload outcome", ("result",))
+UPLOAD_FAILURES = metrics.counter("upload_failed_batches_total", "Batches that ended in a retry/backoff")
+QUEUE_DROPPED = metrics.counter("queue_dropped_total", "Records dropped because the outbox was full")
+_DELIVERED, _REJECTED, _DEAD = (UPLOAD_RECORDS.labels(r) for r in ("delivered", "rejected", "dropped"))
+
+# 4xx (401 hariç) dönen bir kayıt bu kadar denemeden sonra kuyruktan atılır
+MAX_ATTEMPTS = 5
+_ID_CHARS = string.ascii_lowercase + string.digits
+
+
+def new_record_id() -> str:
+    """PocketBase uyumlu 15 karakterlik kayıt kimliği."""
+    return "".join(random.choices(_ID_CHARS, k=15))
+
+
+def _id_error(res) -> bool:
+    """
+    A 400 whose error data names the `id` field. Re-sending an existing id
+    is reported this way with a version-specific code (validation_invalid_id
+    up to PocketBase 0.22, a primary-key code in 0.23+).
+    """
+    data = res.body.get("data") if isinstance(res.body, dict) else None
+    return isinstance(data, dict) and "id" in data
+
+
+class ReadingQueue:
+    """
+    SQLite (WAL) backed outbox. Every record gets its PocketBase id when it
+    is queued, so a re-send after a lost response is detected as a duplicate
+    instead of creating a second row. Holds at most `max_rows` records;
+    beyond that the oldest are dropped.
+    """
+
+    def __init__(self, path: str = QUEUE_DB_PATH, max_rows: int = QUEUE_MAX_ROWS):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.max_rows = max_rows
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS outbox (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                collection TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                queued_at REAL NOT NULL
+            )""")
+        self._count = self._db.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def __len__(self):
+        return self._count
+
+    def put(self, collection: str, payload: dict) -> str:
+        body = dict(payload)
+        body.setdefault("id", new_record_id())
+        with self._lock:
+            self._db.execute("INSERT INTO outbox (collection, payload, queued_at) VALUES (?, ?, ?)",
+                             (collection, json.dumps(body), time.time()))
+            self._count += 1
+            if self._count > self.max_rows:
+                extra = self._count - self.max_rows
+                self._db.execute("DELETE FROM outbox WHERE seq IN (SELECT seq FROM outbox ORDER BY seq LIMIT ?)",
+                                 (extra,))
+                self._count -= extra
+                self.dropped += extra
+                QUEUE_DROPPED.inc(extra)
+        return body["id"]
+
+    def peek(self, n: int) -> List[Tuple[int, str, dict]]:
+        with self._lock:
+            rows = self._db.execute("SELECT seq, collection, payload FROM outbox ORDER BY seq LIMIT ?",
+                                    (n,)).fetchall()
+        return [(seq, col, json.loads(payload)) for seq, col, payload in rows]
+
+    def ack(self, seqs: List[int]):
+        if not seqs:
+            return
+        with self._lock:
+            cur = self._db.executemany("DELETE FROM outbox WHERE seq = ?", [(s,) for s in seqs])
+            self._count -= cur.rowcount
+
+    def fail(self, seqs: List[int]) -> List[int]:
+        """Deneme sayısını artırır; sınırı aşanları silip seq listesini döndürür."""
+        if not seqs:
+            return []
+        with self._lock:
+            self._db.executemany("UPDATE outbox SET attempts = attempts + 1 WHERE seq = ?", [(s,) for s in seqs])
+            marks = ",".join("?" * len(seqs))
+            dead = [row[0] for row in self._db.execute(
+                f"SELECT seq FROM outbox WHERE attempts >= ? AND seq IN ({marks})", (MAX_ATTEMPTS, *seqs))]
+        self.ack(dead)
+        return dead
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class Uploader(threading.Thread):
+    """
+    Drains a ReadingQueue in batches on its own thread. Network errors back
+    off exponentially; a 401 triggers `login` and, if it succeeds, an
+    immediate retry.
+    """
+
+    def __init__(self, queue: ReadingQueue, request: Callable, login: Optional[Callable] = None,
+                 batch_size: int = UPLOAD_BATCH_SIZE):
+        super().__init__(daemon=True)
+        self.queue = queue
+        self.request = request
+        self.writer = BatchWriter(request, chunk_size=batch_size)
+        self.login = login
+        self.batch_size = batch_size
+        self.backoff = UPLOAD_BACKOFF_MIN_SECONDS
+        self.sent = 0
+        self._wake = threading.Event()
+        self._halt = threading.Event()
+
+    def notify(self):
+        self._wake.set()
+
+    def stop(self):
+        self._halt.set()
+        self._wake.set()
+
+    def drain_once(self) -> Tuple[int, bool]:
+        """Bir batch gönderir. (teslim edilen kayıt sayısı, hata oldu mu) döndürür."""
+        rows = self.queue.peek(self.batch_size)
+        if not rows:
+            return 0, False
+        ops = [BatchOp("POST", f"/api/collections/{col}/records", body=payload, key=seq)
+               for seq, col, payload in rows]
+        delivered, rejected, retry, unauthorized = [], [], False, False
+        t0 = time.perf_counter()
+        results = self.writer.submit(ops)
+        UPLOAD_SECONDS.observe(time.perf_counter() - t0)
+        for res in results:
+            if res.ok:
+                delivered.append(res.op.key)
+            elif res.status == 400 and _id_error(res):
+                # Aynı id zaten sunucuda olabilir (önceki gönderim ulaşmış, yanıt kaybolmuş); GET ile doğrulanır
+                found = self._exists(res.op)
+                if found:
+                    delivered.append(res.op.key)
+                elif found is None:
+                    retry = True
+                else:
+                    rejected.append(res.op.key)
+            elif res.status == 401:
+                unauthorized = True
+            elif 400 <= res.status < 500:
+                rejected.append(res.op.key)
+            else:
+                retry = True
+        self.queue.ack(delivered)
+        dead = self.queue.fail(rejected)
+        _DELIVERED.inc(len(delivered))
+        _REJECTED.inc(len(rejected))
+        if dead:
+            _DEAD.inc(len(dead))
+            log.warning("Kayıtlar sunucu tarafından reddedildi, kuyruktan atıldı", count=len(dead))
+        if unauthorized and self.login and self.login():
+            unauthorized = False
+        self.sent += len(delivered)
+        failed = retry or unauthorized or bool(rejected)
+        if failed:
+            UPLOAD_FAILURES.inc()
+        return len(delivered), failed
+
+    def _exists(self, op: BatchOp) -> Optional[bool]:
+        """Whether the op's record id is already on the server; None if that could not be checked."""
+        try:
+            r = self.request("GET", f"{op.url}/{op.body['id']}")
+        except Exception:
+            return None
+        if r.status_code == 200:
+            return True
+        return False if r.status_code == 404 else None
+
+    def step(self) -> Tuple[float, bool]:
+        """
+        Bir gönderim turu. (beklenecek süre, bekleme notify ile kısalabilir mi)
+        döndürür; thread ve asyncio modu aynı geri çekilme kuralını kullanır.
+        """
+        try:
+            sent, failed = self.drain_once()
+        except Exception as e:
+            log.warning("Kuyruk gönderim hatası", error=e)
+            UPLOAD_FAILURES.inc()
+            sent, failed = 0, True
+
+        if failed:
+            delay = self.backoff
+            self.backoff = min(self.backoff * 2, UPLOAD_BACKOFF_MAX_SECONDS)
+            return delay, False
+        self.backoff = UPLOAD_BACKOFF_MIN_SECONDS
+        if sent < self.batch_size:
+            # Kuyruk boşaldı; yeni kayıt gelene kadar bekle
+            return UPLOAD_BACKOFF_MAX_SECONDS, True
+        return 0.0, False
+
+    def run(self):
+        while not self._halt.is_set():
+            self._wake.clear()
+            delay, wakeable = self.step()
+            if delay:
+                (self._wake if wakeable else self._halt).wait(delay)
@@ -0,0 +1,39 @@
+# reporting.py
+from typing import Dict, Optional
+
+from config import REPORT_DEADBANDS, REPORT_HEARTBEAT_SECONDS
+
+
+class DeadbandPolicy:
+    """
+    Decides which samples are written to `sensor_readings`. A sample is sent
+    when a channel has moved more than its deadband away from the last *sent*
+    sample (so slow drift is still reported), when PIR occupancy flips, or
+    when `heartbeat` seconds have passed since the last write. check()
+    returns the reason, or None when the sample can be skipped.
+    """
+
+    def __init__(self, deadbands: Dict[str, float] = REPORT_DEADBANDS,
+                 heartbeat: float = REPORT_HEARTBEAT_SECONDS):
+        self.deadbands = dict(deadbands)
+        self.heartbeat = heartbeat
+        self._last: Optional[dict] = None
+        self._last_at = 0.0
+
+    def check(self, payload: dict, now: float) -> Optional[str]:
+        """`now` is a monotonic time in seconds."""
+        last = self._last
+        if last is None:
+            reason = "first"
+        elif bool(payload.get("pir_occupied")) != bool(last.get("pir_occupied")):
+            reason = "pir"
+        elif any(abs(payload[ch] - last[ch]) > band for ch, band in self.deadbands.items()
+                 if payload.get(ch) is not None and last.get(ch) is not None):
+            reason = "deadband"
+        elif now - self._last_at >= self.heartbeat:
+            reason = "heartbeat"
+        else:
+            return None
+        self._last = payload
+        self._last_at = now
+        return reason
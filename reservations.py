@@ -0,0 +1,82 @@
+# reservations.py
+import datetime
+import heapq
+from typing import Iterable, List, Tuple
+
+import numpy as np
+
+
+def parse_ts(value: str) -> datetime.datetime:
+    """PocketBase tarih metnini saat dilimi olmayan UTC datetime'a çevirir."""
+    return datetime.datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None)
+
+
+def to_ns(times) -> np.ndarray:
+    """datetime listesi / datetime64 dizisi -> int64 nanosaniye."""
+    return np.asarray(times, dtype='datetime64[ns]').astype(np.int64)
+
+
+class ReservationIndex:
+    """
+    Reservations as sorted, non-overlapping segments for vectorized lookups.
+
+    Intervals are half-open [start, end). Where reservations overlap, the
+    largest attendee_count wins, so a double booking counts as the bigger
+    meeting rather than whichever record the API happened to return first.
+    Reservations with end <= start are ignored.
+    """
+
+    def __init__(self, starts: Iterable, ends: Iterable, counts: Iterable):
+        starts, ends = to_ns(list(starts)), to_ns(list(ends))
+        counts = np.asarray(list(counts), dtype=np.int64)
+        keep = ends > starts
+        starts, ends, counts = starts[keep], ends[keep], counts[keep]
+        self.size = len(starts)
+
+        # Segment sınırları: tüm başlangıç/bitiş anları
+        self.bounds = np.unique(np.concatenate([starts, ends]))
+        n_seg = max(len(self.bounds) - 1, 0)
+        self.seg_count = np.zeros(n_seg, dtype=np.int64)
+        self.seg_covered = np.zeros(n_seg, dtype=bool)
+
+        order = np.argsort(starts, kind='stable')
+        active: List[Tuple[int, int]] = []  # (-count, end)
+        j = 0
+        for k in range(n_seg):
+            left = self.bounds[k]
+            while j < len(order) and starts[order[j]] == left:
+                heapq.heappush(active, (-counts[order[j]], ends[order[j]]))
+                j += 1
+            # Bitmiş kayıtlar tembel silinir: yalnızca tepedeki önemli
+            while active and active[0][1] <= left:
+                heapq.heappop(active)
+            if active:
+                self.seg_count[k] = -active[0][0]
+                self.seg_covered[k] = True
+
+    @classmethod
+    def from_records(cls, records: Iterable[dict]) -> "ReservationIndex":
+        starts, ends, counts = [], [], []
+        for r in records:
+            try:
+                s, e = parse_ts(r['start_ts']), parse_ts(r['end_ts'])
+                c = int(r['attendee_count'] or 0)
+            except (KeyError, TypeError, ValueError, AttributeError):
+                continue
+            starts.append(s)
+            ends.append(e)
+            counts.append(c)
+        return cls(starts, ends, counts)
+
+    def lookup(self, times) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns (attendee counts, reserved mask) for every timestamp in one
+        searchsorted pass. `times` may be datetimes or a datetime64 array.
+        """
+        t = to_ns(times)
+        if len(self.seg_count) == 0:
+            return np.zeros(len(t), dtype=np.int64), np.zeros(len(t), dtype=bool)
+        idx = np.searchsorted(self.bounds, t, side='right') - 1
+        valid = (idx >= 0) & (idx < len(self.seg_count))
+        idx = np.clip(idx, 0, len(self.seg_count) - 1)
+        return np.where(valid, self.seg_count[idx], 0), valid & self.seg_covered[idx]
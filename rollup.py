@@ -0,0 +1,101 @@
+# rollup.py
+import datetime
+import warnings
+from typing import Optional
+
+import numpy as np
+
+from config import SENSOR_INTERVAL_SECONDS
+
+# Saatlik özet çıkarılan kanallar (payload alan adlarıyla aynı)
+ROLLUP_CHANNELS = ('temp_c', 'rh_percent', 'co2_ppm', 'voc_index', 'comfort_score')
+ROLLUP_STATS = ('mean', 'min', 'max', 'p95')
+
+
+def _weighted_quantile(values: np.ndarray, weights: np.ndarray, q: float) -> float:
+    """Smallest value whose cumulative weight reaches q of the total (NaNs skipped)."""
+    ok = ~np.isnan(values) & (weights > 0)
+    if not ok.any():
+        return np.nan
+    order = np.argsort(values[ok])
+    cum = np.cumsum(weights[ok][order])
+    return float(values[ok][order][min(np.searchsorted(cum, q * cum[-1]), len(cum) - 1)])
+
+
+class HourlyRollup:
+    """
+    Streams samples into per-hour aggregates for the `sensor_rollups`
+    collection: mean / min / max / p95 of every channel, PIR occupancy
+    fraction and sample count. Each sample is weighted by the seconds it
+    stands for, so adaptive sampling (dense while occupied, sparse while
+    idle) does not tilt means, p95 and pir_fraction toward busy minutes.
+    Buffers are preallocated for one hour at `interval` and only grow if
+    samples arrive faster.
+    """
+
+    def __init__(self, place_id: str, interval: float = SENSOR_INTERVAL_SECONDS):
+        self.place_id = place_id
+        self.interval = interval
+        self._values = np.empty((len(ROLLUP_CHANNELS), int(3600 // max(interval, 1)) + 1))
+        self._weights = np.empty(self._values.shape[1])
+        self._n = 0
+        self._pir = 0.0  # PIR dolu geçen saniye
+        self.hour_start: Optional[datetime.datetime] = None
+
+    def __len__(self):
+        return self._n
+
+    def add(self, ts: datetime.datetime, sample: dict, seconds: Optional[float] = None) -> Optional[dict]:
+        """
+        Adds one sample (keys from ROLLUP_CHANNELS plus 'pir_occupied') that
+        stands for `seconds` of the hour (default: the constructor interval).
+        Returns the finished previous hour's payload when `ts` starts a new hour.
+        """
+        seconds = self.interval if seconds is None else seconds
+        hour = ts.replace(minute=0, second=0, microsecond=0)
+        finished = None
+        if self.hour_start is not None and hour != self.hour_start:
+            finished = self.flush()
+        self.hour_start = hour
+
+        if self._n == self._values.shape[1]:
+            self._values = np.concatenate([self._values, np.empty_like(self._values)], axis=1)
+            self._weights = np.concatenate([self._weights, np.empty_like(self._weights)])
+        for i, ch in enumerate(ROLLUP_CHANNELS):
+            value = sample.get(ch)
+            self._values[i, self._n] = np.nan if value is None else value
+        self._weights[self._n] = seconds
+        self._pir += seconds * bool(sample.get('pir_occupied'))
+        self._n += 1
+        return finished
+
+    def flush(self) -> Optional[dict]:
+        """Closes the current (possibly partial) hour and returns its payload."""
+        if not self._n:
+            return None
+        vals = self._values[:, :self._n]
+        weights = self._weights[:self._n]
+        total = weights.sum()
+        payload = {
+            "place_id": self.place_id,
+            "hour_start": self.hour_start.strftime("%Y-%m-%d %H:%M:%S"),
+            "samples": self._n,
+            "pir_fraction": round(self._pir / total, 4) if total > 0 else 0.0,
+        }
+        with warnings.catch_warnings():
+            # Saat boyunca hiç okunamayan kanal tamamen NaN olur -> None yazılır
+            warnings.simplefilter("ignore", RuntimeWarning)
+            ok = ~np.isnan(vals)
+            stats = {
+                'mean': np.where(ok, vals, 0.0) @ weights / (ok @ weights),
+                'min': np.nanmin(vals, axis=1),
+                'max': np.nanmax(vals, axis=1),
+                'p95': np.array([_weighted_quantile(row, weights, 0.95) for row in vals]),
+            }
+        for i, ch in enumerate(ROLLUP_CHANNELS):
+            for stat in ROLLUP_STATS:
+                value = float(stats[stat][i])
+                payload[f"{ch}_{stat}"] = None if np.isnan(value) else round(value, 3)
+        self._n = 0
+        self._pir = 0.0
+        return payload
@@ -0,0 +1,66 @@
+# sampling.py
+from collections import deque
+from typing import Optional, Tuple
+
+from config import (
+    SENSOR_INTERVAL_SECONDS, SAMPLING_FAST_SECONDS, SAMPLING_IDLE_SECONDS, SAMPLING_OCCUPIED_HOLD_SECONDS,
+    SAMPLING_IDLE_AFTER_SECONDS, SAMPLING_TREND_WINDOW_SECONDS, SAMPLING_CO2_TREND_PPM_PER_MIN,
+    SAMPLING_VOC_TREND_PER_MIN
+)
+
+
+class AdaptiveSampler:
+    """
+    Picks the sampling interval from PIR motion and the CO2 / VOC trend.
+
+    "fast" while there was motion in the last `occupied_hold` seconds (people
+    sitting still do not retrigger a PIR) or while CO2 or VOC changes faster
+    than its trend threshold over `trend_window`; "idle" once there has been
+    no motion for `idle_after` seconds and nothing is trending; "normal"
+    otherwise. motion() is meant for the PIR's rising-edge callback and
+    observe() for every processed sample. All times are monotonic seconds.
+    """
+    INTERVALS = {"fast": SAMPLING_FAST_SECONDS, "normal": SENSOR_INTERVAL_SECONDS, "idle": SAMPLING_IDLE_SECONDS}
+
+    def __init__(self, now: float, occupied_hold: float = SAMPLING_OCCUPIED_HOLD_SECONDS,
+                 idle_after: float = SAMPLING_IDLE_AFTER_SECONDS, trend_window: float = SAMPLING_TREND_WINDOW_SECONDS,
+                 co2_trend: float = SAMPLING_CO2_TREND_PPM_PER_MIN, voc_trend: float = SAMPLING_VOC_TREND_PER_MIN):
+        self.occupied_hold = occupied_hold
+        self.idle_after = idle_after
+        self.trend_window = trend_window
+        self.co2_trend = co2_trend
+        self.voc_trend = voc_trend
+        # Açılışta "normal": son hareket tutma süresi kadar önce sayılır, boş oda idle_after sonra yavaşlar
+        self.last_motion = now - occupied_hold
+        self._history = deque()  # (t, co2, voc)
+
+    def motion(self, now: float):
+        self.last_motion = now
+
+    def observe(self, now: float, co2: Optional[float], voc: Optional[float]):
+        self._history.append((now, co2, voc))
+        while self._history and now - self._history[0][0] > self.trend_window:
+            self._history.popleft()
+
+    def trending(self) -> bool:
+        """CO2 or VOC slope (per minute) over the window above its threshold."""
+        if len(self._history) < 2:
+            return False
+        (t0, co2_0, voc_0), (t1, co2_1, voc_1) = self._history[0], self._history[-1]
+        # Pencerenin yarısı dolmadan eğim gürültüdür
+        if t1 - t0 < self.trend_window / 2:
+            return False
+        minutes = (t1 - t0) / 60
+        return bool((co2_0 and co2_1 and abs(co2_1 - co2_0) / minutes > self.co2_trend)
+                    or (voc_0 is not None and voc_1 is not None and abs(voc_1 - voc_0) / minutes > self.voc_trend))
+
+    def interval(self, now: float) -> Tuple[float, str]:
+        """(seconds until the next sample, mode)."""
+        quiet = now - self.last_motion
+        if quiet < self.occupied_hold or self.trending():
+            mode = "fast"
+        elif quiet >= self.idle_after:
+            mode = "idle"
+        else:
+            mode = "normal"
+        return self.INTERVALS[mode], mode
@@ -1,57 +1,255 @@
 #sensor_agent.py
+import asyncio
 import time
 import datetime
+import json
 import threading
-import requests
 import os
 import math
+import sys
+from concurrent.futures import ThreadPoolExecutor
 import board 
 from config import (
     PB_BASE_URL, PB_ADMIN_EMAIL, PB_ADMIN_PASSWORD, PLACE_ID, 
-    SENSOR_INTERVAL_SECONDS, TEMP_CORRECTION_FACTOR, WARMUP_SKIP_COUNT
+    SENSOR_INTERVAL_SECONDS, TEMP_CORRECTION_FACTOR, WARMUP_SECONDS, AGENT_MODE,
+    FORECAST_MODE, METRICS_HOST, METRICS_PORT, STARTUP_DELAY_SECONDS, AGENT_STATE_PATH,
+    GAS_HISTORY_LEN, TEMP_HISTORY_LEN, CO2_EMA_ALPHA, FILTER_STATE_SAVE_SECONDS, FILTER_STATE_MAX_AGE_SECONDS,
+    REPORT_POLICY_ENABLED, FORECAST_REFRESH_SECONDS, SAMPLING_ADAPTIVE, LOCAL_API_HOST, LOCAL_API_PORT
 )
-from forecaster import WeeklyForecaster 
+import metrics
+from log import get_logger, setup as setup_logging
+# forecaster (pandas/sklearn) burada import edilmez: süreç modunda yalnızca işçi süreç yükler
+from forecast_worker import ForecastWorker
+from local_api import LocalState, serve as serve_local_api
 from comfort import calc_comfort_score
+from pb_client import PBClient, USER_AUTH, ADMIN_AUTH
+from reading_queue import ReadingQueue, Uploader
+from reporting import DeadbandPolicy
+from rollup import HourlyRollup
+from sampling import AdaptiveSampler
+from smoothing import MovingAverage, ExponentialMovingAverage, RollingMedian
 from gpiozero import MotionSensor
 from adafruit_bme680 import Adafruit_BME680_I2C
 import adafruit_scd4x
 
+# Okunamayan sensörün alanları bu değerlerle gönderilir
+EMPTY_READING = {"temp": 0.0, "raw_temp": 0.0, "cpu_temp": 0.0, "rh": 0.0, "voc_index": 0.0, "co2": 0, "pir": False}
+SENSORS = ("bme680", "scd4x", "pir")
+
+log = get_logger("agent")
+# Sıcak yolda etiket araması olmasın diye alt metrikler bir kez bağlanır
+_read_seconds = metrics.histogram("agent_sensor_read_seconds", "Sensor read duration", ("sensor",))
+READ_SECONDS = {name: _read_seconds.labels(name) for name in SENSORS}
+_read_errors = metrics.counter("agent_sensor_errors_total", "Sensor reads that raised", ("sensor",))
+READ_ERRORS = {name: _read_errors.labels(name) for name in SENSORS}
+_late_reads = metrics.counter("agent_late_reads_total", "Reads that missed the tick budget (asyncio mode)", ("sensor",))
+LATE_READS = {name: _late_reads.labels(name) for name in SENSORS}
+_samples = metrics.counter("agent_samples_total", "Processed samples", ("state",))
+SAMPLES_WARMUP, SAMPLES_ACTIVE = _samples.labels("warmup"), _samples.labels("active")
+LOOP_SECONDS = metrics.histogram("agent_loop_seconds", "Time from tick start to the sample being queued")
+TICK_LATENESS = metrics.histogram("agent_tick_lateness_seconds", "How late each tick started (asyncio mode)")
+LOOP_OVERRUNS = metrics.counter("agent_loop_overruns_total", "Ticks that overran the interval or were skipped")
+QUEUE_DEPTH = metrics.gauge("agent_queue_depth", "Records waiting in the outbox")
+_readings_sent = metrics.counter("agent_readings_sent_total", "Readings queued for upload, by reason", ("reason",))
+READINGS_SENT = {r: _readings_sent.labels(r) for r in ("first", "pir", "deadband", "heartbeat", "all")}
+SAMPLE_INTERVAL = metrics.gauge("agent_sample_interval_seconds", "Current sampling interval (adaptive sampling)")
+_pir_edges = metrics.counter("agent_pir_edges_total", "PIR edge events", ("edge",))
+PIR_EDGES = {e: _pir_edges.labels(e) for e in ("motion", "no_motion")}
+READINGS_SUPPRESSED = metrics.counter("agent_readings_suppressed_total",
+                                      "Readings not written because nothing changed (writes saved)")
+
+
+def _load_state(path=AGENT_STATE_PATH):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+_state_lock = threading.Lock()
+
+
+def _save_state(state, path=AGENT_STATE_PATH):
+    # Tahmin thread'i ve örnekleme döngüsü aynı dosyaya yazabilir
+    with _state_lock:
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + ".tmp", "w") as f:
+                json.dump(state, f)
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            log.warning("Durum dosyası yazılamadı", error=e)
+
 class SensorAgent:
     def __init__(self):
-        print("--- AKILLI OFİS ARACISI BAŞLATILDI ---")
-        
-        self.forecaster = WeeklyForecaster()
-        self.token = None
-        self._login()
-        
-        print(">> İlk haftalık tahmin tetikleniyor...")
-        t = threading.Thread(target=self.forecaster.run_cycle)
-        t.daemon = True
-        t.start()
+        log.info("AKILLI OFİS ARACISI BAŞLATILDI", place_id=PLACE_ID)
         
+        # Son tahmin zamanı, filtre geçmişi (bkz. AGENT_STATE_PATH)
+        self.state = _load_state()
+
+        # Aracı ve tahminci ayrı hesaplarla ama aynı bağlantı havuzuyla konuşur
+        self.pb = PBClient(PB_BASE_URL)
+        self.forecaster = None
+        self._forecast_lock = threading.Lock()  # thread modunda aynı anda tek döngü
+        # Tahmin ayrı süreçte: eğitim örnekleme döngüsüyle GIL için yarışmaz.
+        # Süreç ilk tahmin zamanı gelince başlatılır.
+        self.forecast_worker = ForecastWorker(on_event=self._on_forecast_event) if FORECAST_MODE == "process" else None
+        # Giriş arka planda yapılır; ondan önce gelen ilk istek aynı kilitte bekler
+        self.pb.set_credentials(PB_ADMIN_EMAIL, PB_ADMIN_PASSWORD, (USER_AUTH, ADMIN_AUTH))
+        threading.Thread(target=self._background_login, name="login", daemon=True).start()
+
+        # Okumalar önce yerel kuyruğa yazılır, ayrı thread ağa gönderir
+        self.queue = ReadingQueue()
+        QUEUE_DEPTH.set_function(lambda: len(self.queue))
+        if len(self.queue):
+            log.info("Kuyrukta bekleyen okumalar gönderilecek", queued=len(self.queue))
+        # Thread modunda kendi thread'inde, asyncio modunda ayrı bir task olarak çalışır
+        self.uploader = Uploader(self.queue, self.pb.request, login=self._login)
+        # Saatlik özetler (ortalama/min/max/p95) 'sensor_rollups' koleksiyonuna gider
+        self.rollup = HourlyRollup(PLACE_ID)
+        # Değişmeyen okumalar yazılmaz (gece boş ofis); None = her okuma gönderilir
+        self.report_policy = DeadbandPolicy() if REPORT_POLICY_ENABLED else None
+        self.suppressed = 0
+        # Yerel API'nin kaynağı: her okuma ve son yayınlanan tahmin; tahmin yoksa PocketBase'den okunur
+        self.local_state = LocalState(loader=self._load_forecasts)
+
+        # Kanal filtreleri okuma anında güncellenir; bir sensörü aynı anda tek thread okur.
+        # Geçmiş durum dosyasından yüklenir, yeniden başlatmada filtre sıfırdan dolmaz.
+        self.filters = {
+            "temp": MovingAverage(TEMP_HISTORY_LEN),
+            "voc_index": RollingMedian(GAS_HISTORY_LEN),
+            "co2": ExponentialMovingAverage(CO2_EMA_ALPHA),
+        }
+        self._restore_filters(self.state.get("filters"))
+        self._filters_saved_at = time.monotonic()
+
+        # Örnekleme aralığı PIR ve CO2/VOC eğilimine göre; None = sabit SENSOR_INTERVAL_SECONDS.
+        # PIR yükselen kenarı bekleyen turu erken uyandırır (_wake_sampling, asyncio modunda yeniden bağlanır).
+        self.sampler = AdaptiveSampler(time.monotonic()) if SAMPLING_ADAPTIVE else None
+        self.sample_mode = None
+        self._wake = threading.Event()
+        self._wake_sampling = self._wake.set
+        self.pir_state = False
+        self._last_co2 = {}
+
         self.pir_sensor = None
         self.bme680 = None
         self.scd4x = None
         self._init_hardware()
 
         # 3. Zamanlayıcılar
-        self.last_forecast_time = time.time()
+        # İlk tahmin hemen başlatılmaz: son başarılı tahmin güncelse onun takvimine
+        # devam edilir, değilse STARTUP_DELAY_SECONDS sonra handle_sample tetikler
         self.forecast_interval = 24 * 3600
+        self._schedule_first_forecast(self.state.get("last_forecast_at"))
+        # Günlük eğitimler arasında saatlik yakın vade yenileme (FORECAST_REFRESH_SECONDS)
+        self.last_refresh_time = time.time()
+        self._forecast_deferred = False
+        # Isınma süreye bağlı: hızlı örneklemede örnek sayısı daha çabuk dolar
+        self.started_at = time.monotonic()
+        self._last_sample_at = None
 
-    def _login(self):
+    def _schedule_first_forecast(self, last_forecast_at):
+        now = time.time()
+        if last_forecast_at and now - last_forecast_at < self.forecast_interval:
+            self.last_forecast_time = last_forecast_at
+            log.info("Son tahmin güncel, ilk tahmin ertelendi",
+                     due_in_s=round(last_forecast_at + self.forecast_interval - now))
+        else:
+            self.last_forecast_time = now - self.forecast_interval + STARTUP_DELAY_SECONDS
+            log.info("İlk haftalık tahmin planlandı", due_in_s=STARTUP_DELAY_SECONDS)
+
+    def _restore_filters(self, saved):
+        if not saved or time.time() - saved.get("saved_at", 0) > FILTER_STATE_MAX_AGE_SECONDS:
+            return
+        for name, f in self.filters.items():
+            f.restore(saved.get(name) or [])
+        log.info("Filtre geçmişi yüklendi", **{name: len(saved.get(name) or []) for name in self.filters})
+
+    def _save_filters(self):
+        self.state["filters"] = {"saved_at": time.time(), **{name: f.history() for name, f in self.filters.items()}}
+        _save_state(self.state)
+        self._filters_saved_at = time.monotonic()
+
+    def _background_login(self):
+        if not self.pb.ensure_auth():
+            return  # Uploader ilk gönderimde tekrar dener
+        log.info("Giriş başarılı", user_id=self.pb.user_id)
+        if self.state.get("last_forecast_at") is None:
+            # Yerel durum yoksa (ilk kurulum, silinmiş veri klasörü) sunucudaki son tahmine bak
+            last = self.pb.get_last_forecast_time(PLACE_ID)
+            if last:
+                self._schedule_first_forecast(last)
+
+    def _start_forecast(self, refresh=False):
+        """
+        Starts a forecast job (process worker or thread). The schedule only
+        advances when a job was actually started; if the worker is busy or in
+        crash-restart backoff, handle_sample retries on the next sample.
+        """
+        if self.forecast_worker:
+            if self.forecast_worker.pid is None:
+                self.forecast_worker.start()
+            started = self.forecast_worker.submit(task="refresh" if refresh else "run") is not None
+        elif not self._forecast_lock.acquire(blocking=False):
+            started = False
+        else:
+            t = threading.Thread(target=self._run_forecast_thread, args=(refresh,))
+            t.daemon = True
+            t.start()
+            started = True
+        if not started:
+            # Her örnekte yeniden denenir; uyarı ertelemenin başında bir kez yazılır
+            if not self._forecast_deferred:
+                log.warning("Tahmin işçisi meşgul, sonraki örnekte yeniden denenecek", refresh=refresh)
+            self._forecast_deferred = True
+            return False
+        self._forecast_deferred = False
+        self.last_refresh_time = time.time()
+        if not refresh:
+            self.last_forecast_time = self.last_refresh_time
+        return True
+
+    def _run_forecast_thread(self, refresh=False):
         try:
-            payload = {"identity": PB_ADMIN_EMAIL, "password": PB_ADMIN_PASSWORD}
-            r = requests.post(f"{PB_BASE_URL}/api/collections/users/auth-with-password", json=payload, timeout=5)
-            if r.status_code == 404:
-                 r = requests.post(f"{PB_BASE_URL}/api/admins/auth-with-password", json=payload, timeout=5)
-            
-            if r.status_code == 200:
-                self.token = r.json().get("token")
-                print(">> Giriş başarılı")
-            else:
-                print(f">> Giriş başarısız: {r.status_code}")
-        except Exception as e: 
-            print(f">> Giriş hatası: {e}")
+            if self.forecaster is None:
+                from forecaster import WeeklyForecaster
+                self.forecaster = WeeklyForecaster()
+            self.forecaster.last_published.clear()
+            results = self.forecaster.run_cycle(refresh=refresh)
+            published = dict(self.forecaster.last_published)
+        finally:
+            self._forecast_lock.release()
+        self._forecasts_published(published)
+        if not refresh:
+            self._forecast_finished(results)
+
+    def _on_forecast_event(self, kind, job_id, info):
+        if kind != "done":
+            return
+        self._forecasts_published(info.get("published") or {})
+        if info.get("task") == "run":
+            self._forecast_finished(info["results"])
+
+    def _forecasts_published(self, published):
+        if PLACE_ID in published:
+            forecasts, partial = published[PLACE_ID]
+            self.local_state.set_forecasts(forecasts, partial)
+
+    def _load_forecasts(self):
+        return list(self.pb.query("forecasts", f"place_id='{PLACE_ID}'"))
+
+    def _forecast_finished(self, results):
+        if any(r.get("status") == "ok" for r in results):
+            self.state["last_forecast_at"] = time.time()
+            _save_state(self.state)
+
+    def _login(self):
+        if self.pb.login(PB_ADMIN_EMAIL, PB_ADMIN_PASSWORD, (USER_AUTH, ADMIN_AUTH)):
+            log.info("Giriş başarılı", user_id=self.pb.user_id)
+            return True
+        return False
 
     def _init_hardware(self):
         try:
@@ -60,7 +258,7 @@ class SensorAgent:
             # --- SCD41 (CO2 sensörü) ---
             self.scd4x = adafruit_scd4x.SCD4X(i2c)
             self.scd4x.start_periodic_measurement()
-            print(">> SCD4x sensörü başlatıldı")
+            log.info("SCD4x sensörü başlatıldı")
 
             # --- BME680 (sıcaklık/nem/VOC sensörü) ---
             try:
@@ -69,14 +267,42 @@ class SensorAgent:
                 self.bme680 = Adafruit_BME680_I2C(i2c, address=0x76)
             
             self.bme680.sea_level_pressure = 1013.25
-            print(">> BME680 sensörü başlatıldı")
+            log.info("BME680 sensörü başlatıldı")
             
             # --- PIR HAREKET SENSÖRÜ (GPIO 17) ---
             self.pir_sensor = MotionSensor(17)
-            print(">> PIR (GPIO 17) hareket sensörü başlatıldı")
+            # Her turda is_active okunmaz: durum kenar olaylarıyla güncellenir
+            self.pir_state = bool(self.pir_sensor.is_active)
+            self.pir_sensor.when_motion = self._on_motion
+            self.pir_sensor.when_no_motion = self._on_no_motion
+            log.info("PIR hareket sensörü başlatıldı", gpio=17)
             
         except Exception as e:
-            print(f"!!! KRİTİK DONANIM HATASI !!!: {e}")
+            log.error("KRİTİK DONANIM HATASI", exc_info=True)
+
+    def _on_motion(self):
+        # gpiozero'nun thread'inden çağrılır
+        PIR_EDGES["motion"].inc()
+        was_active, self.pir_state = self.pir_state, True
+        if self.sampler:
+            self.sampler.motion(time.monotonic())
+        if not was_active:
+            self._wake_sampling()
+
+    def _on_no_motion(self):
+        PIR_EDGES["no_motion"].inc()
+        self.pir_state = False
+
+    def next_interval(self):
+        """Seconds until the next sample; logs and exports adaptive mode changes."""
+        if not self.sampler:
+            return SENSOR_INTERVAL_SECONDS
+        interval, mode = self.sampler.interval(time.monotonic())
+        if mode != self.sample_mode:
+            log.info("Örnekleme hızı değişti", mode=mode, interval_s=interval)
+            self.sample_mode = mode
+            SAMPLE_INTERVAL.set(interval)
+        return interval
 
     def get_cpu_temperature(self):
         try:
@@ -105,124 +331,281 @@ class SensorAgent:
         
         return max(0, min(500, int(voc_index)))
 
-    def read_sensors(self):
-        temp, rh, voc_ohms, co2, pir_val = 0.0, 0.0, 0.0, 0, False
-        raw_temp = 0.0
-        cpu_temp = self.get_cpu_temperature()
-        
-        # BME680 sensör okuması
+    # --- Sensör okumaları (her biri asyncio modunda ayrı thread'de çalışır) ---
+
+    def read_bme680(self):
+        t0 = time.perf_counter()
+        vals = {"cpu_temp": self.get_cpu_temperature()}
         if self.bme680:
             try:
                 raw_temp = self.bme680.temperature
                 rh = self.bme680.relative_humidity
                 voc_ohms = self.bme680.gas
-                
+                cpu_temp = vals["cpu_temp"]
+
                 # Sıcaklık düşürme düzeltmesi (CPU ısısı etkisini azaltma)
                 if cpu_temp > raw_temp:
                     temp = raw_temp - ((cpu_temp - raw_temp) / TEMP_CORRECTION_FACTOR)
                 else:
                     temp = raw_temp
-            except Exception as e:
-                print(f"[UYARI] BME680 okuma hatası: {e}")
 
-        # SCD41 CO2 sensör okuması
-        if self.scd4x and self.scd4x.data_ready:
-            try:
-                co2 = self.scd4x.CO2
+                # VOC dönüşümü (Ohm -> İndeks), ardından yumuşatma
+                voc_index = self.filters["voc_index"].update(self.ohm_to_voc_index(voc_ohms)) if voc_ohms else 0.0
+                vals.update(temp=self.filters["temp"].update(temp), raw_temp=raw_temp, rh=rh, voc_index=voc_index)
             except Exception as e:
-                print(f"[UYARI] SCD4x okuma hatası: {e}")
+                READ_ERRORS["bme680"].inc()
+                log.warning("BME680 okuma hatası", error=e)
+        READ_SECONDS["bme680"].observe(time.perf_counter() - t0)
+        return vals
 
-        # PIR hareket sensörü okuması
-        if self.pir_sensor:
-            try:
-                pir_val = self.pir_sensor.is_active 
-            except Exception as e:
-                print(f"[UYARI] PIR okuma hatası: {e}")
-
-        # VOC dönüşümü (Ohm -> İndeks)
-        voc_index = self.ohm_to_voc_index(voc_ohms) if voc_ohms else 0.0
-
-        return {
-            "temp": temp, 
-            "raw_temp": raw_temp,
-            "cpu_temp": cpu_temp,
-            "rh": rh, 
-            "voc_index": voc_index, 
-            "co2": co2, 
-            "pir": pir_val
+    def read_scd4x(self):
+        # Yeni ölçüm hazır değilse boş döner (asyncio modunda son değer korunur)
+        t0 = time.perf_counter()
+        vals = {}
+        try:
+            if self.scd4x and self.scd4x.data_ready:
+                vals = {"co2": round(self.filters["co2"].update(self.scd4x.CO2))}
+        except Exception as e:
+            READ_ERRORS["scd4x"].inc()
+            log.warning("SCD4x okuma hatası", error=e)
+        READ_SECONDS["scd4x"].observe(time.perf_counter() - t0)
+        return vals
+
+    def read_pir(self):
+        # GPIO okunmaz: _on_motion/_on_no_motion kenar olaylarının bıraktığı durum
+        t0 = time.perf_counter()
+        vals = {"pir": self.pir_state} if self.pir_sensor else {}
+        READ_SECONDS["pir"].observe(time.perf_counter() - t0)
+        return vals
+
+    def read_sensors(self):
+        vals = dict(EMPTY_READING)
+        vals.update(self.read_bme680())
+        # SCD41 5 sn'de bir ölçer; hazır değilse son değer kullanılır (asyncio modundaki gibi)
+        self._last_co2.update(self.read_scd4x())
+        vals.update(self._last_co2)
+        vals.update(self.read_pir())
+        return vals
+
+    def handle_sample(self, vals):
+        """
+        Bir okuma setini işler: log'a yazar, konfor skorunu hesaplar, kaydı
+        kuyruğa ve saatlik özete ekler. Isınma süresindeyse None döner.
+        """
+        # Isınma süresi kontrolü
+        mono = time.monotonic()
+        warm_s = mono - self.started_at
+        if warm_s < WARMUP_SECONDS:
+            SAMPLES_WARMUP.inc()
+            log.info("okuma", state=f"warmup {warm_s:.0f}/{WARMUP_SECONDS}s", **vals)
+            return None
+        # Saatlik özette bu örneğin temsil ettiği süre: bir önceki örnekten beri geçen
+        # (kesintide tek örnek saatlerce ağırlık almasın diye en uzun aralıkla sınırlı)
+        longest = max(AdaptiveSampler.INTERVALS.values()) if self.sampler else SENSOR_INTERVAL_SECONDS
+        seconds = SENSOR_INTERVAL_SECONDS if self._last_sample_at is None else min(mono - self._last_sample_at, longest)
+        self._last_sample_at = mono
+
+        # Konfor skoru hesaplama
+        score = calc_comfort_score(
+            vals['temp'], vals['rh'], vals['co2'], vals['voc_index']
+        )
+        SAMPLES_ACTIVE.inc()
+        log.info("okuma", state="active", comfort_score=score, **vals)
+        if self.sampler:
+            self.sampler.observe(time.monotonic(), vals['co2'], vals['voc_index'])
+
+        now = datetime.datetime.now()
+        payload = {
+            "place_id": PLACE_ID,
+            "recorded_at": now.strftime("%Y-%m-%d %H:%M:%S"),
+            "temp_c": round(vals['temp'], 2),
+            "rh_percent": round(vals['rh'], 2),
+            "voc_index": int(vals['voc_index']),
+            "co2_ppm": int(vals['co2']),
+            "pir_occupied": vals['pir'],
+            "comfort_score": score
         }
 
+        # Yerel API her okumayı görür (SSE aboneleri burada uyanır)
+        self.local_state.add_reading(payload)
+
+        # Ağ beklenmez: kayıt diske yazılır, Uploader gönderir.
+        # Saatlik özet her okumayı alır, sensor_readings'e yalnızca değişenler gider.
+        reason = self.report_policy.check(payload, time.monotonic()) if self.report_policy else "all"
+        queued = False
+        if reason:
+            self.queue.put("sensor_readings", payload)
+            READINGS_SENT[reason].inc()
+            queued = True
+        else:
+            self.suppressed += 1
+            READINGS_SUPPRESSED.inc()
+        finished_hour = self.rollup.add(now, payload, seconds)
+        if finished_hour:
+            self.queue.put("sensor_rollups", finished_hour)
+            queued = True
+        if queued:
+            self.uploader.notify()
+        if len(self.queue) > 1:
+            log.debug("Kuyrukta bekleyen", queued=len(self.queue))
+
+        if time.monotonic() - self._filters_saved_at > FILTER_STATE_SAVE_SECONDS:
+            self._save_filters()
+
+        #Tahmin başlatma
+        if time.time() - self.last_forecast_time > self.forecast_interval:
+            if not self._forecast_deferred:
+                log.info("Tahmin zamanı")
+            self._start_forecast()
+        elif (FORECAST_REFRESH_SECONDS and self.state.get("last_forecast_at")
+              and time.time() - self.last_refresh_time > FORECAST_REFRESH_SECONDS):
+            # Son tam tahminden sonra: eğitilmiş model var, yalnızca önümüzdeki saatler yenilenir
+            self._start_forecast(refresh=True)
+        return payload
+
     def loop(self):
-        print(f">> Döngü başlatıldı. PIR: GPIO 17.")
-        warmup_counter = 0
-        
+        log.info("Döngü başlatıldı", mode="thread")
+        self.uploader.start()
+
         while True:
             start_t = time.time()
-            
+
             # Sensör işlemleri
             vals = self.read_sensors()
-            
-            # Isınma süresi kontrolü
-            is_warmup = warmup_counter < WARMUP_SKIP_COUNT
-            if is_warmup:
-                warmup_counter += 1
-                status_label = f"WARMUP ({warmup_counter}/{WARMUP_SKIP_COUNT})"
-            else:
-                status_label = "ACTIVE"
-                
-            print(f"\n--- SENSOR READING [{status_label}] ---")
-            print(f"CPU Temp      : {vals['cpu_temp']:.1f} C")
-            print(f"Raw Sensor    : {vals['raw_temp']:.1f} C")
-            print(f"Processed Temp: {vals['temp']:.1f} C")
-            print(f"Humidity      : {vals['rh']:.1f} %")
-            print(f"VOC Index     : {vals['voc_index']:.0f}")
-            print(f"PIR           : {vals['pir']}")
-            print(f"CO2           : {vals['co2']} ppm")
-            print(f"-------------------------------------")
-
-            if is_warmup:
-                time.sleep(SENSOR_INTERVAL_SECONDS)
+            self.handle_sample(vals)
+
+            elapsed = time.time() - start_t
+            LOOP_SECONDS.observe(elapsed)
+            interval = self.next_interval()
+            if elapsed > interval:
+                LOOP_OVERRUNS.inc()
+            # PIR yükselen kenarı beklemeyi keser
+            self._wake.wait(max(0, interval - elapsed))
+            self._wake.clear()
+
+    # --- asyncio modu ---
+
+    async def _read_all(self, budget):
+        """
+        Üç sensörü aynı anda, ayrı thread'lerde okur. `budget` saniyede bitmeyen
+        okuma beklenmez: o sensörün son değeri kullanılır, okuma arka planda
+        sürer ve bitmeden aynı sensör için yenisi başlatılmaz.
+        """
+        loop = asyncio.get_running_loop()
+        for name, reader in zip(SENSORS, (self.read_bme680, self.read_scd4x, self.read_pir)):
+            fut = self._inflight.get(name)
+            if fut is not None and not fut.done():
                 continue
-            
-            # Konfor skoru hesaplama
-            score = calc_comfort_score(
-                vals['temp'], vals['rh'], vals['co2'], vals['voc_index']
-            )
-            
-            print(f"Konfor Skoru  : {score}")
-
-            headers = {"Authorization": f"Bearer {self.token}"}
-            payload = {
-                "place_id": PLACE_ID,
-                "recorded_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "temp_c": round(vals['temp'], 2),
-                "rh_percent": round(vals['rh'], 2),
-                "voc_index": int(vals['voc_index']),
-                "co2_ppm": int(vals['co2']),
-                "pir_occupied": vals['pir'],
-                "comfort_score": score 
-            }
-            
+            if fut is not None:
+                self._last[name] = dict(self._last.get(name, {}), **fut.result())
+            self._inflight[name] = loop.run_in_executor(self._sensor_pool, reader)
+
+        await asyncio.wait(self._inflight.values(), timeout=budget)
+        vals = dict(EMPTY_READING)
+        for name, fut in self._inflight.items():
+            if fut.done():
+                self._last[name] = dict(self._last.get(name, {}), **fut.result())
+                self._inflight[name] = None
+            else:
+                self.late_reads[name] = self.late_reads.get(name, 0) + 1
+                LATE_READS[name].inc()
+            vals.update(self._last.get(name, {}))
+        return vals
+
+    async def _sample_loop(self):
+        """
+        Her tur bir öncekinin planlanan anına o anki aralık (next_interval)
+        eklenerek monotonik saatte planlanır, geç kalma birikmez. Bir tur
+        aralığın tamamını aşarsa kaçırılan turlar atlanır ve sayılır. PIR
+        yükselen kenarı bekleyen turu hemen başlatır.
+        """
+        interval = self.next_interval()
+        deadline = time.monotonic()
+        while True:
             try:
-                requests.post(f"{PB_BASE_URL}/api/collections/sensor_readings/records", json=payload, headers=headers, timeout=2)
-            except: 
-                print("Veri gönderimi başarısız (Bağlantı sorunu olabilir mi?)")
-                self._login()
-
-            #Tahmin başlatma
-            if time.time() - self.last_forecast_time > self.forecast_interval:
-                print(">> Tahmin zamanı...")
-                t = threading.Thread(target=self.forecaster.run_cycle)
-                t.daemon = True
-                t.start()
-                self.last_forecast_time = time.time()
+                await asyncio.wait_for(self._sample_wake.wait(), max(0.0, deadline - time.monotonic()))
+            except asyncio.TimeoutError:
+                pass
+            woke = time.monotonic()
+            if self._sample_wake.is_set():
+                self._sample_wake.clear()
+                deadline = min(deadline, woke)
+            self.max_lateness = max(self.max_lateness, woke - deadline)
+            TICK_LATENESS.observe(woke - deadline)
 
-            elapsed = time.time() - start_t
-            time.sleep(max(0, SENSOR_INTERVAL_SECONDS - elapsed))
+            vals = await self._read_all(budget=interval * 0.8)
+            self.handle_sample(vals)
+            LOOP_SECONDS.observe(time.monotonic() - woke)
+
+            interval = self.next_interval()
+            deadline += interval
+            behind = int((time.monotonic() - deadline) // interval)
+            if behind > 0:
+                self.skipped_ticks += behind
+                deadline += behind * interval
+                LOOP_OVERRUNS.inc(behind)
+                log.warning("Örnekleme geride kaldı, turlar atlandı", skipped=behind)
+
+    async def _upload_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self._upload_wake.clear()
+            delay, wakeable = await loop.run_in_executor(self._net_pool, self.uploader.step)
+            if not delay:
+                continue
+            if wakeable:
+                try:
+                    await asyncio.wait_for(self._upload_wake.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                await asyncio.sleep(delay)
+
+    async def run_async(self):
+        log.info("Döngü başlatıldı", mode="asyncio")
+        loop = asyncio.get_running_loop()
+        self._sensor_pool = ThreadPoolExecutor(max_workers=3, thread_name_prefix="sensor")
+        self._net_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="upload")
+        self._inflight, self._last = {}, {}
+        self.late_reads, self.skipped_ticks, self.max_lateness = {}, 0, 0.0
+        # Uploader.notify() kuyruğa yazan her yerden çağrılabilir; asyncio olayına aktar
+        self._upload_wake = asyncio.Event()
+        self.uploader.notify = lambda: loop.call_soon_threadsafe(self._upload_wake.set)
+        self._sample_wake = asyncio.Event()
+        self._wake_sampling = lambda: loop.call_soon_threadsafe(self._sample_wake.set)
+
+        tasks = [asyncio.create_task(self._sample_loop()), asyncio.create_task(self._upload_loop())]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for t in tasks:
+                t.cancel()
+            self._sensor_pool.shutdown(wait=False)
+            self._net_pool.shutdown(wait=False)
+
+    def shutdown(self):
+        # Yarım kalan saat de kuyruğa yazılır; gönderilemezse sonraki açılışta gider
+        partial = self.rollup.flush()
+        if partial:
+            self.queue.put("sensor_rollups", partial)
+        self._save_filters()
+        self.uploader.stop()
+        if self.forecast_worker:
+            self.forecast_worker.stop()
 
 if __name__ == "__main__":
+    setup_logging()
+    if METRICS_PORT and metrics.serve(METRICS_PORT, METRICS_HOST) is None:
+        log.warning("Metrik portu kullanılamıyor", port=METRICS_PORT)
     agent = SensorAgent()
+    if LOCAL_API_PORT and serve_local_api(agent.local_state, LOCAL_API_PORT, LOCAL_API_HOST) is None:
+        log.warning("Yerel API portu kullanılamıyor", port=LOCAL_API_PORT)
+    mode = sys.argv[1] if len(sys.argv) > 1 else AGENT_MODE
     try:
-        agent.loop()
+        if mode == "asyncio":
+            asyncio.run(agent.run_async())
+        else:
+            agent.loop()
     except KeyboardInterrupt:
-        print("\nKapatılıyor...")
\ No newline at end of file
+        log.info("Kapatılıyor")
+        agent.shutdown()
@@ -0,0 +1,176 @@
+# smoothing.py
+import heapq
+from array import array
+from typing import List, Optional, Sequence
+
+
+class MovingAverage:
+    """
+    Mean of the last `size` values. A preallocated ring buffer and a running
+    sum make update() O(1); the sum is recomputed once per wrap so float
+    error cannot accumulate.
+    """
+
+    def __init__(self, size: int):
+        self.size = max(1, int(size))
+        self._buf = array("d", bytes(8 * self.size))
+        self._n = 0
+        self._i = 0
+        self._sum = 0.0
+
+    def __len__(self):
+        return self._n
+
+    def update(self, x: float) -> float:
+        x = float(x)
+        if self._n == self.size:
+            self._sum -= self._buf[self._i]
+        else:
+            self._n += 1
+        self._buf[self._i] = x
+        self._sum += x
+        self._i = (self._i + 1) % self.size
+        if self._i == 0:
+            self._sum = sum(self._buf)
+        return self._sum / self._n
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._sum / self._n if self._n else None
+
+    def history(self) -> List[float]:
+        """Window contents, oldest first."""
+        if self._n < self.size:
+            return self._buf[:self._n].tolist()
+        return self._buf[self._i:].tolist() + self._buf[:self._i].tolist()
+
+    def restore(self, values: Sequence[float]):
+        for x in list(values)[-self.size:]:
+            self.update(x)
+
+
+class ExponentialMovingAverage:
+    """EMA with smoothing factor `alpha` (0 < alpha <= 1); the first value seeds it."""
+
+    def __init__(self, alpha: float):
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha must be in (0, 1]")
+        self.alpha = alpha
+        self.value: Optional[float] = None
+
+    def update(self, x: float) -> float:
+        x = float(x)
+        self.value = x if self.value is None else self.value + self.alpha * (x - self.value)
+        return self.value
+
+    def history(self) -> List[float]:
+        return [] if self.value is None else [self.value]
+
+    def restore(self, values: Sequence[float]):
+        if values:
+            self.value = float(values[-1])
+
+
+class RollingMedian:
+    """
+    Median of the last `size` values with two heaps (lower half as a max-heap,
+    upper half as a min-heap). Values leaving the window are deleted lazily:
+    they are counted per heap and dropped when they reach a top, so update()
+    is O(log size). The heaps are rebuilt from the ring buffer if dead entries
+    pile up.
+    """
+
+    def __init__(self, size: int):
+        self.size = max(1, int(size))
+        self._buf = array("d", bytes(8 * self.size))
+        self._n = 0
+        self._i = 0
+        self._lo: List[float] = []  # negated
+        self._hi: List[float] = []
+        self._lo_n = 0  # canlı eleman sayıları
+        self._hi_n = 0
+        self._lo_dead = {}
+        self._hi_dead = {}
+
+    def __len__(self):
+        return self._n
+
+    def update(self, x: float) -> float:
+        x = float(x)
+        if self._n == self.size:
+            self._discard(self._buf[self._i])
+        else:
+            self._n += 1
+        self._buf[self._i] = x
+        self._i = (self._i + 1) % self.size
+        self._insert(x)
+        if len(self._lo) + len(self._hi) > 2 * self.size + 8:
+            self._rebuild()
+        return self.value
+
+    @property
+    def value(self) -> Optional[float]:
+        if not self._n:
+            return None
+        if self._lo_n > self._hi_n:
+            return -self._lo[0]
+        return (-self._lo[0] + self._hi[0]) / 2
+
+    def _insert(self, x):
+        if self._lo_n and x > -self._lo[0]:
+            heapq.heappush(self._hi, x)
+            self._hi_n += 1
+        else:
+            heapq.heappush(self._lo, -x)
+            self._lo_n += 1
+        self._balance()
+
+    def _discard(self, x):
+        # Tepe her zaman canlıdır: x <= alt yarının en büyüğü ise x alt yarıdadır
+        if x <= -self._lo[0]:
+            self._lo_dead[-x] = self._lo_dead.get(-x, 0) + 1
+            self._lo_n -= 1
+            self._prune(self._lo, self._lo_dead)
+        else:
+            self._hi_dead[x] = self._hi_dead.get(x, 0) + 1
+            self._hi_n -= 1
+            self._prune(self._hi, self._hi_dead)
+        self._balance()
+
+    @staticmethod
+    def _prune(heap, dead):
+        while heap and dead.get(heap[0]):
+            dead[heap[0]] -= 1
+            heapq.heappop(heap)
+
+    def _balance(self):
+        # Alt yarı üst yarıyla eşit ya da bir fazla tutulur
+        if self._lo_n > self._hi_n + 1:
+            heapq.heappush(self._hi, -heapq.heappop(self._lo))
+            self._lo_n -= 1
+            self._hi_n += 1
+            self._prune(self._lo, self._lo_dead)
+        elif self._lo_n < self._hi_n:
+            heapq.heappush(self._lo, -heapq.heappop(self._hi))
+            self._hi_n -= 1
+            self._lo_n += 1
+            self._prune(self._hi, self._hi_dead)
+
+    def _rebuild(self):
+        values = sorted(self.history())
+        half = (len(values) + 1) // 2
+        self._lo = [-v for v in reversed(values[:half])]
+        self._hi = values[half:]
+        self._lo_n, self._hi_n = len(self._lo), len(self._hi)
+        self._lo_dead.clear()
+        self._hi_dead.clear()
+
+    def history(self) -> List[float]:
+        """Window contents, oldest first."""
+        if self._n < self.size:
+            return self._buf[:self._n].tolist()
+        return self._buf[self._i:].tolist() + self._buf[:self._i].tolist()
+
+    def restore(self, values: Sequence[float]):
+        for x in list(values)[-self.size:]:
+            self.update(x)